@@ -6,32 +6,104 @@
 使用sounddevice库进行音频录制
 """
 
+import time
+
+# 启动计时（用于衡量欢迎界面出现所需的时间）
+STARTUP_TIME = time.perf_counter()
+STARTUP_TARGET_MS = 500
+EVENT_POLL_MS = 20  # 界面线程执行后台任务回调的间隔
+
 import tkinter as tk
-from tkinter import ttk, messagebox, filedialog
+from tkinter import ttk, messagebox, filedialog, simpledialog
 import threading
+import bisect
 import os
 import sys
-import time
 import subprocess
-import numpy as np
-import json
-
-# 尝试导入音频库
-try:
-    import sounddevice as sd
-    import soundfile as sf
-    AUDIO_AVAILABLE = True
-    AUDIO_LIB = "sounddevice"
-except ImportError:
+import wave
+from contextlib import ExitStack
+
+from recorder_analytics import EventLog, analyze as analyze_work
+from recorder_audio import (AudioConverter, MultiDeviceCapture, TranscodeQueue,
+                            audio_extension, microphone_names, normalize_audio_format,
+                            write_audio, write_channel_files)
+from recorder_backup import backup_project, verify_backup
+from recorder_config import ConfigLoader, parse_command_line
+from recorder_events import EventCore
+from recorder_export import export_project
+from recorder_import import import_recordings, load_mapping, plan_import
+from recorder_journal import TakeJournal
+from recorder_project import (ProgressStore, ProjectScanner, ProjectSessionCache, RecordPrefetcher, file_signature,
+                              format_duration, format_timestamp, is_valid_speaker, load_prompt_table,
+                              list_speakers, progress_file_path, register_speaker, speaker_directory)
+from recorder_review import ReviewLog, ReviewPlayer, take_verdicts
+from recorder_schedule import PromptScheduler
+from recorder_station import LeaseManager, default_station_id
+from recorder_search import STATUS_FILTERS, prompt_index, search_records
+from recorder_takes import TakeStore, existing_take, replacing_take
+from recorder_verify import DEFAULT_THRESHOLD, create_engine, low_scores, verify_takes
+
+# 音频库在后台线程中延迟加载，欢迎界面无需等待 numpy 和音频驱动
+np = None
+sd = None
+sf = None
+pyaudio = None
+AUDIO_AVAILABLE = False
+AUDIO_LIB = None
+AUDIO_BACKEND_READY = threading.Event()
+_audio_backend_lock = threading.Lock()
+
+
+def load_audio_backend():
+    """加载 numpy 和音频库（只执行一次，可在任意线程调用）"""
+    global np, sd, sf, pyaudio, AUDIO_AVAILABLE, AUDIO_LIB
+    with _audio_backend_lock:
+        if AUDIO_BACKEND_READY.is_set():
+            return
+        try:
+            import numpy
+            np = numpy
+            try:
+                import sounddevice
+                import soundfile
+                sd, sf = sounddevice, soundfile
+                AUDIO_AVAILABLE = True
+                AUDIO_LIB = "sounddevice"
+            except (ImportError, OSError):
+                # 未安装或缺少 PortAudio 动态库
+                try:
+                    import pyaudio as pyaudio_module
+                    pyaudio = pyaudio_module
+                    AUDIO_AVAILABLE = True
+                    AUDIO_LIB = "pyaudio"
+                except ImportError:
+                    AUDIO_AVAILABLE = False
+                    AUDIO_LIB = None
+                    print("Warning: No audio library available. Audio recording will be simulated.")
+        except ImportError:
+            AUDIO_AVAILABLE = False
+            AUDIO_LIB = None
+            print("Warning: numpy is not installed. Audio recording will be simulated.")
+        finally:
+            AUDIO_BACKEND_READY.set()
+
+
+def list_input_devices(pyaudio_instance=None):
+    """列出可用的输入设备名称"""
+    devices = []
     try:
-        import pyaudio
-        import wave
-        AUDIO_AVAILABLE = True
-        AUDIO_LIB = "pyaudio"
-    except ImportError:
-        AUDIO_AVAILABLE = False
-        AUDIO_LIB = None
-        print("Warning: No audio library available. Audio recording will be simulated.")
+        if AUDIO_LIB == "sounddevice":
+            for device in sd.query_devices():
+                if device.get('max_input_channels', 0) > 0:
+                    devices.append(device['name'])
+        elif AUDIO_LIB == "pyaudio" and pyaudio_instance is not None:
+            for i in range(pyaudio_instance.get_device_count()):
+                info = pyaudio_instance.get_device_info_by_index(i)
+                if info.get('maxInputChannels', 0) > 0:
+                    devices.append(info['name'])
+    except Exception as e:
+        print(f"⚠️ 枚举音频设备失败：{e}")
+    return devices
 
 # 多语言支持
 LANGUAGES = {
@@ -70,13 +142,163 @@ LANGUAGES = {
         'console_load_file': '📄 加载文本文件：{}',
         'console_total_records': '📊 总计 {} 条记录',
         'console_load_progress': '📖 加载进度：从第 {} 条开始',
-        'console_load_failed': '⚠️ 加载进度失败：{}',
+        'console_auto_progress': '📝 自动检测进度：从第 {} 条开始',
+        'console_progress_problem': '⚠️ 进度文件 {} 不可用（已保留）：{}',
+        'console_progress_backup': '📦 使用进度备份 {}',
         'console_load_failed_restart': '⚠️ 加载进度失败：{}，从头开始',
+        'status_saving': '💾 正在保存：{}',
+        'status_no_audio': '⚠️ 没有录到音频，未保存',
         # 播放相关状态
         'status_playing': '🔊 正在播放...',
         'status_play_completed': '✅ 播放完成',
         'button_playing': '🔊 播放中...',
-        'playback_button': '🔊 试听'
+        'playback_button': '🔊 试听',
+        # 项目概览
+        'dashboard_title': '📊 项目概览（双击打开）',
+        'dashboard_project': '项目',
+        'dashboard_progress': '完成度',
+        'dashboard_duration': '总时长',
+        'dashboard_last_activity': '最近活动',
+        'dashboard_loading': '正在统计项目...',
+        'dashboard_empty': '暂无录音项目',
+        'dashboard_no_text_file': '找不到该项目的文本文件，请手动选择',
+        # 文本文件更新
+        'prompts_reloaded': '📝 文本文件已更新：新增 {} 条，删除 {} 条，修改 {} 条',
+        'status_prompt_changed': '⚠️ 录制后文本已修改，建议重新录制',
+        # 音频库状态
+        'audio_loading': '⏳ 音频库状态：正在加载...',
+        'audio_ready': '✅ 音频库状态：{} 已就绪（{} 个输入设备）',
+        'audio_ready_short': '✅ 音频库：{}',
+        'audio_simulated': '⚠️ 音频库状态：模拟模式',
+        'audio_simulated_short': '⚠️ 音频库：模拟模式',
+        'console_audio_lib': '🎵 音频库：{}',
+        'console_startup_time': '⏱️ 界面启动耗时 {:.0f} ms（目标 {} ms）',
+        'console_native_capture': '🎚️ 设备不支持 {} Hz / {} 声道，使用原生格式 {} Hz / {} 声道采集并实时转换',
+        # 说话人
+        'menu_switch_speaker': '切换说话人',
+        'speaker_info': ' | 🗣️ 说话人：{}',
+        'speaker_prompt': '输入说话人标识（留空表示不区分说话人）\n已有说话人：{}',
+        'speaker_invalid': '说话人标识不能为空、不能以点开头、不能包含 / \\ : * ? " < > |，'
+                           '也不能是 takes、recovered 或麦克风名称',
+        'speaker_stop_recording': '请先停止录制再切换说话人！',
+        'dashboard_speakers': '（{} 位说话人）',
+        # 备份与校验
+        'menu_backup': '备份项目',
+        'menu_verify_backup': '校验备份',
+        # 工作量统计
+        'menu_analytics': '工作量统计...',
+        'analytics_title': '工作量统计',
+        'analytics_empty': '这个项目还没有工作量记录',
+        'analytics_summary': ('保存条目：{items} 条\n有效工作时间：{active}（每小时 {per_hour} 条）\n'
+                              '录音：{takes} 次，平均 {take} 秒\n每条停留：平均 {dwell} 秒，中位数 {median} 秒\n'
+                              '说话占比：{talk}%\n空闲：{idle_gaps} 次，共 {idle}，最长 {longest}'),
+        'analytics_days': '日期          条目数    工作时间    每小时',
+        'backup_progress': '💾 正在备份：{}/{}',
+        'backup_done': '✅ 备份完成：{} 个录音，新复制 {} 个（{:.1f} MB），{} 个已在备份中\n备份目录：{}',
+        'backup_failed': '备份失败：{}',
+        'verify_choose_mode': '是否重新计算每个文件的校验和？\n\n是：完整校验（较慢）\n否：只检查文件是否存在、大小是否一致',
+        'verify_progress': '🔍 正在校验：{}/{}',
+        'verify_ok': '✅ 备份校验通过',
+        'verify_problems': '⚠️ {} 个文件有问题：\n{}',
+        # 筛选
+        'menu_filter': '筛选条目...',
+        'filter_title': '筛选条目',
+        'filter_query': '文本或 ID 包含（空格分隔多个词）：',
+        'filter_status': '录制状态：',
+        'filter_status_names': ('全部', '已录制', '未录制', '文本已修改', '审听退回', '未审听'),
+        'filter_duration': '录音时长（秒）：',
+        'filter_apply': '筛选',
+        'filter_clear': '取消筛选',
+        'filter_invalid_duration': '时长必须是数字',
+        'filter_no_results': '没有符合条件的条目',
+        'filter_results': '共 {} 条符合条件，上一条/下一条只在结果中切换',
+        'filter_position': '  （🔎 筛选 {}/{}）',
+        'filter_end': '已经是筛选结果的最后一条了！',
+        'filter_start': '已经是筛选结果的第一条了！',
+        # 内容核对
+        'menu_check_content': '核对录音内容...',
+        'check_progress': '🔍 正在识别：{}/{}',
+        'check_failed': '核对录音内容失败：{}',
+        'check_title': '内容核对 - 相似度低于 {:.2f} 的录音',
+        'check_summary': '共核对 {} 条录音，{} 条低于阈值（双击跳转到该条目）',
+        'check_all_ok': '✅ 共核对 {} 条录音，全部达到阈值 {:.2f}',
+        'check_score': '相似度',
+        'check_text': '文本',
+        'check_hypothesis': '识别结果',
+        # 审听模式
+        'menu_review': '审听模式...',
+        'review_title': '审听模式',
+        'review_loading': '正在读取录音...',
+        'review_position': '{}/{}  ID：{}',
+        'review_counts': '本次已审听：通过 {} 条，退回 {} 条',
+        'review_keys': '回车/Y：通过　N/Delete：退回　→：跳过　R：重播　空格：暂停/继续　Esc：结束审听',
+        'review_finished': '✅ 已播放完全部录音，按 Esc 结束审听',
+        'review_summary': '🎧 审听结束：通过 {} 条，退回 {} 条（可在筛选条目中选择“审听退回”重录）',
+        'review_empty': '没有可以审听的录音！',
+        'review_unavailable': '审听模式需要 sounddevice 和 soundfile 库',
+        'review_failed': '无法开始播放：{}',
+        'review_read_failed': '⚠️ 无法读取录音 {}，已跳过：{}',
+        # 录音版本
+        'menu_manage_takes': '录音版本...',
+        'menu_collect_takes': '清理未选用的录音版本',
+        'takes_title': '录音版本 - {}',
+        'takes_duration': '时长',
+        'takes_modified': '录制时间',
+        'takes_active': '当前使用',
+        'takes_use': '使用此版本',
+        'takes_delete_others': '删除其他版本',
+        'takes_confirm_delete': '确定删除该条目未选用的录音版本吗？此操作不可恢复。',
+        'takes_confirm_collect': '确定删除整个项目中未选用的录音版本吗？此操作不可恢复。',
+        'takes_collected': '已删除 {} 个录音版本，释放 {:.1f} MB',
+        # 崩溃恢复
+        'console_journal_salvaged': '🩹 从恢复日志中找回 {} 段未保存的录音',
+        'console_journal_position': '🩹 按恢复日志回到第 {} 条',
+        'journal_salvaged': '上次程序异常退出，已找回 {} 段未保存的录音（可能不完整），保存在：\n{}',
+        'save_failed_title': '保存失败',
+        'save_failed': '保存音频文件失败：{}',
+        'save_failed_salvaged': '\n\n这次录音已另存到：\n{}\n\n可以重试保存（成功后删除另存的文件）。',
+        # 多工位协同录制
+        'station_info': ' | 🖥️ 工位：{}',
+        'console_station_leases': '🖥️ 工位 {}：领取 {} 条（已完成 {}/{}，其他工位持有 {} 条）',
+        'station_leased_elsewhere': '该条目已分配给其他工位，不能录制',
+        'station_nothing_left': '没有可领取的条目：剩余条目均已完成或由其他工位录制中',
+        'schedule_done': '所有条目都已录制完成！',
+        'schedule_failed': '⚠️ 无法使用调度方式 {}，改为按文本顺序：{}',
+        # 数据集导出
+        'menu_export': '导出数据集...',
+        'export_title': '导出数据集',
+        'export_choose_format': '选择导出格式：\n\n是: WebDataset（tar 分片 + JSONL）\n否: Kaldi（wav.scp / text / utt2dur）\n取消: 不导出',
+        'export_choose_dir': '选择导出目录',
+        'export_progress': '📦 正在导出：{}/{}',
+        'export_done': '✅ 导出完成：{} 条，{} 个分片（跳过 {} 个已完成分片）',
+        'export_failed': '导出失败：{}',
+        # FLAC 转码
+        'menu_transcode': '转换录音为 FLAC...',
+        'transcode_title': '转换为 FLAC',
+        'transcode_confirm': '将 {} 个 WAV 录音无损转换为 FLAC（校验一致后删除 WAV），继续吗？',
+        'transcode_nothing': '没有需要转换的 WAV 录音',
+        'transcode_running': '转码正在进行中',
+        'transcode_progress': '🗜️ 正在转码：{}/{}',
+        'transcode_done': '✅ 转码完成：成功 {} 个，失败 {} 个',
+        'menu_import': '导入录音...',
+        'import_title': '导入录音',
+        'import_choose_dir': '选择要导入的录音所在目录',
+        'import_pattern': '文件名规则（正则表达式，命名组 id 为条目 id、index 为条目序号；留空时文件名就是条目 id）：',
+        'import_mapping': '或使用对照表（CSV/JSON，每行：文件, 条目 id）：',
+        'import_browse': '浏览...',
+        'import_all_files': '所有文件',
+        'import_recursive': '包括子目录',
+        'import_overwrite': '覆盖已有录音',
+        'import_move': '导入成功后删除来源文件',
+        'import_start': '导入',
+        'import_recording': '请先停止录制再导入！',
+        'import_running': '正在导入录音，导入完成后才能录制或再次导入',
+        'import_plan': '可导入 {jobs} 个文件\n无法对应条目：{unmatched} 个\n项目中没有的条目：{unknown} 个\n'
+                       '重复：{duplicates} 个\n已有录音（跳过）：{existing} 个',
+        'import_confirm': '\n\n开始导入吗？',
+        'import_progress': '📥 正在导入：{}/{}',
+        'import_done': '✅ 导入完成：{} 条录音（其中转换格式 {} 条），失败 {} 条',
+        'import_failed': '导入失败：{}'
     },
     'en_US': {
         'title': 'Audio Recorder v2.1',
@@ -113,22 +335,175 @@ LANGUAGES = {
         'console_load_file': '📄 Loading text file: {}',
         'console_total_records': '📊 Total {} records',
         'console_load_progress': '📖 Loading progress: Starting from record {}',
-        'console_load_failed': '⚠️ Failed to load progress: {}',
+        'console_auto_progress': '📝 Auto-detected progress: Starting from record {}',
+        'console_progress_problem': '⚠️ Progress file {} is unusable (kept as is): {}',
+        'console_progress_backup': '📦 Using progress backup {}',
         'console_load_failed_restart': '⚠️ Failed to load progress: {}, starting from beginning',
+        'status_saving': '💾 Saving: {}',
+        'status_no_audio': '⚠️ No audio was captured; nothing saved',
         # 播放相关状态
         'status_playing': '🔊 Playing...',
         'status_play_completed': '✅ Playback completed',
         'button_playing': '🔊 Playing...',
-        'playback_button': '🔊 Playback'
+        'playback_button': '🔊 Playback',
+        # 项目概览
+        'dashboard_title': '📊 Projects (double-click to open)',
+        'dashboard_project': 'Project',
+        'dashboard_progress': 'Completion',
+        'dashboard_duration': 'Total Duration',
+        'dashboard_last_activity': 'Last Activity',
+        'dashboard_loading': 'Scanning projects...',
+        'dashboard_empty': 'No recording projects yet',
+        'dashboard_no_text_file': 'Text file for this project not found, please select it manually',
+        # 文本文件更新
+        'prompts_reloaded': '📝 Text file updated: {} added, {} removed, {} changed',
+        'status_prompt_changed': '⚠️ Text changed since recording, please re-record',
+        # 音频库状态
+        'audio_loading': '⏳ Audio Library: Loading...',
+        'audio_ready': '✅ Audio Library: {} Ready ({} input devices)',
+        'audio_ready_short': '✅ Audio: {}',
+        'audio_simulated': '⚠️ Audio Library: Simulation Mode',
+        'audio_simulated_short': '⚠️ Audio: Simulation Mode',
+        'console_audio_lib': '🎵 Audio library: {}',
+        'console_startup_time': '⏱️ UI startup took {:.0f} ms (target {} ms)',
+        'console_native_capture': '🎚️ Device does not support {} Hz / {} ch, capturing at native {} Hz / {} ch and converting',
+        # 说话人
+        'menu_switch_speaker': 'Switch Speaker',
+        'speaker_info': ' | 🗣️ Speaker: {}',
+        'speaker_prompt': 'Enter the speaker ID (leave empty for no speaker)\nExisting speakers: {}',
+        'speaker_invalid': 'Speaker IDs must not be empty, start with a dot, contain / \\ : * ? " < > |, '
+                           'or be takes, recovered or a microphone name',
+        'speaker_stop_recording': 'Please stop recording before switching speakers!',
+        'dashboard_speakers': ' ({} speakers)',
+        # 备份与校验
+        'menu_backup': 'Back Up Project',
+        'menu_verify_backup': 'Verify Backup',
+        # 工作量统计
+        'menu_analytics': 'Work Statistics...',
+        'analytics_title': 'Work Statistics',
+        'analytics_empty': 'No work has been logged for this project yet',
+        'analytics_summary': ('Items saved: {items}\nActive time: {active} ({per_hour} items/hour)\n'
+                              'Takes: {takes}, {take} s on average\nTime per item: {dwell} s mean, {median} s median\n'
+                              'Talk ratio: {talk}%\nIdle: {idle_gaps} gaps, {idle} in total, longest {longest}'),
+        'analytics_days': 'Date            Items    Active time    Per hour',
+        'backup_progress': '💾 Backing up: {}/{}',
+        'backup_done': '✅ Backup completed: {} recordings, {} newly copied ({:.1f} MB), {} already backed up\nBackup directory: {}',
+        'backup_failed': 'Backup failed: {}',
+        'verify_choose_mode': 'Recompute the checksum of every file?\n\nYes: full verification (slower)\nNo: only check that files exist with the right size',
+        'verify_progress': '🔍 Verifying: {}/{}',
+        'verify_ok': '✅ Backup verified',
+        'verify_problems': '⚠️ {} files have problems:\n{}',
+        # 筛选
+        'menu_filter': 'Filter Items...',
+        'filter_title': 'Filter Items',
+        'filter_query': 'Text or ID contains (separate words with spaces):',
+        'filter_status': 'Status:',
+        'filter_status_names': ('All', 'Recorded', 'Not recorded', 'Text changed', 'Rejected in review',
+                                'Not reviewed'),
+        'filter_duration': 'Take duration (seconds):',
+        'filter_apply': 'Filter',
+        'filter_clear': 'Clear Filter',
+        'filter_invalid_duration': 'Durations must be numbers',
+        'filter_no_results': 'No items match',
+        'filter_results': '{} items match; Previous/Next only move between them',
+        'filter_position': '  (🔎 filter {}/{})',
+        'filter_end': 'This is the last item in the filter results!',
+        'filter_start': 'This is the first item in the filter results!',
+        # 内容核对
+        'menu_check_content': 'Check Recording Content...',
+        'check_progress': '🔍 Recognizing: {}/{}',
+        'check_failed': 'Content check failed: {}',
+        'check_title': 'Content Check - Takes Scoring Below {:.2f}',
+        'check_summary': '{} takes checked, {} below the threshold (double-click to jump to an item)',
+        'check_all_ok': '✅ {} takes checked, all at or above {:.2f}',
+        'check_score': 'Score',
+        'check_text': 'Text',
+        'check_hypothesis': 'Recognized',
+        # 审听模式
+        'menu_review': 'Review Mode...',
+        'review_title': 'Review Mode',
+        'review_loading': 'Loading recordings...',
+        'review_position': '{}/{}  ID: {}',
+        'review_counts': 'This session: {} accepted, {} rejected',
+        'review_keys': 'Enter/Y: accept  N/Delete: reject  →: skip  R: replay  Space: pause/resume  Esc: finish',
+        'review_finished': '✅ All takes played, press Esc to finish',
+        'review_summary': '🎧 Review finished: {} accepted, {} rejected (filter by "Rejected in review" to re-record)',
+        'review_empty': 'There are no recordings to review!',
+        'review_unavailable': 'Review mode requires the sounddevice and soundfile libraries',
+        'review_failed': 'Could not start playback: {}',
+        'review_read_failed': '⚠️ Could not read take {}, skipped: {}',
+        # 录音版本
+        'menu_manage_takes': 'Takes...',
+        'menu_collect_takes': 'Delete Unused Takes',
+        'takes_title': 'Takes - {}',
+        'takes_duration': 'Duration',
+        'takes_modified': 'Recorded',
+        'takes_active': 'In Use',
+        'takes_use': 'Use This Take',
+        'takes_delete_others': 'Delete Other Takes',
+        'takes_confirm_delete': 'Delete the unused takes of this item? This cannot be undone.',
+        'takes_confirm_collect': 'Delete all unused takes in this project? This cannot be undone.',
+        'takes_collected': 'Deleted {} takes, freed {:.1f} MB',
+        # 崩溃恢复
+        'console_journal_salvaged': '🩹 Salvaged {} unsaved takes from the recovery journal',
+        'console_journal_position': '🩹 Restored position from the recovery journal: record {}',
+        'journal_salvaged': 'The app did not exit cleanly last time. {} unsaved takes (possibly incomplete) were salvaged to:\n{}',
+        'save_failed_title': 'Save Failed',
+        'save_failed': 'Failed to save audio file: {}',
+        'save_failed_salvaged': '\n\nThis take was kept in:\n{}\n\nYou can retry saving (the kept copy is deleted on success).',
+        # 多工位协同录制
+        'station_info': ' | 🖥️ Station: {}',
+        'console_station_leases': '🖥️ Station {}: leased {} items (completed {}/{}, {} held by other stations)',
+        'station_leased_elsewhere': 'This item is leased to another station and cannot be recorded',
+        'station_nothing_left': 'Nothing left to lease: remaining items are completed or being recorded by other stations',
+        'schedule_done': 'All items have been recorded!',
+        'schedule_failed': '⚠️ Cannot use schedule {}, falling back to text order: {}',
+        # 数据集导出
+        'menu_export': 'Export Dataset...',
+        'export_title': 'Export Dataset',
+        'export_choose_format': 'Choose export format:\n\nYes: WebDataset (tar shards + JSONL)\nNo: Kaldi (wav.scp / text / utt2dur)\nCancel: Do not export',
+        'export_choose_dir': 'Select export directory',
+        'export_progress': '📦 Exporting: {}/{}',
+        'export_done': '✅ Export completed: {} items, {} shards ({} finished shards skipped)',
+        'export_failed': 'Export failed: {}',
+        # FLAC 转码
+        'menu_transcode': 'Convert Recordings to FLAC...',
+        'transcode_title': 'Convert to FLAC',
+        'transcode_confirm': 'Losslessly convert {} WAV recordings to FLAC (WAV is deleted after verification)?',
+        'transcode_nothing': 'No WAV recordings to convert',
+        'transcode_running': 'Conversion is already running',
+        'transcode_progress': '🗜️ Converting: {}/{}',
+        'transcode_done': '✅ Conversion completed: {} succeeded, {} failed',
+        'menu_import': 'Import Recordings...',
+        'import_title': 'Import Recordings',
+        'import_choose_dir': 'Choose the folder with the recordings to import',
+        'import_pattern': 'File name pattern (regular expression; named group id is the record ID, index is the '
+                          'record number; leave empty if file names are record IDs):',
+        'import_mapping': 'Or use a mapping file (CSV/JSON, one "file, record ID" per line):',
+        'import_browse': 'Browse...',
+        'import_all_files': 'All Files',
+        'import_recursive': 'Include subfolders',
+        'import_overwrite': 'Overwrite existing recordings',
+        'import_move': 'Delete source files after import',
+        'import_start': 'Import',
+        'import_recording': 'Please stop recording before importing!',
+        'import_running': 'Importing recordings; recording and another import are available once it finishes',
+        'import_plan': '{jobs} files can be imported\nNo matching record: {unmatched}\nRecord not in project: {unknown}\n'
+                       'Duplicates: {duplicates}\nAlready recorded (skipped): {existing}',
+        'import_confirm': '\n\nStart importing?',
+        'import_progress': '📥 Importing: {}/{}',
+        'import_done': '✅ Import completed: {} recordings ({} converted), {} failed',
+        'import_failed': 'Import failed: {}'
     }
 }
 
 
 class AudioRecorder:
-    def __init__(self, root):
+    def __init__(self, root, config_loader=None):
         self.root = root
         
-        # 加载配置
+        # 加载配置（默认值 → config.json → 用户配置 → 环境变量 → 命令行）
+        self.config_loader = config_loader or ConfigLoader()
         self.config = self.load_config()
         
         # 语言设置
@@ -142,32 +517,171 @@ class AudioRecorder:
         # 录音参数
         self.sample_rate = self.config.get('audio_settings', {}).get('sample_rate', 16000)
         self.channels = self.config.get('audio_settings', {}).get('channels', 1)
+        self.audio_format = normalize_audio_format(self.config.get('audio_settings', {}).get('audio_format', 'WAV'))
+        self.bit_depth = self.config.get('audio_settings', {}).get('bit_depth', 16)
+        # 多麦克风：各声道的名称、保存方式（单个多声道文件或按麦克风拆分）以及多设备采集
+        self.microphones = self.config.get('audio_settings', {}).get('microphones', [])
+        self.channel_output = self.config.get('audio_settings', {}).get('channel_output', 'multichannel')
+        self.capture_devices = self.config.get('audio_settings', {}).get('capture_devices', [])
+        self.multi_capture = None
+        self.transcode_queue = TranscodeQueue()
         
         # 文件相关变量
         self.current_text_file = None
         self.current_project_name = None
         self.recordings_base_dir = self.config.get('file_settings', {}).get('output_directory', './recordings')
         self.recordings_dir = None
-        self.progress_file = None
+        self.progress_store = None
+        # 说话人：设置后录音保存在 recordings/<项目>/<说话人>/
+        self.speaker = self.config.get('recording_settings', {}).get('speaker') or None
+        
+        # 项目会话（最近使用的项目缓存在内存中）
+        cache_size = self.config.get('file_settings', {}).get('project_cache_size', 4)
+        self.session_cache = ProjectSessionCache(cache_size)
+        self.session = None
+        # 预取前后若干条的显示状态，切换条目时只更新变化的控件
+        self.prefetch_window = self.config.get('recording_settings', {}).get('prefetch_window', 3)
+        self.prefetcher = None
+        
+        # 崩溃恢复日志（录制中的音频和进度变化先写入项目目录的 .journal/）
+        recording_settings = self.config.get('recording_settings', {})
+        self.journal_enabled = recording_settings.get('journal_enabled', True)
+        self.journal_segment_kb = recording_settings.get('journal_segment_kb', 256)
+        self.journal_fsync_interval = recording_settings.get('journal_fsync_interval_ms', 1000) / 1000.0
+        self.journal = None
+        self.recovered_position = None
+        
+        # 工作量统计事件（显示条目、录制、保存、切换的时间）
+        self.analytics_enabled = self.config.get('analytics_settings', {}).get('enabled', True)
+        self.event_log = None
+        self.shown_record_id = None
+        
+        # 录音版本：重新录制时保留原录音
+        self.keep_takes = recording_settings.get('keep_takes', True)
+        self.take_stores = {}
+        # 内容核对的识别引擎 (设置, 引擎)，只在核对任务中使用
+        self.verify_engine = None
+        # 筛选结果（按文本顺序的条目位置），为 None 时在全部条目中切换
+        self.filter_indices = None
+        self.filter_settings = {}
+        # 条目调度：schedule 不是 sequential 时"下一条"按优先级选取待录条目，schedule_history 供"上一条"返回
+        self.schedule = recording_settings.get('schedule', 'sequential')
+        self.scheduler = None
+        self.schedule_history = []
+        
+        # 文本文件监视（轮询修改时间和大小）
+        self.prompt_watch_interval = self.config.get('recording_settings', {}).get('prompt_watch_interval_ms', 2000)
+        self.prompt_watch_job = None
+        self.pending_prompt_signature = None
+        
+        # 多工位协同录制（通过项目目录中的租约表分配条目）
+        station_settings = self.config.get('station_settings', {})
+        self.station_mode = station_settings.get('enabled', False)
+        self.station_id = station_settings.get('station_id') or default_station_id()
+        self.lease_manager = None
+        self.lease_renew_job = None
         
         # 状态变量
         self.is_recording = False
+        self.importing = False  # 导入期间不能录制，导入会替换录音目录中的文件
         self.current_index = 0
         self.records = []
         self.audio_data = []
         self.current_audio_file = None
         
-        # 音频相关变量
-        if AUDIO_LIB == "pyaudio":
-            self.chunk = 1024
-            self.format = pyaudio.paInt16
-            self.audio = pyaudio.PyAudio()
-            self.stream = None
-        else:
-            self.audio_data_sd = []
+        # 音频相关变量（音频库加载完成后才能确定具体实现）
+        self.chunk = 1024
+        self.format = None
+        self.audio = None
+        self.stream = None
+        self.audio_data_sd = []
+        self.input_converter = None
+        self.input_devices = []
+        self.audio_status_label = None
+        
+        # 后台任务调度：采集、保存、播放等在后台执行，界面线程定时执行它们交回的回调
+        self.events = EventCore()
+        self.recording_future = None
+        self.pump_events()
         
         # 初始化界面（不加载文件）
         self.setup_main_ui()
+        
+        # 后台加载音频库并枚举设备
+        self.events.submit(self._init_audio_backend)
+        self.root.after_idle(self.report_startup_time)
+
+    def pump_events(self):
+        """执行后台任务交回界面线程的回调"""
+        self.events.drain()
+        self.root.after(EVENT_POLL_MS, self.pump_events)
+
+    def finish_pending_saves(self):
+        """等待后台正在保存的录音写完并执行保存后的回调"""
+        try:
+            self.events.wait('io', timeout=30)
+        except Exception as e:
+            print(f"⚠️ 等待录音保存失败：{e}")
+        self.events.drain()
+
+    def report_startup_time(self):
+        """输出从启动到界面可用的耗时"""
+        elapsed_ms = (time.perf_counter() - STARTUP_TIME) * 1000
+        print(self.lang['console_startup_time'].format(elapsed_ms, STARTUP_TARGET_MS))
+
+    def _init_audio_backend(self):
+        """后台任务：加载音频库、初始化 PyAudio 并枚举输入设备"""
+        load_audio_backend()
+        audio = None
+        if AUDIO_LIB == "pyaudio":
+            try:
+                audio = pyaudio.PyAudio()
+            except Exception as e:
+                print(f"⚠️ 初始化 PyAudio 失败：{e}")
+        devices = list_input_devices(audio)
+        self.events.post(lambda: self.on_audio_backend_ready(audio, devices))
+
+    def on_audio_backend_ready(self, audio, devices):
+        """音频库加载完成（在界面线程中执行）"""
+        if AUDIO_LIB == "pyaudio":
+            self.format = pyaudio.paInt16
+            if self.audio is None:
+                self.audio = audio
+            elif audio is not None and audio is not self.audio:
+                audio.terminate()  # 录制时已同步创建过实例
+        self.input_devices = devices
+        print(self.lang['console_audio_lib'].format(AUDIO_LIB if AUDIO_AVAILABLE else self.lang['status_simulated']))
+        self.update_audio_status()
+
+    def ensure_audio_backend(self):
+        """确保音频库已加载（录制和播放前调用）"""
+        load_audio_backend()
+        if AUDIO_LIB == "pyaudio":
+            self.format = pyaudio.paInt16
+            if self.audio is None:
+                self.audio = pyaudio.PyAudio()
+
+    def audio_status_text(self, short=False):
+        """音频库状态文字和颜色"""
+        if not AUDIO_BACKEND_READY.is_set():
+            return self.lang['audio_loading'], "gray"
+        if AUDIO_AVAILABLE:
+            if short:
+                return self.lang['audio_ready_short'].format(AUDIO_LIB), "green"
+            return self.lang['audio_ready'].format(AUDIO_LIB, len(self.input_devices)), "green"
+        if short:
+            return self.lang['audio_simulated_short'], "orange"
+        return self.lang['audio_simulated'], "orange"
+
+    def update_audio_status(self):
+        """刷新当前界面上的音频库状态"""
+        label = self.audio_status_label
+        try:
+            if label is not None and label.winfo_exists():
+                text, color = self.audio_status_text(short=getattr(label, 'short_status', False))
+                label.config(text=text, foreground=color)
+        except tk.TclError:
+            pass
 
     def setup_main_ui(self):
         """设置主界面"""
@@ -195,23 +709,13 @@ class AudioRecorder:
                                font=("微软雅黑", 24, "bold"))
         title_label.grid(row=0, column=0, pady=(0, 30))
         
-        # 音频库状态
-        if AUDIO_AVAILABLE:
-            if self.current_language == 'zh_CN':
-                audio_status = f"✅ 音频库状态：{AUDIO_LIB} 已就绪"
-            else:
-                audio_status = f"✅ Audio Library: {AUDIO_LIB} Ready"
-            status_color = "green"
-        else:
-            if self.current_language == 'zh_CN':
-                audio_status = "⚠️ 音频库状态：模拟模式"
-            else:
-                audio_status = "⚠️ Audio Library: Simulation Mode"
-            status_color = "orange"
-        
+        # 音频库状态（后台加载完成后刷新）
+        audio_status, status_color = self.audio_status_text()
         status_label = ttk.Label(main_frame, text=audio_status, 
                                 font=("微软雅黑", 12), foreground=status_color)
         status_label.grid(row=1, column=0, pady=(0, 40))
+        status_label.short_status = False
+        self.audio_status_label = status_label
         
         # 文件选择区域
         if self.current_language == 'zh_CN':
@@ -252,9 +756,97 @@ class AudioRecorder:
                                      style="Large.TButton")
             quick_button.pack(side=tk.LEFT)
         
+        # 项目概览
+        self.create_project_dashboard(main_frame)
+        
         # 创建菜单栏
         self.create_welcome_menu()
 
+    def create_project_dashboard(self, parent):
+        """创建多项目概览面板，统计在后台线程中进行"""
+        dashboard_frame = ttk.LabelFrame(parent, text=self.lang['dashboard_title'], padding="10")
+        dashboard_frame.grid(row=3, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        dashboard_frame.columnconfigure(0, weight=1)
+        dashboard_frame.rowconfigure(0, weight=1)
+        
+        columns = ('progress', 'duration', 'last_activity')
+        self.dashboard_tree = ttk.Treeview(dashboard_frame, columns=columns, height=8)
+        self.dashboard_tree.heading('#0', text=self.lang['dashboard_project'])
+        self.dashboard_tree.heading('progress', text=self.lang['dashboard_progress'])
+        self.dashboard_tree.heading('duration', text=self.lang['dashboard_duration'])
+        self.dashboard_tree.heading('last_activity', text=self.lang['dashboard_last_activity'])
+        self.dashboard_tree.column('#0', width=220)
+        self.dashboard_tree.column('progress', width=160, anchor=tk.CENTER)
+        self.dashboard_tree.column('duration', width=110, anchor=tk.CENTER)
+        self.dashboard_tree.column('last_activity', width=150, anchor=tk.CENTER)
+        self.dashboard_tree.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
+        
+        dashboard_scrollbar = ttk.Scrollbar(dashboard_frame, orient="vertical",
+                                            command=self.dashboard_tree.yview)
+        dashboard_scrollbar.grid(row=0, column=1, sticky=(tk.N, tk.S))
+        self.dashboard_tree.configure(yscrollcommand=dashboard_scrollbar.set)
+        self.dashboard_tree.bind('<Double-1>', lambda e: self.open_dashboard_project())
+        
+        self.dashboard_status = ttk.Label(dashboard_frame, text=self.lang['dashboard_loading'],
+                                          font=("微软雅黑", 9), foreground="gray")
+        self.dashboard_status.grid(row=1, column=0, sticky=tk.W, pady=(5, 0))
+        
+        self.dashboard_projects = {}
+        scanner = ProjectScanner(self.recordings_base_dir)
+        self.events.submit(self._scan_projects, scanner)
+
+    def _scan_projects(self, scanner):
+        """后台任务：先显示缓存结果，再增量刷新"""
+        try:
+            cached = scanner.cached_summaries()
+            if cached:
+                self.events.post(lambda: self.populate_dashboard(cached, final=False))
+            summaries = scanner.scan()
+            self.events.post(lambda: self.populate_dashboard(summaries))
+        except Exception as e:
+            print(f"⚠️ 统计项目失败：{e}")
+
+    def populate_dashboard(self, summaries, final=True):
+        """刷新项目概览列表"""
+        tree = getattr(self, 'dashboard_tree', None)
+        if tree is None or not tree.winfo_exists():
+            return  # 已离开欢迎界面
+        
+        tree.delete(*tree.get_children())
+        self.dashboard_projects = {}
+        for summary in summaries:
+            if summary['percent'] is None:
+                progress = f"{summary['recorded']} / ?"
+            else:
+                progress = f"{summary['recorded']} / {summary['total']} ({summary['percent']:.1f}%)"
+            name = summary['name']
+            if summary.get('speakers'):
+                name += self.lang['dashboard_speakers'].format(summary['speakers'])
+            item = tree.insert('', tk.END, text=name,
+                               values=(progress,
+                                       format_duration(summary['duration']),
+                                       format_timestamp(summary['last_activity'])))
+            self.dashboard_projects[item] = summary
+        
+        if final:
+            self.dashboard_status.config(text="" if summaries else self.lang['dashboard_empty'])
+
+    def open_dashboard_project(self):
+        """打开概览中选中的项目"""
+        selection = self.dashboard_tree.selection()
+        if not selection:
+            return
+        summary = self.dashboard_projects.get(selection[0])
+        if not summary:
+            return
+        
+        text_file = summary.get('text_file')
+        if text_file and os.path.exists(text_file):
+            self.load_text_file_and_start(text_file)
+        else:
+            messagebox.showwarning(self.lang['dashboard_title'], self.lang['dashboard_no_text_file'])
+            self.select_text_file_manual()
+
     def create_welcome_menu(self):
         """创建欢迎界面的菜单栏"""
         menubar = tk.Menu(self.root)
@@ -285,18 +877,17 @@ class AudioRecorder:
     def switch_language(self, language_code):
         """切换语言"""
         if language_code in LANGUAGES:
-            # 更新配置文件
+            # 更新用户配置
             self.config['ui_settings']['language'] = language_code
-            self.save_config()
+            self.save_config({'ui_settings': {'language': language_code}})
             
             # 显示提示信息
             messagebox.showinfo("语言切换", self.lang['language_changed'])
         
-    def save_config(self):
-        """保存配置到文件"""
+    def save_config(self, updates):
+        """保存配置修改到用户配置文件（共享的 config.json 保持只读）"""
         try:
-            with open('config.json', 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=4, ensure_ascii=False)
+            self.config_loader.save_user_settings(updates)
         except Exception as e:
             print(f"保存配置失败: {e}")
 
@@ -324,28 +915,22 @@ class AudioRecorder:
     def load_text_file_and_restart(self, file_path):
         """重新加载文本文件（用于切换文件）"""
         try:
-            self.current_text_file = file_path
-            self.current_project_name = os.path.splitext(os.path.basename(file_path))[0]
-            
-            # 创建项目特定的录音目录
-            self.recordings_dir = os.path.join(self.recordings_base_dir, self.current_project_name)
-            self.progress_file = os.path.join(self.recordings_dir, 'progress.json')
-            
-            # 创建目录
-            self.create_recordings_directory()
-            
-            # 读取记录
-            self.load_records()
+            # 打开项目并读取记录
+            self.open_project(file_path)
             
             # 加载进度
             self.load_progress()
             
-            # 清除当前界面
-            for widget in self.root.winfo_children():
-                widget.destroy()
-            
-            # 重新创建录音界面
-            self.setup_recording_ui()
+            if self.recording_ui_exists():
+                # 录音界面已存在，只替换数据
+                self.update_project_info()
+            else:
+                # 清除当前界面
+                for widget in self.root.winfo_children():
+                    widget.destroy()
+                
+                # 重新创建录音界面
+                self.setup_recording_ui()
             
             # 显示当前记录
             self.show_current_record()
@@ -358,18 +943,8 @@ class AudioRecorder:
     def load_text_file_and_start(self, file_path):
         """加载文本文件并开始录音项目"""
         try:
-            self.current_text_file = file_path
-            self.current_project_name = os.path.splitext(os.path.basename(file_path))[0]
-            
-            # 创建项目特定的录音目录
-            self.recordings_dir = os.path.join(self.recordings_base_dir, self.current_project_name)
-            self.progress_file = os.path.join(self.recordings_dir, 'progress.json')
-            
-            # 创建目录
-            self.create_recordings_directory()
-            
-            # 读取记录
-            self.load_records()
+            # 打开项目并读取记录
+            self.open_project(file_path)
             
             # 加载进度
             self.load_progress()
@@ -387,6 +962,205 @@ class AudioRecorder:
         except Exception as e:
             messagebox.showerror("错误", f"加载文件失败：{str(e)}")
 
+    def open_project(self, file_path):
+        """切换到指定文本文件对应的项目"""
+        self.finish_pending_saves()
+        if self.session is not None:
+            self.session.close()
+        self.close_station()
+        self.close_journal()
+        self.close_event_log()
+        
+        self.current_text_file = file_path
+        self.current_project_name = os.path.splitext(os.path.basename(file_path))[0]
+        
+        # 创建项目特定的录音目录（多说话人项目每个说话人一个子目录）
+        project_dir = os.path.join(self.recordings_base_dir, self.current_project_name)
+        self.recordings_dir = speaker_directory(project_dir, self.speaker)
+        self.progress_store = ProgressStore(progress_file_path(self.recordings_dir,
+                                                               self.station_id if self.station_mode else None))
+        
+        # 创建目录
+        self.create_recordings_directory()
+        if self.speaker:
+            try:
+                register_speaker(project_dir, self.speaker)
+            except OSError as e:
+                print(f"⚠️ 登记说话人失败：{e}")
+        
+        # 读取记录
+        self.load_records()
+        self.take_stores = {}
+        self.filter_indices = None
+        self.scheduler = None
+        self.schedule_history = []
+        
+        if self.station_mode:
+            self.open_station()
+        
+        if self.journal_enabled:
+            self.open_journal()
+        
+        if self.analytics_enabled:
+            self.open_event_log()
+
+    def open_journal(self):
+        """打开恢复日志，处理上次异常退出留下的录音和位置"""
+        try:
+            self.journal = TakeJournal(self.recordings_dir, self.journal_segment_kb * 1024,
+                                       self.journal_fsync_interval,
+                                       self.station_id if self.station_mode else None)
+            recovery = self.journal.recover()
+        except Exception as e:
+            print(f"⚠️ 打开恢复日志失败：{e}")
+            self.journal = None
+            return
+        
+        self.recovered_position = recovery['position']
+        if recovery['salvaged']:
+            files = '\n'.join(os.path.relpath(path, self.recordings_dir) for _, path in recovery['salvaged'])
+            print(self.lang['console_journal_salvaged'].format(len(recovery['salvaged'])))
+            messagebox.showinfo(self.lang['title'],
+                                self.lang['journal_salvaged'].format(len(recovery['salvaged']), files))
+
+    def close_journal(self):
+        """正常关闭恢复日志"""
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+    def open_event_log(self):
+        """打开本工位的工作量事件文件"""
+        try:
+            self.event_log = EventLog(self.recordings_dir, self.station_id)
+        except OSError as e:
+            print(f"⚠️ 打开工作量记录失败：{e}")
+            return
+        self.shown_record_id = None
+        self.log_event('session_start')
+
+    def close_event_log(self):
+        """结束本次工作量记录"""
+        if self.event_log is not None:
+            self.log_event('session_end')
+            self.event_log.close()
+            self.event_log = None
+
+    def log_event(self, event, record_id=None):
+        """记录一条工作量事件；写入失败时停止记录，不影响录制"""
+        if self.event_log is None:
+            return
+        try:
+            self.event_log.log(event, record_id)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ 写入工作量记录失败：{e}")
+            self.event_log = None
+
+    def open_station(self):
+        """打开项目租约表并同步条目"""
+        settings = self.config.get('station_settings', {})
+        self.lease_manager = LeaseManager(self.recordings_dir, self.station_id,
+                                          settings.get('batch_size', 20),
+                                          settings.get('lease_seconds', 600))
+        self.lease_manager.sync_records(self.records, list(self.session.recorded_files))
+        self.schedule_lease_renewal()
+
+    def close_station(self):
+        """释放本工位的租约"""
+        if self.lease_renew_job is not None:
+            self.root.after_cancel(self.lease_renew_job)
+            self.lease_renew_job = None
+        if self.lease_manager is not None:
+            try:
+                self.lease_manager.close()
+            except Exception as e:
+                print(f"⚠️ 释放租约失败：{e}")
+            self.lease_manager = None
+
+    def schedule_lease_renewal(self):
+        """定期续租，间隔为租约时长的三分之一"""
+        interval_ms = int(self.lease_manager.lease_seconds * 1000 / 3)
+        self.lease_renew_job = self.root.after(interval_ms, self.renew_leases)
+
+    def renew_leases(self):
+        """续租本工位持有的条目"""
+        self.lease_renew_job = None
+        if self.lease_manager is None:
+            return
+        try:
+            self.lease_manager.renew()
+        except Exception as e:
+            print(f"⚠️ 续租失败：{e}")
+        self.schedule_lease_renewal()
+
+    def next_leased_index(self):
+        """本工位下一条待录制条目的下标，必要时领取新的一批"""
+        for attempt in range(2):
+            if attempt:
+                leases = self.lease_manager.acquire_batch(
+                    self.choose_leases if self.schedule != 'sequential' else None)
+                done, leased, total = self.lease_manager.counts()
+                print(self.lang['console_station_leases'].format(
+                    self.station_id, len(leases), done, total, leased - len(leases)))
+            else:
+                leases = self.lease_manager.active_leases()
+            pending = [index for index in map(self.session.index_of, leases)
+                       if index is not None and not self.session.is_recorded(self.records[index]['id'])]
+            if pending and self.schedule != 'sequential':
+                return self.ensure_scheduler().top(1, set(pending))[0]
+            if pending:
+                return pending[0]
+        messagebox.showinfo(self.lang['title'], self.lang['station_nothing_left'])
+        return len(self.records)
+
+    def choose_leases(self, available, count):
+        """按调度优先级从可领取的条目中选取一批（领取租约时调用）"""
+        index_of = self.session.index_of
+        allowed = {index for index in map(index_of, available) if index is not None}
+        return [self.records[index]['id'] for index in self.ensure_scheduler().top(count, allowed)]
+
+    def ensure_scheduler(self):
+        """条目调度器：首次使用或文本文件修改后建立，之后只同步录音索引的变化"""
+        if self.scheduler is None or self.scheduler.stale():
+            project_dir = os.path.join(self.recordings_base_dir, self.current_project_name)
+            rejected = [record_id for record_id, verdict in
+                        take_verdicts(project_dir, self.recordings_dir, self.session.recorded_files).items()
+                        if verdict == 'reject']
+            retakes = rejected + list(self.session.prompt_changes)
+            try:
+                self.scheduler = PromptScheduler(self.session, self.schedule, retakes)
+            except Exception as e:
+                print(self.lang['schedule_failed'].format(self.schedule, e))
+                self.schedule = 'sequential'
+                self.scheduler = PromptScheduler(self.session, self.schedule, retakes)
+        else:
+            self.scheduler.sync()
+        return self.scheduler
+
+    def recording_ui_exists(self):
+        """录音界面是否已经创建"""
+        label = getattr(self, 'project_label', None)
+        try:
+            return label is not None and bool(label.winfo_exists())
+        except tk.TclError:
+            return False
+
+    def project_info_text(self):
+        """项目信息栏文字"""
+        if self.current_language == 'zh_CN':
+            info = f"📁 项目：{self.current_project_name} | 📄 文件：{os.path.basename(self.current_text_file)}"
+        else:
+            info = f"📁 Project: {self.current_project_name} | 📄 File: {os.path.basename(self.current_text_file)}"
+        if self.speaker:
+            info += self.lang['speaker_info'].format(self.speaker)
+        if self.lease_manager is not None:
+            info += self.lang['station_info'].format(self.station_id)
+        return info
+
+    def update_project_info(self):
+        """切换项目后只刷新项目信息"""
+        self.project_label.config(text=self.project_info_text())
+
     def show_usage_help(self):
         """显示使用说明"""
         help_text = """📖 使用说明
@@ -413,7 +1187,7 @@ class AudioRecorder:
 
     def show_about_welcome(self):
         """显示关于信息（欢迎界面版本）"""
-        about_text = f"""语音录制助手 v2.1
+        about_text = """语音录制助手 v2.1
 
 🎤 专业的语音数据录制工具
 🎵 音频格式：16kHz WAV
@@ -425,16 +1199,8 @@ class AudioRecorder:
         messagebox.showinfo("关于", about_text)
 
     def load_config(self):
-        """加载配置文件"""
-        try:
-            with open('config.json', 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except FileNotFoundError:
-            print("⚠️ 配置文件config.json不存在，使用默认配置")
-            return {}
-        except Exception as e:
-            print(f"⚠️ 加载配置文件失败：{e}，使用默认配置")
-            return {}
+        """加载分层配置（各层文件未变化时使用缓存）"""
+        return self.config_loader.load()
 
     def show_file_selection(self):
         """显示文件选择对话框"""
@@ -476,21 +1242,8 @@ class AudioRecorder:
 
     def load_text_file(self, file_path):
         """加载文本文件并初始化项目"""
-        self.current_text_file = file_path
-        self.current_project_name = os.path.splitext(os.path.basename(file_path))[0]
-        
-        # 创建项目特定的录音目录
-        self.recordings_dir = os.path.join(self.recordings_base_dir, self.current_project_name)
-        self.progress_file = os.path.join(self.recordings_dir, 'progress.json')
-        
-        # 创建目录
-        self.create_recordings_directory()
-        
-        # 读取记录
-        self.load_records()
-        
-        # 验证和修复进度文件
-        self.validate_progress_file()
+        # 打开项目并读取记录
+        self.open_project(file_path)
         
         # 加载进度
         self.load_progress()
@@ -502,111 +1255,50 @@ class AudioRecorder:
         self.show_current_record()
 
     def load_progress(self):
-        """加载录制进度"""
+        """加载录制进度：进度文件只读取和校验一次，损坏或无法读取时使用备份，都不可用时自动检测"""
+        if self.lease_manager is not None:
+            # 多工位模式下从本工位的租约继续
+            self.current_index = self.next_leased_index()
+            return
+        
+        # 上次异常退出时，恢复日志中的位置比进度文件更新
+        recovered_id, self.recovered_position = self.recovered_position, None
+        if recovered_id is not None and self.session is not None:
+            index = self.session.index_of(recovered_id)
+            if index is not None:
+                self.current_index = index
+                print(self.lang['console_journal_position'].format(index + 1))
+                return
+        
+        progress = self.progress_store.load()
+        for path, problem in self.progress_store.problems:
+            print(self.lang['console_progress_problem'].format(os.path.basename(path), problem))
+        if progress is not None:
+            if self.progress_store.source != self.progress_store.path:
+                print(self.lang['console_progress_backup'].format(os.path.basename(self.progress_store.source)))
+            # 按条目 id 定位，文本文件增删条目后仍回到同一条
+            index = self.session.index_of(progress['current_id']) if progress['current_id'] else None
+            if index is None:
+                index = progress['current_index']
+            self.current_index = max(0, min(index, len(self.records) - 1))
+            print(self.lang['console_load_progress'].format(self.current_index + 1))
+            return
+        
         try:
-            if os.path.exists(self.progress_file):
-                # 检查文件大小
-                if os.path.getsize(self.progress_file) == 0:
-                    print(f"⚠️ 进度文件为空，删除并重新检测进度")
-                    os.remove(self.progress_file)
-                    self.current_index = self.detect_current_progress()
-                    print(f"📝 自动检测进度：从第 {self.current_index + 1} 条开始")
-                    return
-                
-                # 尝试读取JSON文件
-                with open(self.progress_file, 'r', encoding='utf-8') as f:
-                    file_content = f.read().strip()
-                    if not file_content:
-                        print(f"⚠️ 进度文件内容为空，自动检测进度")
-                        self.current_index = self.detect_current_progress()
-                        print(f"📝 自动检测进度：从第 {self.current_index + 1} 条开始")
-                        return
-                    
-                    progress_data = json.loads(file_content)
-                    self.current_index = progress_data.get('current_index', 0)
-                    
-                    # 确保索引在有效范围内
-                    if self.current_index >= len(self.records):
-                        self.current_index = len(self.records) - 1
-                    elif self.current_index < 0:
-                        self.current_index = 0
-                    
-                    print(self.lang['console_load_progress'].format(self.current_index + 1))
-            else:
-                # 如果没有进度文件，尝试自动检测已录制的文件
-                self.current_index = self.detect_current_progress()
-                if self.current_language == 'zh_CN':
-                    print(f"📝 自动检测进度：从第 {self.current_index + 1} 条开始")
-                else:
-                    print(f"📝 Auto-detected progress: Starting from record {self.current_index + 1}")
-        except json.JSONDecodeError as e:
-            if self.current_language == 'zh_CN':
-                print(f"⚠️ 进度文件JSON格式错误：{e}")
-                print(f"🔧 尝试修复：备份损坏文件并重新检测进度")
-            else:
-                print(f"⚠️ Progress file JSON format error: {e}")
-                print(f"🔧 Attempting repair: Backing up corrupted file and re-detecting progress")
-            try:
-                # 备份损坏的文件
-                backup_file = self.progress_file + f".backup_{int(time.time())}"
-                os.rename(self.progress_file, backup_file)
-                if self.current_language == 'zh_CN':
-                    print(f"📦 已备份损坏文件到：{backup_file}")
-                else:
-                    print(f"📦 Backed up corrupted file to: {backup_file}")
-            except:
-                pass
-            # 重新检测进度
             self.current_index = self.detect_current_progress()
-            if self.current_language == 'zh_CN':
-                print(f"📝 自动检测进度：从第 {self.current_index + 1} 条开始")
-            else:
-                print(f"📝 Auto-detected progress: Starting from record {self.current_index + 1}")
-        except Exception as e:
-            print(self.lang['console_load_failed'].format(e))
-            if self.current_language == 'zh_CN':
-                print(f"🔧 尝试自动检测进度")
-            else:
-                print(f"🔧 Attempting auto-detection of progress")
-            try:
-                self.current_index = self.detect_current_progress()
-                if self.current_language == 'zh_CN':
-                    print(f"📝 自动检测进度：从第 {self.current_index + 1} 条开始")
-                else:
-                    print(f"📝 Auto-detected progress: Starting from record {self.current_index + 1}")
-            except:
-                if self.current_language == 'zh_CN':
-                    print(f"⚠️ 自动检测也失败，从头开始")
-                else:
-                    print(f"⚠️ Auto-detection also failed, starting from beginning")
-                self.current_index = 0
-
-    def create_recordings_directory(self):
-        """加载录制进度"""
-        try:
-            if os.path.exists(self.progress_file):
-                with open(self.progress_file, 'r', encoding='utf-8') as f:
-                    progress_data = json.load(f)
-                    self.current_index = progress_data.get('current_index', 0)
-                    
-                    # 确保索引在有效范围内
-                    if self.current_index >= len(self.records):
-                        self.current_index = len(self.records) - 1
-                    
-                    print(self.lang['console_load_progress'].format(self.current_index + 1))
-            else:
-                # 如果没有进度文件，尝试自动检测已录制的文件
-                self.current_index = self.detect_current_progress()
-                if self.current_language == 'zh_CN':
-                    print(f"📝 自动检测进度：从第 {self.current_index + 1} 条开始")
-                else:
-                    print(f"📝 Auto-detected progress: Starting from record {self.current_index + 1}")
         except Exception as e:
             print(self.lang['console_load_failed_restart'].format(e))
             self.current_index = 0
+            return
+        print(self.lang['console_auto_progress'].format(self.current_index + 1))
 
     def detect_current_progress(self):
         """自动检测当前录制进度"""
+        if self.session is not None:
+            # 由调度器给出优先级最高的待录条目，全部已录制时停在最后一条
+            index = self.ensure_scheduler().next()
+            return index if index is not None else max(0, len(self.records) - 1)
+        
         # 检查已录制的文件，找到最后一个连续的录制文件
         for i, record in enumerate(self.records):
             audio_file = os.path.join(self.recordings_dir, f"{record['id']}.wav")
@@ -618,40 +1310,19 @@ class AudioRecorder:
 
     def save_progress(self):
         """保存录制进度"""
-        # 如果没有进度文件路径，则跳过保存
-        if not self.progress_file:
+        # 还没有打开项目时跳过保存
+        if self.progress_store is None:
             return
-            
+        
+        current_id = self.records[self.current_index]['id'] if 0 <= self.current_index < len(self.records) else None
         try:
-            progress_data = {
-                'current_index': self.current_index,
-                'project_name': self.current_project_name,
-                'text_file': self.current_text_file,
-                'total_records': len(self.records),
-                'last_updated': time.strftime('%Y-%m-%d %H:%M:%S')
-            }
-            
-            # 使用临时文件进行原子写入，避免写入过程中被读取
-            temp_file = self.progress_file + '.tmp'
-            
-            # 写入临时文件
-            with open(temp_file, 'w', encoding='utf-8') as f:
-                json.dump(progress_data, f, ensure_ascii=False, indent=2)
-            
-            # 原子替换：先删除旧文件（如果存在），再重命名临时文件
-            if os.path.exists(self.progress_file):
-                os.remove(self.progress_file)
-            os.rename(temp_file, self.progress_file)
-            
+            # 先记入恢复日志，再原子替换进度文件（不会出现进度文件缺失的时刻）
+            if self.journal is not None and current_id is not None:
+                self.journal.log_position(self.current_index, current_id)
+            self.progress_store.save(self.current_index, current_id, self.current_project_name,
+                                     self.current_text_file, len(self.records))
         except Exception as e:
             print(f"⚠️ 保存进度失败：{e}")
-            # 清理临时文件
-            temp_file = self.progress_file + '.tmp'
-            if os.path.exists(temp_file):
-                try:
-                    os.remove(temp_file)
-                except:
-                    pass
     
     def create_recordings_directory(self):
         """创建录音文件夹"""
@@ -675,7 +1346,7 @@ class AudioRecorder:
             self.recordings_dir = "."  # 使用当前目录作为备选
 
     def migrate_old_recordings(self):
-        """迁移旧的录音文件到新的项目目录结构"""
+        """迁移旧的录音文件到新的项目目录结构（文件名就是条目 id 的录音，必要时转换格式）"""
         if self.current_project_name != "record":
             return  # 只有record项目需要迁移
         
@@ -683,35 +1354,29 @@ class AudioRecorder:
         if not os.path.exists(old_recordings_dir):
             return
         
-        migrated_count = 0
         try:
-            for file in os.listdir(old_recordings_dir):
-                if file.endswith('.wav') and file.startswith('0000'):
-                    old_path = os.path.join(old_recordings_dir, file)
-                    new_path = os.path.join(self.recordings_dir, file)
-                    
-                    if os.path.isfile(old_path):
-                        # 移动文件到新目录
-                        os.rename(old_path, new_path)
-                        migrated_count += 1
-            
-            if migrated_count > 0:
-                print(f"📦 迁移了 {migrated_count} 个旧录音文件")
+            jobs = plan_import(old_recordings_dir, load_prompt_table(self.current_text_file)[1])['jobs']
+            if not jobs:
+                return
+            result = import_recordings(jobs, self.recordings_dir, self.sample_rate, self.channels, self.bit_depth,
+                                       self.audio_format, move=True)
+            if result['files']:
+                print(f"📦 迁移了 {len(result['files'])} 个旧录音文件")
+            for record_id, path, error in result['failures']:
+                print(f"⚠️ 迁移 {path} 失败：{error}")
                 
         except Exception as e:
             print(f"⚠️ 迁移录音文件时出错：{e}")
     
     def load_records(self):
-        """读取文本文件"""
+        """读取文本文件（最近打开过的项目直接使用缓存）"""
         try:
-            with open(self.current_text_file, 'r', encoding='utf-8') as file:
-                for line in file:
-                    line = line.strip()
-                    if line:
-                        parts = line.split(' ', 1)
-                        if len(parts) == 2:
-                            record_id, text = parts
-                            self.records.append({'id': record_id, 'text': text})
+            self.session = self.session_cache.open(self.current_text_file, self.recordings_dir)
+            self.records = self.session.records
+            if self.prefetcher is not None:
+                self.prefetcher.close()
+            self.prefetcher = RecordPrefetcher(self.session, audio_extension(self.audio_format),
+                                               self.prefetch_window)
             print(self.lang['console_load_file'].format(self.current_text_file))
             print(self.lang['console_total_records'].format(len(self.records)))
         except FileNotFoundError:
@@ -727,58 +1392,6 @@ class AudioRecorder:
                 messagebox.showerror("Error", f"Error reading file: {str(e)}")
             self.root.quit()
 
-    def validate_progress_file(self):
-        """验证和修复进度文件"""
-        if not os.path.exists(self.progress_file):
-            return  # 文件不存在，稍后会自动创建
-        
-        try:
-            # 检查文件大小
-            if os.path.getsize(self.progress_file) == 0:
-                print(f"🔧 检测到空的进度文件，将删除")
-                os.remove(self.progress_file)
-                return
-            
-            # 尝试解析JSON
-            with open(self.progress_file, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
-                if not content:
-                    print(f"🔧 检测到空内容的进度文件，将删除")
-                    os.remove(self.progress_file)
-                    return
-                
-                # 验证JSON格式
-                progress_data = json.loads(content)
-                
-                # 验证必要字段
-                required_fields = ['current_index', 'project_name', 'text_file', 'total_records']
-                for field in required_fields:
-                    if field not in progress_data:
-                        print(f"🔧 进度文件缺少字段 {field}，将重新生成")
-                        os.remove(self.progress_file)
-                        return
-                
-                # 验证数据类型
-                if not isinstance(progress_data['current_index'], int) or progress_data['current_index'] < 0:
-                    print(f"🔧 进度文件索引值无效，将重新生成")
-                    os.remove(self.progress_file)
-                    return
-                
-                print(f"✅ 进度文件验证通过")
-                
-        except json.JSONDecodeError as e:
-            print(f"🔧 进度文件JSON格式错误，将删除并重新生成：{e}")
-            try:
-                os.remove(self.progress_file)
-            except:
-                pass
-        except Exception as e:
-            print(f"🔧 验证进度文件时出错，将删除：{e}")
-            try:
-                os.remove(self.progress_file)
-            except:
-                pass
-    
     def setup_recording_ui(self):
         """创建录音界面"""
         # 配置样式
@@ -805,31 +1418,17 @@ class AudioRecorder:
         title_label.grid(row=0, column=0, pady=(0, 5))
         
         # 项目信息
-        if self.current_language == 'zh_CN':
-            project_info = f"📁 项目：{self.current_project_name} | 📄 文件：{os.path.basename(self.current_text_file)}"
-        else:
-            project_info = f"📁 Project: {self.current_project_name} | 📄 File: {os.path.basename(self.current_text_file)}"
-        project_label = ttk.Label(header_frame, text=project_info, 
-                                 font=("微软雅黑", 10), foreground="blue")
-        project_label.grid(row=1, column=0, pady=(0, 10))
+        self.project_label = ttk.Label(header_frame, text=self.project_info_text(), 
+                                      font=("微软雅黑", 10), foreground="blue")
+        self.project_label.grid(row=1, column=0, pady=(0, 10))
         
         # 音频库状态
-        if AUDIO_AVAILABLE:
-            if self.current_language == 'zh_CN':
-                audio_status = f"✅ 音频库：{AUDIO_LIB}"
-            else:
-                audio_status = f"✅ Audio: {AUDIO_LIB}"
-            status_color = "green"
-        else:
-            if self.current_language == 'zh_CN':
-                audio_status = "⚠️ 音频库：模拟模式"
-            else:
-                audio_status = "⚠️ Audio: Simulation Mode"
-            status_color = "orange"
-        
+        audio_status, status_color = self.audio_status_text(short=True)
         status_label = ttk.Label(header_frame, text=audio_status, 
                                 font=("微软雅黑", 10), foreground=status_color)
         status_label.grid(row=2, column=0)
+        status_label.short_status = True
+        self.audio_status_label = status_label
         
         # 进度信息框架
         if self.current_language == 'zh_CN':
@@ -957,10 +1556,88 @@ class AudioRecorder:
         self.root.bind('<Control-o>', lambda e: self.switch_text_file())
         self.root.bind('<Control-e>', lambda e: self.open_project_directory())
         self.root.bind('<Control-g>', lambda e: self.jump_to_record())
+        self.root.bind('<Control-f>', lambda e: self.open_filter_panel())
+        self.root.bind('<Control-r>', lambda e: self.start_review())
         self.root.focus_set()
         
         # 创建菜单栏
         self.create_menu()
+        
+        # 监视文本文件的修改
+        self.start_prompt_watch()
+
+    def start_prompt_watch(self):
+        """开始定时检查文本文件是否被修改"""
+        if self.prompt_watch_job is not None:
+            self.root.after_cancel(self.prompt_watch_job)
+        self.prompt_watch_job = self.root.after(self.prompt_watch_interval, self.check_prompt_file)
+
+    def check_prompt_file(self):
+        """文本文件被修改时增量更新条目（录制中推迟到下一次检查）"""
+        self.prompt_watch_job = None
+        try:
+            if self.session is not None and not self.is_recording and self.session.prompt_file_changed():
+                # 连续两次检查结果一致才更新，避免读到编辑器写了一半的文件
+                signature = file_signature(self.current_text_file)
+                if signature is not None and signature == self.pending_prompt_signature:
+                    self.pending_prompt_signature = None
+                    self.apply_prompt_file_changes()
+                else:
+                    self.pending_prompt_signature = signature
+        except Exception as e:
+            print(f"⚠️ 更新文本文件失败：{e}")
+        self.start_prompt_watch()
+
+    def apply_prompt_file_changes(self):
+        """重新读取文本文件，按 id 保持当前位置"""
+        current_id = None
+        if 0 <= self.current_index < len(self.records):
+            current_id = self.records[self.current_index]['id']
+        # 筛选结果和调度历史记录的是位置，增删行后按 id 换算到新位置
+        filtered_ids = ([self.records[p]['id'] for p in self.filter_indices]
+                        if self.filter_indices is not None else None)
+        history_ids = [self.records[p]['id'] for p in self.schedule_history if p < len(self.records)]
+        
+        added, removed, changed = self.session.reload_prompts()
+        if self.lease_manager is not None:
+            self.lease_manager.sync_records(self.records)
+        
+        new_index = self.session.index_of(current_id) if current_id is not None else None
+        if new_index is not None:
+            self.current_index = new_index
+        else:
+            # 当前条目被删除，停留在原来的位置
+            self.current_index = max(0, min(self.current_index, len(self.records) - 1))
+        
+        index_of = self.session.index_of
+        self.schedule_history = [p for p in map(index_of, history_ids) if p is not None]
+        if filtered_ids is not None:
+            self.filter_indices = sorted(p for p in map(index_of, filtered_ids) if p is not None)
+            self.refresh_filter()
+        
+        print(self.lang['prompts_reloaded'].format(len(added), len(removed), len(changed)))
+        self.save_progress()
+        self.show_current_record()
+
+    def refresh_filter(self):
+        """条目表变化后按原来的条件重新筛选（新增或修改的条目可能符合条件）"""
+        settings = self.filter_settings
+        if not settings or self.session is None:
+            return
+        try:
+            low = float(settings['min_duration']) if str(settings.get('min_duration') or '').strip() else None
+            high = float(settings['max_duration']) if str(settings.get('max_duration') or '').strip() else None
+        except ValueError:
+            return
+        session = self.session
+        
+        def done(positions):
+            if session is self.session and self.filter_indices is not None:
+                self.set_filter(positions or None)
+        
+        self.events.submit(search_records, session, settings.get('query', ''), settings.get('status', 'all'),
+                           low, high, channel='search', on_done=done,
+                           project_dir=os.path.join(self.recordings_base_dir, self.current_project_name))
 
     def create_menu(self):
         """创建菜单栏"""
@@ -983,7 +1660,21 @@ class AudioRecorder:
         tools_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label=self.lang['menu_tools'], menu=tools_menu)
         tools_menu.add_command(label=self.lang['menu_jump'], command=self.jump_to_record)
+        tools_menu.add_command(label=self.lang['menu_filter'], command=self.open_filter_panel)
+        tools_menu.add_command(label=self.lang['menu_switch_speaker'], command=self.switch_speaker)
+        tools_menu.add_command(label=self.lang['menu_manage_takes'], command=self.manage_takes)
+        tools_menu.add_command(label=self.lang['menu_collect_takes'], command=self.collect_unused_takes)
         tools_menu.add_command(label=self.lang['menu_batch_check'], command=self.batch_check_recordings)
+        tools_menu.add_command(label=self.lang['menu_check_content'], command=self.check_recording_content)
+        tools_menu.add_command(label=self.lang['menu_review'], command=self.start_review)
+        tools_menu.add_command(label=self.lang['menu_export'], command=self.export_dataset)
+        tools_menu.add_command(label=self.lang['menu_transcode'], command=self.transcode_recordings)
+        tools_menu.add_command(label=self.lang['menu_import'], command=self.import_existing_recordings)
+        tools_menu.add_separator()
+        tools_menu.add_command(label=self.lang['menu_backup'], command=self.backup_recordings)
+        tools_menu.add_command(label=self.lang['menu_verify_backup'], command=self.verify_recordings_backup)
+        tools_menu.add_separator()
+        tools_menu.add_command(label=self.lang['menu_analytics'], command=self.show_work_analytics)
         
         # 语言菜单
         language_menu = tk.Menu(menubar, tearoff=0)
@@ -1032,6 +1723,32 @@ class AudioRecorder:
             if file_path:
                 self.load_text_file_and_restart(file_path)
 
+    def switch_speaker(self):
+        """切换说话人：同一文本文件的条目表共用，录音和进度按说话人分开保存"""
+        if self.is_recording:
+            messagebox.showwarning(self.lang['menu_switch_speaker'], self.lang['speaker_stop_recording'])
+            return
+        
+        project_dir = os.path.join(self.recordings_base_dir, self.current_project_name)
+        speakers = list_speakers(project_dir)
+        prompt = self.lang['speaker_prompt'].format(', '.join(speakers) or '-')
+        speaker = simpledialog.askstring(self.lang['menu_switch_speaker'], prompt,
+                                         initialvalue=self.speaker or '', parent=self.root)
+        if speaker is None:
+            return
+        speaker = speaker.strip()
+        # 未指定说话人时录音和各麦克风目录都在项目目录中，说话人目录不能与麦克风目录同名
+        if speaker and (not is_valid_speaker(speaker)
+                        or speaker.lower() in {name.lower() for name in self.microphones}):
+            messagebox.showerror(self.lang['menu_switch_speaker'], self.lang['speaker_invalid'])
+            return
+        if (speaker or None) == self.speaker:
+            return
+        
+        self.save_progress()
+        self.speaker = speaker or None
+        self.load_text_file_and_restart(self.current_text_file)
+
     def open_project_directory(self):
         """打开项目目录"""
         try:
@@ -1093,9 +1810,9 @@ class AudioRecorder:
     def batch_check_recordings(self):
         """批量检查录音文件"""
         missing_files = []
+        self.session.refresh_index(force=True)
         for i, record in enumerate(self.records):
-            audio_file = os.path.join(self.recordings_dir, f"{record['id']}.wav")
-            if not os.path.exists(audio_file):
+            if not self.session.is_recorded(record['id']):
                 missing_files.append(f"{i+1}: {record['id']}")
         
         if missing_files:
@@ -1108,6 +1825,578 @@ class AudioRecorder:
         
         messagebox.showinfo("录音检查结果", message)
 
+    def check_recording_content(self):
+        """用语音识别核对已录制的内容（后台执行），结果缓存在项目 manifest.json 中"""
+        self.finish_pending_saves()
+        self.session.refresh_index(force=True)
+        items = []
+        for record in self.records:
+            filename = self.session.recorded_files.get(record['id'])
+            if filename:
+                items.append((record['id'], record['text'], os.path.join(self.recordings_dir, filename)))
+        settings = self.config.get('verify_settings', {})
+        project_dir = os.path.join(self.recordings_base_dir, self.current_project_name)
+        threshold = settings.get('threshold', DEFAULT_THRESHOLD)
+        self.events.submit(self._check_recording_content, project_dir, items, settings, channel='verify',
+                           on_done=lambda results: self.show_content_check(results, threshold),
+                           on_error=lambda e: messagebox.showerror(self.lang['menu_check_content'],
+                                                                   self.lang['check_failed'].format(e)))
+
+    def _check_recording_content(self, project_dir, items, settings):
+        """后台任务：加载识别引擎（同样的设置只加载一次）并识别"""
+        engine_key = (settings.get('engine'), settings.get('model'), settings.get('language'))
+        if self.verify_engine is None or self.verify_engine[0] != engine_key:
+            engine = create_engine(settings.get('engine', 'faster-whisper'), model=settings.get('model', 'small'),
+                                   language=settings.get('language') or None)
+            self.verify_engine = (engine_key, engine)
+        
+        def progress(done, total):
+            text = self.lang['check_progress'].format(done, total)
+            self.events.post(lambda: self.recording_status.config(text=text, foreground="orange"))
+        
+        return verify_takes(project_dir, items, self.verify_engine[1], settings.get('workers', 2), progress)
+
+    def show_content_check(self, results, threshold):
+        """列出相似度低的录音，双击跳转到对应条目"""
+        self.recording_status.config(text="", foreground="blue")
+        low = low_scores(results, threshold)
+        if not low:
+            messagebox.showinfo(self.lang['menu_check_content'],
+                                self.lang['check_all_ok'].format(len(results), threshold))
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title(self.lang['check_title'].format(threshold))
+        dialog.geometry("760x400")
+        dialog.transient(self.root)
+        
+        frame = ttk.Frame(dialog, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        ttk.Label(frame, text=self.lang['check_summary'].format(len(results), len(low))).pack(anchor=tk.W, pady=(0, 5))
+        tree = ttk.Treeview(frame, columns=('score', 'text', 'hypothesis'), show='tree headings', height=14)
+        tree.heading('#0', text='ID')
+        tree.heading('score', text=self.lang['check_score'])
+        tree.heading('text', text=self.lang['check_text'])
+        tree.heading('hypothesis', text=self.lang['check_hypothesis'])
+        tree.column('#0', width=110)
+        tree.column('score', width=70, anchor=tk.CENTER)
+        tree.column('text', width=280)
+        tree.column('hypothesis', width=280)
+        tree.pack(fill=tk.BOTH, expand=True)
+        for record_id, result in low:
+            tree.insert('', tk.END, iid=record_id, text=record_id,
+                        values=(f"{result['score']:.2f}", result['text'], result['hypothesis']))
+        
+        def jump(event=None):
+            selection = tree.selection()
+            if selection:
+                self.go_to_record_id(selection[0])
+        
+        tree.bind('<Double-1>', jump)
+        tree.bind('<Return>', jump)
+
+    def start_review(self):
+        """审听模式：连续播放已录制的录音（有筛选时只播放筛选结果），按键记录通过/退回"""
+        if self.session is None:
+            return
+        if self.is_recording:
+            messagebox.showwarning("警告", "请先停止录制！")
+            return
+        self.ensure_audio_backend()
+        if not (AUDIO_AVAILABLE and AUDIO_LIB == "sounddevice"):
+            messagebox.showwarning(self.lang['review_title'], self.lang['review_unavailable'])
+            return
+        self.finish_pending_saves()
+        recorded = self.session.recorded_files
+        positions = self.filter_indices if self.filter_indices is not None else range(len(self.records))
+        positions = [p for p in positions if self.records[p]['id'] in recorded]
+        if not positions:
+            messagebox.showinfo(self.lang['review_title'], self.lang['review_empty'])
+            return
+        items = [(self.records[p]['id'], os.path.join(self.recordings_dir, recorded[self.records[p]['id']]))
+                 for p in positions]
+        # 从当前条目（或其后第一条已录制的条目）开始
+        start = bisect.bisect_left(positions, self.current_index)
+        start = start if start < len(positions) else 0
+        settings = self.config.get('review_settings', {})
+        project_dir = os.path.join(self.recordings_base_dir, self.current_project_name)
+        review_log = ReviewLog(project_dir, settings.get('batch_size', 20))
+        state = {'index': None}
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title(self.lang['review_title'])
+        dialog.geometry("600x300")
+        dialog.transient(self.root)
+        frame = ttk.Frame(dialog, padding="15")
+        frame.pack(fill=tk.BOTH, expand=True)
+        position_label = ttk.Label(frame, text=self.lang['review_loading'], font=("微软雅黑", 11, "bold"))
+        position_label.pack(anchor=tk.W)
+        text_label = ttk.Label(frame, text='', font=("微软雅黑", 16), wraplength=560)
+        text_label.pack(fill=tk.BOTH, expand=True, pady=10)
+        count_label = ttk.Label(frame, text='', font=("微软雅黑", 10), foreground="blue")
+        count_label.pack(anchor=tk.W)
+        ttk.Label(frame, text=self.lang['review_keys'], font=("微软雅黑", 9), foreground="gray").pack(anchor=tk.W)
+        
+        def update_counts():
+            count_label.config(text=self.lang['review_counts'].format(review_log.counts['accept'],
+                                                                      review_log.counts['reject']))
+        
+        def show_item(index, record_id):
+            if not dialog.winfo_exists():
+                return
+            state['index'] = index
+            position_label.config(text=self.lang['review_position'].format(index + 1, len(items), record_id))
+            text_label.config(text=self.records[positions[index]]['text'])
+        
+        def finished():
+            if dialog.winfo_exists():
+                position_label.config(text=self.lang['review_finished'])
+        
+        def judge(verdict):
+            index = state['index']
+            if index is None:
+                return
+            record_id, path = items[index]
+            try:
+                if review_log.record(record_id, path, verdict):
+                    self.events.submit(review_log.flush, channel='io')
+            except OSError as e:
+                messagebox.showerror(self.lang['review_title'], str(e), parent=dialog)
+                return
+            update_counts()
+            player.skip()
+        
+        def failed(record_id, error):
+            print(self.lang['review_read_failed'].format(record_id, error))
+        
+        def close(event=None):
+            player.stop()
+            # 退回的条目需要重录，调度器下次使用时重新建立
+            self.scheduler = None
+            self.events.submit(review_log.flush, channel='io',
+                               on_error=lambda e: messagebox.showerror(self.lang['review_title'], str(e)))
+            dialog.destroy()
+            self.recording_status.config(text=self.lang['review_summary'].format(
+                review_log.counts['accept'], review_log.counts['reject']), foreground="blue")
+            if state['index'] is not None:
+                self.go_to_record_id(items[state['index']][0])
+        
+        player = ReviewPlayer(items, self.sample_rate, min(self.channels, 2),
+                              gap_ms=settings.get('gap_ms', 300), read_ahead=settings.get('read_ahead', 4),
+                              on_item=lambda index, record_id: self.events.post(show_item, index, record_id),
+                              on_finished=lambda: self.events.post(finished),
+                              on_error=lambda record_id, e: self.events.post(failed, record_id, e))
+        for key in ('<Return>', '<KeyPress-y>', '<KeyPress-Y>'):
+            dialog.bind(key, lambda e: judge('accept'))
+        for key in ('<KeyPress-n>', '<KeyPress-N>', '<Delete>'):
+            dialog.bind(key, lambda e: judge('reject'))
+        dialog.bind('<space>', lambda e: player.toggle_pause())
+        dialog.bind('<Right>', lambda e: player.skip())
+        dialog.bind('<KeyPress-r>', lambda e: player.replay())
+        dialog.bind('<KeyPress-R>', lambda e: player.replay())
+        dialog.bind('<Escape>', close)
+        dialog.protocol("WM_DELETE_WINDOW", close)
+        update_counts()
+        try:
+            player.start(start)
+        except Exception as e:
+            player.stop()
+            dialog.destroy()
+            messagebox.showerror(self.lang['review_title'], self.lang['review_failed'].format(e))
+            return
+        dialog.grab_set()
+        dialog.focus_set()
+
+    def open_filter_panel(self):
+        """按文本、录制状态和录音时长筛选条目，上一条/下一条只在结果中切换"""
+        if self.session is None:
+            return
+        # 打开面板时就在后台建立索引，第一次筛选不用等待
+        self.events.submit(prompt_index, self.session, channel='search')
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title(self.lang['filter_title'])
+        dialog.transient(self.root)
+        frame = ttk.Frame(dialog, padding="15")
+        frame.pack(fill=tk.BOTH, expand=True)
+        settings = self.filter_settings
+        
+        ttk.Label(frame, text=self.lang['filter_query']).grid(row=0, column=0, columnspan=4, sticky=tk.W)
+        query_var = tk.StringVar(value=settings.get('query', ''))
+        query_entry = ttk.Entry(frame, textvariable=query_var, width=40)
+        query_entry.grid(row=1, column=0, columnspan=4, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        status_names = self.lang['filter_status_names']
+        ttk.Label(frame, text=self.lang['filter_status']).grid(row=2, column=0, sticky=tk.W)
+        status_var = tk.StringVar(value=status_names[STATUS_FILTERS.index(settings.get('status', 'all'))])
+        ttk.Combobox(frame, textvariable=status_var, values=status_names, state='readonly',
+                     width=12).grid(row=2, column=1, columnspan=3, sticky=tk.W)
+        
+        ttk.Label(frame, text=self.lang['filter_duration']).grid(row=3, column=0, sticky=tk.W, pady=(10, 0))
+        min_var = tk.StringVar(value=settings.get('min_duration', ''))
+        max_var = tk.StringVar(value=settings.get('max_duration', ''))
+        ttk.Entry(frame, textvariable=min_var, width=6).grid(row=3, column=1, sticky=tk.W, pady=(10, 0))
+        ttk.Label(frame, text='~').grid(row=3, column=2, pady=(10, 0))
+        ttk.Entry(frame, textvariable=max_var, width=6).grid(row=3, column=3, sticky=tk.W, pady=(10, 0))
+        
+        result_label = ttk.Label(frame, text='', foreground='gray')
+        result_label.grid(row=4, column=0, columnspan=4, sticky=tk.W, pady=(10, 0))
+        
+        def apply(event=None):
+            try:
+                low = float(min_var.get()) if min_var.get().strip() else None
+                high = float(max_var.get()) if max_var.get().strip() else None
+            except ValueError:
+                messagebox.showerror(self.lang['filter_title'], self.lang['filter_invalid_duration'], parent=dialog)
+                return
+            options = {'query': query_var.get(), 'status': STATUS_FILTERS[status_names.index(status_var.get())],
+                       'min_duration': low, 'max_duration': high}
+            session = self.session
+            project_dir = os.path.join(self.recordings_base_dir, self.current_project_name)
+            
+            def done(positions):
+                if session is not self.session or not dialog.winfo_exists():
+                    return
+                if not positions:
+                    result_label.config(text=self.lang['filter_no_results'])
+                    return
+                result_label.config(text=self.lang['filter_results'].format(len(positions)))
+                self.filter_settings = dict(options, min_duration=min_var.get(), max_duration=max_var.get())
+                self.set_filter(positions)
+            
+            self.events.submit(search_records, session, channel='search', on_done=done, project_dir=project_dir,
+                               **options)
+        
+        def clear():
+            self.filter_settings = {}
+            self.set_filter(None)
+            dialog.destroy()
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.grid(row=5, column=0, columnspan=4, pady=(15, 0))
+        ttk.Button(button_frame, text=self.lang['filter_apply'], command=apply).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text=self.lang['filter_clear'], command=clear).pack(side=tk.LEFT, padx=5)
+        query_entry.bind('<Return>', apply)
+        query_entry.focus()
+
+    def set_filter(self, positions):
+        """设置筛选结果；当前条目不在结果中时跳到其后的第一条结果"""
+        self.filter_indices = positions
+        if positions and self.current_index not in positions and not self.is_recording:
+            position = bisect.bisect_left(positions, self.current_index)
+            self.current_index = positions[position] if position < len(positions) else positions[0]
+            self.save_progress()
+        self.show_current_record()
+
+    def go_to_record_id(self, record_id):
+        """跳转到指定 id 的条目"""
+        if self.is_recording:
+            messagebox.showwarning("警告", "请先停止录制再跳转！")
+            return
+        index = self.session.index_of(record_id) if self.session is not None else None
+        if index is not None:
+            self.current_index = index
+            self.save_progress()
+            self.show_current_record()
+
+    def export_dataset(self):
+        """导出当前项目为训练数据集（后台执行）"""
+        choice = messagebox.askyesnocancel(self.lang['export_title'], self.lang['export_choose_format'])
+        if choice is None:
+            return
+        export_format = 'webdataset' if choice else 'kaldi'
+        
+        output_dir = filedialog.askdirectory(title=self.lang['export_choose_dir'])
+        if not output_dir:
+            return
+        
+        audio_settings = self.config.get('audio_settings', {})
+        options = {
+            'export_format': export_format,
+            'shard_size': self.config.get('file_settings', {}).get('export_shard_size', 1000),
+            'sample_rate': self.sample_rate,
+            'channels': self.channels,
+            'bit_depth': audio_settings.get('bit_depth', 16),
+            'speaker': self.speaker,
+        }
+        args = (self.current_text_file, self.recordings_dir, output_dir)
+        self.events.submit(self._export_dataset, *args, **options)
+
+    def _export_dataset(self, text_file, recordings_dir, output_dir, **options):
+        """后台任务：导出数据集并在状态栏显示进度"""
+        def progress(done, total):
+            text = self.lang['export_progress'].format(done, total)
+            self.events.post(lambda: self.recording_status.config(text=text, foreground="orange"))
+        
+        try:
+            result = export_project(text_file, recordings_dir, output_dir, progress=progress, **options)
+            message = self.lang['export_done'].format(result['items'], result['shards'], result['skipped_shards'])
+            self.events.post(lambda: self.recording_status.config(text=message, foreground="green"))
+            self.events.post(lambda: messagebox.showinfo(self.lang['export_title'], message))
+        except Exception as e:
+            error = self.lang['export_failed'].format(e)
+            self.events.post(lambda: messagebox.showerror(self.lang['export_title'], error))
+
+    def backup_settings(self):
+        """备份目录（相对路径相对于当前目录）和并行线程数"""
+        file_settings = self.config.get('file_settings', {})
+        return (os.path.abspath(file_settings.get('backup_directory', './backup')),
+                file_settings.get('backup_workers', 8))
+
+    def backup_recordings(self):
+        """增量备份当前项目到 backup_directory（后台执行）"""
+        backup_dir, workers = self.backup_settings()
+        project_dir = os.path.join(self.recordings_base_dir, self.current_project_name)
+        self.events.submit(self._backup_recordings, project_dir, backup_dir, workers)
+
+    def _backup_recordings(self, project_dir, backup_dir, workers):
+        """后台任务：计算校验和并复制新录音"""
+        def progress(done, total):
+            text = self.lang['backup_progress'].format(done, total)
+            self.events.post(lambda: self.recording_status.config(text=text, foreground="orange"))
+        
+        try:
+            result = backup_project(project_dir, backup_dir, workers, progress)
+            message = self.lang['backup_done'].format(result['files'], result['copied'],
+                                                      result['bytes'] / 1024 / 1024,
+                                                      result['deduplicated'], backup_dir)
+            self.events.post(lambda: self.recording_status.config(text=message.splitlines()[0], foreground="green"))
+            self.events.post(lambda: messagebox.showinfo(self.lang['menu_backup'], message))
+        except Exception as e:
+            error = self.lang['backup_failed'].format(e)
+            self.events.post(lambda: messagebox.showerror(self.lang['menu_backup'], error))
+
+    def verify_recordings_backup(self):
+        """校验当前项目的备份：快速模式只检查大小，完整模式重新计算校验和"""
+        choice = messagebox.askyesnocancel(self.lang['menu_verify_backup'], self.lang['verify_choose_mode'])
+        if choice is None:
+            return
+        backup_dir, workers = self.backup_settings()
+        self.events.submit(self._verify_recordings_backup, backup_dir, self.current_project_name, choice, workers)
+
+    def _verify_recordings_backup(self, backup_dir, project_name, full, workers):
+        """后台任务：校验备份"""
+        def progress(done, total):
+            text = self.lang['verify_progress'].format(done, total)
+            self.events.post(lambda: self.recording_status.config(text=text, foreground="orange"))
+        
+        try:
+            problems = verify_backup(backup_dir, project_name, full, workers, progress)
+        except Exception as e:
+            error = self.lang['backup_failed'].format(e)
+            self.events.post(lambda: messagebox.showerror(self.lang['menu_verify_backup'], error))
+            return
+        if problems:
+            details = '\n'.join(f"{relative}: {error}" for relative, error in problems[:20])
+            message = self.lang['verify_problems'].format(len(problems), details)
+            self.events.post(lambda: messagebox.showwarning(self.lang['menu_verify_backup'], message))
+        else:
+            self.events.post(lambda: messagebox.showinfo(self.lang['menu_verify_backup'], self.lang['verify_ok']))
+        self.events.post(lambda: self.recording_status.config(text="", foreground="blue"))
+
+    def transcode_recordings(self):
+        """把当前项目已有的 WAV 录音在后台无损转换为 FLAC"""
+        if self.transcode_queue.is_running():
+            messagebox.showinfo(self.lang['transcode_title'], self.lang['transcode_running'])
+            return
+        
+        session = self.session
+        session.refresh_index(force=True)
+        jobs = [(record_id, os.path.join(session.recordings_dir, filename))
+                for record_id, filename in session.recorded_files.items()
+                if filename.lower().endswith('.wav')]
+        if not jobs:
+            messagebox.showinfo(self.lang['transcode_title'], self.lang['transcode_nothing'])
+            return
+        if not messagebox.askyesno(self.lang['transcode_title'], self.lang['transcode_confirm'].format(len(jobs))):
+            return
+        
+        def on_progress(done, total):
+            text = self.lang['transcode_progress'].format(done, total)
+            self.events.post(lambda: self.recording_status.config(text=text, foreground="orange"))
+        
+        def on_finished(converted, failures):
+            for record_id, error in failures[:10]:
+                print(f"⚠️ {record_id}: {error}")
+            message = self.lang['transcode_done'].format(converted, len(failures))
+            self.events.post(lambda: self.recording_status.config(text=message, foreground="green"))
+        
+        self.transcode_queue.start(
+            jobs,
+            on_done=lambda record_id, filename: self.events.post(
+                self.on_recording_transcoded, session, record_id, filename),
+            on_progress=on_progress,
+            on_finished=on_finished)
+
+    def on_recording_transcoded(self, session, record_id, filename):
+        """转码完成后更新索引和当前条目的音频路径"""
+        session.update_audio_file(record_id, filename)
+        if session is self.session and self.current_index < len(self.records):
+            if self.records[self.current_index]['id'] == record_id:
+                self.current_audio_file = session.audio_path(record_id)
+
+    def import_existing_recordings(self):
+        """把其他工具录制的音频文件导入当前项目：选择目录和对应规则，确认后在后台检查、转换"""
+        if self.session is None:
+            return
+        if self.is_recording:
+            messagebox.showwarning(self.lang['import_title'], self.lang['import_recording'])
+            return
+        if self.importing:
+            messagebox.showwarning(self.lang['import_title'], self.lang['import_running'])
+            return
+        source_dir = filedialog.askdirectory(title=self.lang['import_choose_dir'])
+        if not source_dir:
+            return
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title(self.lang['import_title'])
+        dialog.transient(self.root)
+        frame = ttk.Frame(dialog, padding="15")
+        frame.pack(fill=tk.BOTH, expand=True)
+        
+        ttk.Label(frame, text=source_dir, foreground='gray').grid(row=0, column=0, columnspan=2, sticky=tk.W,
+                                                                  pady=(0, 10))
+        ttk.Label(frame, text=self.lang['import_pattern'], wraplength=420).grid(row=1, column=0, columnspan=2,
+                                                                               sticky=tk.W)
+        pattern_var = tk.StringVar()
+        pattern_entry = ttk.Entry(frame, textvariable=pattern_var, width=50)
+        pattern_entry.grid(row=2, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(0, 10))
+        
+        ttk.Label(frame, text=self.lang['import_mapping']).grid(row=3, column=0, columnspan=2, sticky=tk.W)
+        mapping_var = tk.StringVar()
+        ttk.Entry(frame, textvariable=mapping_var, width=40).grid(row=4, column=0, sticky=(tk.W, tk.E))
+        
+        def browse():
+            path = filedialog.askopenfilename(parent=dialog, filetypes=[("CSV/JSON", "*.csv *.tsv *.txt *.json"),
+                                                                        (self.lang['import_all_files'], "*.*")])
+            if path:
+                mapping_var.set(path)
+        
+        ttk.Button(frame, text=self.lang['import_browse'], command=browse).grid(row=4, column=1, padx=(5, 0))
+        
+        recursive_var = tk.BooleanVar(value=False)
+        overwrite_var = tk.BooleanVar(value=False)
+        move_var = tk.BooleanVar(value=False)
+        for row, (key, variable) in enumerate((('import_recursive', recursive_var),
+                                               ('import_overwrite', overwrite_var),
+                                               ('import_move', move_var)), 5):
+            ttk.Checkbutton(frame, text=self.lang[key], variable=variable).grid(row=row, column=0, columnspan=2,
+                                                                                 sticky=tk.W)
+        
+        session = self.session
+        
+        def make_plan(records, recorded, pattern, mapping_file, recursive, overwrite):
+            mapping = load_mapping(mapping_file) if mapping_file else None
+            return plan_import(source_dir, records, recorded, pattern, mapping, recursive, overwrite)
+        
+        def confirm(plan):
+            if session is not self.session or not dialog.winfo_exists():
+                return
+            counts = {key: len(value) for key, value in plan.items()}
+            message = self.lang['import_plan'].format(**counts)
+            if not plan['jobs']:
+                messagebox.showinfo(self.lang['import_title'], message, parent=dialog)
+                return
+            if not messagebox.askyesno(self.lang['import_title'], message + self.lang['import_confirm'], parent=dialog):
+                return
+            dialog.destroy()
+            if self.is_recording or self.importing:
+                messagebox.showwarning(self.lang['import_title'], self.lang['import_running' if self.importing
+                                                                            else 'import_recording'])
+                return
+            # 先等已录完的录音保存完成，导入期间不再开始新的录制
+            self.finish_pending_saves()
+            self.importing = True
+            take_store = self.take_store(session.recordings_dir) if self.keep_takes else None
+            self.events.submit(self._import_existing_recordings, session, plan['jobs'], take_store, move_var.get())
+        
+        def start(event=None):
+            self.events.submit(make_plan, list(session.records), set(session.recorded_files),
+                               pattern_var.get().strip() or None, mapping_var.get().strip() or None,
+                               recursive_var.get(), overwrite_var.get(), on_done=confirm,
+                               on_error=lambda e: messagebox.showerror(self.lang['import_title'],
+                                                                       self.lang['import_failed'].format(e),
+                                                                       parent=dialog))
+        
+        ttk.Button(frame, text=self.lang['import_start'], command=start).grid(row=8, column=0, columnspan=2,
+                                                                             pady=(15, 0))
+        pattern_entry.bind('<Return>', start)
+        pattern_entry.focus()
+
+    def _import_existing_recordings(self, session, jobs, take_store, move):
+        """后台任务：用进程池检查、转换并放入录音目录，完成后在界面线程中登记到录音索引"""
+        def progress(done, total):
+            text = self.lang['import_progress'].format(done, total)
+            self.events.post(lambda: self.recording_status.config(text=text, foreground="orange"))
+        
+        try:
+            result = import_recordings(jobs, session.recordings_dir, self.sample_rate, self.channels, self.bit_depth,
+                                       self.audio_format, take_store, move, progress=progress)
+        except Exception as e:
+            error = self.lang['import_failed'].format(e)
+            self.events.post(self.on_import_failed, error)
+            return
+        self.events.post(self.on_recordings_imported, session, result)
+
+    def on_import_failed(self, error):
+        """导入出错：恢复录制"""
+        self.importing = False
+        messagebox.showerror(self.lang['import_title'], error)
+
+    def on_recordings_imported(self, session, result):
+        """导入完成：一次登记全部新录音并在租约表中标记完成，刷新当前条目"""
+        self.importing = False
+        session.mark_recorded_many(result['files'])
+        if self.lease_manager is not None and session is self.session:
+            self.lease_manager.complete_many(list(result['files']))
+        for record_id, path, error in result['failures'][:10]:
+            print(f"⚠️ {record_id} {path}: {error}")
+        if session is self.session and not self.is_recording:
+            self.show_current_record()
+        message = self.lang['import_done'].format(len(result['files']), result['converted'], len(result['failures']))
+        self.recording_status.config(text=message, foreground="green")
+        messagebox.showinfo(self.lang['import_title'], message)
+
+    def show_work_analytics(self):
+        """统计当前项目（全部说话人和工位）的工作量（后台计算）"""
+        if not self.current_project_name:
+            return
+        project_dir = os.path.join(self.recordings_base_dir, self.current_project_name)
+        idle_seconds = self.config.get('analytics_settings', {}).get('idle_seconds', 120)
+        self.events.submit(analyze_work, project_dir, idle_seconds,
+                           on_done=self.show_work_report,
+                           on_error=lambda e: messagebox.showerror(self.lang['analytics_title'], str(e)))
+
+    def show_work_report(self, stats):
+        """显示工作量统计"""
+        if not stats['events']:
+            messagebox.showinfo(self.lang['analytics_title'], self.lang['analytics_empty'])
+            return
+        
+        def number(value, scale=1):
+            return '-' if value is None else f"{value * scale:.1f}"
+        
+        lines = [self.lang['analytics_summary'].format(
+            items=stats['items'], active=format_duration(stats['active_seconds']),
+            per_hour=number(stats['items_per_hour']), takes=stats['takes'],
+            take=number(stats['mean_take_seconds']), dwell=number(stats['mean_dwell_seconds']),
+            median=number(stats['median_dwell_seconds']), talk=number(stats['talk_ratio'], 100),
+            idle_gaps=stats['idle_gaps'], idle=format_duration(stats['idle_seconds']),
+            longest=format_duration(stats['longest_idle_seconds'])), '', self.lang['analytics_days']]
+        for day in stats['days']:
+            lines.append(f"{day['date']}    {day['items']:>6}    {format_duration(day['active_seconds']):>9}    "
+                         f"{number(day['items_per_hour']):>6}")
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title(self.lang['analytics_title'])
+        dialog.geometry("560x420")
+        dialog.transient(self.root)
+        text = tk.Text(dialog, wrap=tk.WORD, font=("微软雅黑", 10), padx=10, pady=10)
+        text.pack(fill=tk.BOTH, expand=True)
+        text.insert(1.0, '\n'.join(lines))
+        text.config(state=tk.DISABLED)
+
     def show_shortcuts(self):
         """显示快捷键说明"""
         shortcuts = """快捷键说明：
@@ -1119,7 +2408,9 @@ class AudioRecorder:
 
 📁 Ctrl+O：切换文本文件
 📂 Ctrl+E：打开项目目录
-🔍 Ctrl+G：跳转到指定条目"""
+🔍 Ctrl+G：跳转到指定条目
+🔎 Ctrl+F：筛选条目
+🎧 Ctrl+R：审听模式"""
         
         messagebox.showinfo("快捷键说明", shortcuts)
 
@@ -1137,53 +2428,62 @@ class AudioRecorder:
         
         messagebox.showinfo("关于", about_text)
     
+    def update_widget(self, widget, **options):
+        """只设置与当前值不同的控件属性，避免不必要的重新布局"""
+        changed = {key: value for key, value in options.items() if str(widget.cget(key)) != str(value)}
+        if changed:
+            widget.config(**changed)
+
     def show_current_record(self):
-        """显示当前记录"""
+        """显示当前记录（使用预取的显示状态，只更新变化的部分）"""
         if self.current_index < len(self.records):
-            record = self.records[self.current_index]
+            state = self.prefetcher.get(self.current_index)
             
-            # 更新进度
-            progress_text = f"{self.current_index + 1} / {len(self.records)}"
-            self.progress_label.config(text=progress_text)
+            # 更新进度和ID
+            progress_text = f"{self.current_index + 1} / {state['total']}"
+            if self.filter_indices is not None:
+                position = bisect.bisect_left(self.filter_indices, self.current_index)
+                progress_text += self.lang['filter_position'].format(position + 1, len(self.filter_indices))
+            self.update_widget(self.progress_label, text=progress_text)
+            self.update_widget(self.id_label, text=state['id'])
+            if state['id'] != self.shown_record_id:
+                if self.shown_record_id is not None:
+                    self.log_event('advance', self.shown_record_id)
+                self.log_event('shown', state['id'])
+                self.shown_record_id = state['id']
             
-            # 更新ID
-            self.id_label.config(text=record['id'])
-            
-            # 更新文本内容
-            self.text_display.config(state=tk.NORMAL)
-            self.text_display.delete(1.0, tk.END)
-            self.text_display.insert(1.0, record['text'])
-            self.text_display.config(state=tk.DISABLED)
-            
-            # 初始化按钮状态
-            self.record_button.config(state=tk.NORMAL)
+            # 更新文本内容（内容相同时不重新排版）
+            if self.text_display.get(1.0, 'end-1c') != state['text']:
+                self.text_display.config(state=tk.NORMAL)
+                self.text_display.delete(1.0, tk.END)
+                self.text_display.insert(1.0, state['text'])
+                self.text_display.config(state=tk.DISABLED)
             
             # 控制上一条按钮状态
-            if self.current_index > 0:
-                self.prev_button.config(state=tk.NORMAL)
-            else:
-                self.prev_button.config(state=tk.DISABLED)
+            self.update_widget(self.prev_button, state=tk.NORMAL if self.current_index > 0 else tk.DISABLED)
             
             # 检查是否已有录制的文件
-            self.current_audio_file = os.path.join(self.recordings_dir, f"{record['id']}.wav")
-            if os.path.exists(self.current_audio_file):
-                # 已有录制文件的情况
-                self.play_button.config(state=tk.NORMAL)
-                self.next_button.config(state=tk.NORMAL)  # 已录制，可以进入下一条
-                self.record_button.config(text=self.lang['re_record'])
-                if self.current_language == 'zh_CN':
-                    self.recording_status.config(text="✅ 已有录制文件", foreground="blue")
+            self.current_audio_file = state['audio_path']
+            if state['recorded']:
+                # 已有录制文件的情况，可以试听和进入下一条
+                self.update_widget(self.play_button, state=tk.NORMAL)
+                self.update_widget(self.next_button, state=tk.NORMAL)
+                self.update_widget(self.record_button, state=tk.NORMAL, text=self.lang['re_record'])
+                if state['prompt_changed']:
+                    self.update_widget(self.recording_status, text=self.lang['status_prompt_changed'], foreground="orange")
+                elif self.current_language == 'zh_CN':
+                    self.update_widget(self.recording_status, text="✅ 已有录制文件", foreground="blue")
                 else:
-                    self.recording_status.config(text="✅ Recording exists", foreground="blue")
+                    self.update_widget(self.recording_status, text="✅ Recording exists", foreground="blue")
             else:
-                # 没有录制文件的情况
-                self.play_button.config(state=tk.DISABLED)
-                self.next_button.config(state=tk.DISABLED)  # 未录制，不能进入下一条
-                self.record_button.config(text=self.lang['start_recording'])
+                # 没有录制文件的情况，未录制不能进入下一条
+                self.update_widget(self.play_button, state=tk.DISABLED)
+                self.update_widget(self.next_button, state=tk.DISABLED)
+                self.update_widget(self.record_button, state=tk.NORMAL, text=self.lang['start_recording'])
                 if self.current_language == 'zh_CN':
-                    self.recording_status.config(text="准备录制", foreground="green")
+                    self.update_widget(self.recording_status, text="准备录制", foreground="green")
                 else:
-                    self.recording_status.config(text="Ready to record", foreground="green")
+                    self.update_widget(self.recording_status, text="Ready to record", foreground="green")
         else:
             # 所有记录已完成
             if self.current_language == 'zh_CN':
@@ -1204,8 +2504,19 @@ class AudioRecorder:
     
     def start_recording(self):
         """开始录制"""
+        if self.importing:
+            messagebox.showwarning(self.lang['title'], self.lang['import_running'])
+            return
+        if self.lease_manager is not None and self.current_index < len(self.records):
+            # 录制前确认条目归本工位所有，避免与其他工位重复录制
+            if not self.lease_manager.claim(self.records[self.current_index]['id']):
+                messagebox.showwarning(self.lang['title'], self.lang['station_leased_elsewhere'])
+                return
+        
         self.is_recording = True
         self.audio_data = []
+        if self.current_index < len(self.records):
+            self.log_event('record_start', self.records[self.current_index]['id'])
         
         # 更新界面状态
         if self.current_language == 'zh_CN':
@@ -1215,7 +2526,16 @@ class AudioRecorder:
         self.recording_status.config(text=status_text, foreground="red")
         self.record_button.config(text=self.lang['stop_recording'])
         
+        self.ensure_audio_backend()
         if AUDIO_AVAILABLE:
+            # 上一条录音还在保存时先等它完成，保证恢复日志和录音版本按顺序处理
+            self.finish_pending_saves()
+            if (self.journal is not None and self.current_index < len(self.records)
+                    and not (AUDIO_LIB == "sounddevice" and self.capture_devices)):
+                # 多设备采集在停止时才对齐，不写入日志
+                dtype = 'float32' if AUDIO_LIB == "sounddevice" else 'int16'
+                self.journal.begin_take(self.records[self.current_index]['id'],
+                                        self.sample_rate, self.channels, dtype)
             if AUDIO_LIB == "sounddevice":
                 self.start_sounddevice_recording()
             elif AUDIO_LIB == "pyaudio":
@@ -1224,21 +2544,75 @@ class AudioRecorder:
             # 模拟录制
             self.recording_status.config(text="🔴 正在录制（模拟）...", foreground="red")
     
+    def choose_capture_format(self, supported, native_rate, native_channels):
+        """确定采集格式：设备支持配置的格式时直接使用，否则使用设备原生格式并转换"""
+        self.input_converter = None
+        if supported(self.sample_rate, self.channels):
+            return self.sample_rate, self.channels
+        
+        channels = max(1, min(self.channels, native_channels))
+        if not supported(native_rate, channels):
+            channels = max(1, native_channels)
+        print(self.lang['console_native_capture'].format(self.sample_rate, self.channels, native_rate, channels))
+        self.input_converter = AudioConverter(native_rate, channels, self.sample_rate, self.channels)
+        return native_rate, channels
+
+    def sounddevice_capture_format(self):
+        """sounddevice 的采集格式"""
+        def supported(rate, channels):
+            try:
+                sd.check_input_settings(samplerate=rate, channels=channels, dtype='float32')
+                return True
+            except Exception:
+                return False
+        
+        info = sd.query_devices(kind='input')
+        return self.choose_capture_format(supported, int(info['default_samplerate']),
+                                          int(info['max_input_channels']))
+
+    def pyaudio_capture_format(self):
+        """pyaudio 的采集格式"""
+        info = self.audio.get_default_input_device_info()
+        
+        def supported(rate, channels):
+            try:
+                return self.audio.is_format_supported(rate, input_device=info['index'],
+                                                      input_channels=channels, input_format=self.format)
+            except ValueError:
+                return False
+        
+        return self.choose_capture_format(supported, int(info['defaultSampleRate']),
+                                          int(info['maxInputChannels']))
+
     def start_sounddevice_recording(self):
         """使用sounddevice开始录制"""
         try:
             self.audio_data_sd = []
+            if self.capture_devices:
+                # 多个设备同时采集，停止时对齐
+                self.multi_capture = MultiDeviceCapture(self.capture_devices, self.sample_rate)
+                self.multi_capture.start()
+                return
+            capture_rate, capture_channels = self.sounddevice_capture_format()
+            converter = self.input_converter
+            journal = self.journal
             
             def audio_callback(indata, frames, time, status):
                 if status:
                     print(f"Audio callback status: {status}")
                 if self.is_recording:
-                    self.audio_data_sd.append(indata.copy())
+                    if converter is not None:
+                        block = converter.process(indata)
+                    else:
+                        block = indata.copy()
+                    self.audio_data_sd.append(block)
+                    if journal is not None:
+                        journal.append(block)
             
             # 开始录制流
             self.stream = sd.InputStream(
-                samplerate=self.sample_rate,
-                channels=self.channels,
+                samplerate=capture_rate,
+                channels=capture_channels,
                 callback=audio_callback,
                 dtype=np.float32
             )
@@ -1247,34 +2621,46 @@ class AudioRecorder:
         except Exception as e:
             messagebox.showerror("错误", f"开始录制失败：{str(e)}")
             self.is_recording = False
+            if self.journal is not None:
+                # 录音流没有打开，日志中刚开始的这次录制没有数据，不应在恢复时出现
+                self.journal.discard_take()
             self.recording_status.config(text="录制失败", foreground="red")
     
     def start_pyaudio_recording(self):
         """使用pyaudio开始录制"""
         try:
+            capture_rate, capture_channels = self.pyaudio_capture_format()
             self.stream = self.audio.open(
                 format=self.format,
-                channels=self.channels,
-                rate=self.sample_rate,
+                channels=capture_channels,
+                rate=capture_rate,
                 input=True,
                 frames_per_buffer=self.chunk
             )
             
-            # 开始录制线程
-            self.recording_thread = threading.Thread(target=self._record_pyaudio)
-            self.recording_thread.start()
+            # 读取音频流的循环作为采集任务执行
+            self.recording_future = self.events.submit(self._record_pyaudio, channel='capture')
             
         except Exception as e:
             messagebox.showerror("错误", f"开始录制失败：{str(e)}")
             self.is_recording = False
+            if self.journal is not None:
+                # 录音流没有打开，日志中刚开始的这次录制没有数据，不应在恢复时出现
+                self.journal.discard_take()
             self.recording_status.config(text="录制失败", foreground="red")
     
     def _record_pyaudio(self):
-        """PyAudio录制线程"""
+        """PyAudio录制任务"""
         try:
+            converter = self.input_converter
+            journal = self.journal
             while self.is_recording:
                 data = self.stream.read(self.chunk)
+                if converter is not None:
+                    data = converter.process_int16(data)
                 self.audio_data.append(data)
+                if journal is not None:
+                    journal.append(data)
         except Exception as e:
             print(f"录制过程中出错：{str(e)}")
     
@@ -1284,6 +2670,15 @@ class AudioRecorder:
             return
         
         self.is_recording = False
+        if self.current_index < len(self.records):
+            self.log_event('record_stop', self.records[self.current_index]['id'])
+        
+        if self.multi_capture is not None:
+            try:
+                self.audio_data_sd = [self.multi_capture.stop()]
+            except Exception as e:
+                print(f"停止多设备采集时出错：{str(e)}")
+            self.multi_capture = None
         
         # 停止音频流
         if AUDIO_AVAILABLE and hasattr(self, 'stream') and self.stream:
@@ -1291,10 +2686,25 @@ class AudioRecorder:
                 self.stream.stop()
                 self.stream.close()
             elif AUDIO_LIB == "pyaudio":
+                # 等采集任务读完当前块，再输出转换器中剩余的采样
+                if self.recording_future is not None:
+                    try:
+                        self.recording_future.result(timeout=1)
+                    except Exception:
+                        pass
+                    self.recording_future = None
                 self.stream.stop_stream()
                 self.stream.close()
             self.stream = None
         
+        # 输出重采样滤波器中剩余的采样
+        if self.input_converter is not None:
+            if AUDIO_LIB == "sounddevice":
+                self.audio_data_sd.append(self.input_converter.flush())
+            elif AUDIO_LIB == "pyaudio":
+                self.audio_data.append(self.input_converter.flush_int16())
+            self.input_converter = None
+        
         # 更新界面状态
         if self.current_language == 'zh_CN':
             complete_text = "✅ 录制完成"
@@ -1310,126 +2720,355 @@ class AudioRecorder:
         else:
             self.prev_button.config(state=tk.DISABLED)
         
-        # 保存音频文件
+        # 保存音频文件（保存完成后启用试听按钮）
         self.save_audio()
-        
-        # 启用试听按钮
-        self.play_button.config(state=tk.NORMAL)
     
     def save_audio(self):
-        """保存音频文件"""
+        """保存音频文件：界面线程取走录音数据，编码和写文件在后台 'io' 通道中进行"""
         if self.current_index >= len(self.records):
             return
         
         record = self.records[self.current_index]
-        filename = f"{record['id']}.wav"
+        # pyaudio 模式下只能用 wave 模块写 WAV
+        audio_format = self.audio_format if AUDIO_LIB != "pyaudio" else 'WAV'
+        filename = f"{record['id']}{audio_extension(audio_format)}"
         filepath = os.path.join(self.recordings_dir, filename)
         self.current_audio_file = filepath
         
-        try:
-            if AUDIO_AVAILABLE:
-                if AUDIO_LIB == "sounddevice" and hasattr(self, 'audio_data_sd') and self.audio_data_sd:
-                    # 使用soundfile保存
-                    audio_data = np.concatenate(self.audio_data_sd, axis=0)
-                    sf.write(filepath, audio_data, self.sample_rate)
-                    
-                elif AUDIO_LIB == "pyaudio" and self.audio_data:
-                    # 使用wave保存
-                    with wave.open(filepath, 'wb') as wf:
-                        wf.setnchannels(self.channels)
-                        wf.setsampwidth(self.audio.get_sample_size(self.format))
-                        wf.setframerate(self.sample_rate)
-                        wf.writeframes(b''.join(self.audio_data))
-                
-                self.recording_status.config(text=f"💾 已保存：{filepath}", foreground="green")
-            else:
-                # 模拟保存
-                self.recording_status.config(text=f"💾 已保存（模拟）：{filepath}", foreground="green")
+        if not AUDIO_AVAILABLE:
+            # 模拟保存
+            self.recording_status.config(text=f"💾 已保存（模拟）：{filepath}", foreground="green")
+            self.play_button.config(state=tk.NORMAL)
+            return
+        
+        if AUDIO_LIB == "sounddevice":
+            blocks = getattr(self, 'audio_data_sd', None) or []
+            self.audio_data_sd = []
+            sample_width = None
+        else:
+            blocks = self.audio_data
+            self.audio_data = []
+            sample_width = self.audio.get_sample_size(self.format)
+        if not blocks:
+            # 没有录到数据：不动已有录音，也不登记为已录制
+            if self.journal is not None:
+                self.journal.discard_take()
+            self.recording_status.config(text=self.lang['status_no_audio'], foreground="orange")
+            return
+        # 保存时需要的设置和版本管理在界面线程中取好，后台任务不读取会变化的界面状态
+        options = {
+            'recordings_dir': self.recordings_dir,
+            'sample_rate': self.sample_rate,
+            'channels': self.channels,
+            'bit_depth': self.bit_depth,
+            'split': self.channel_output == 'split',
+            'microphones': list(self.microphones),
+            # [(目录, TakeStore)]，第一个是主目录；不保留历史版本时 TakeStore 为 None
+            'stores': [(directory, self.take_store(directory) if self.keep_takes else None)
+                       for directory in self.take_directories()],
+        }
+        self.recording_status.config(text=self.lang['status_saving'].format(filepath), foreground="orange")
+        take = (record['id'], filepath, audio_format, blocks, sample_width, options)
+        self.events.submit(self._write_take, *take, channel='io',
+                           on_done=lambda saved: self.on_take_saved(record['id'], saved, filepath),
+                           on_error=lambda error: self.on_take_save_failed(take, error))
+
+    def _write_take(self, record_id, filepath, audio_format, blocks, sample_width, options):
+        """后台任务：写入一次录音，返回主目录中的文件名；失败时恢复被移走的原录音"""
+        recordings_dir = options['recordings_dir']
+        extension = os.path.splitext(filepath)[1]
+        with ExitStack() as stack:
+            # 重新录制时把各目录的原录音保留为历史版本，写入后删除其他格式的旧录音
+            for directory, store in options['stores']:
+                stack.enter_context(replacing_take(directory, record_id, extension, store))
+            
+            if AUDIO_LIB == "sounddevice" and blocks:
+                # 使用soundfile保存（WAV 或 FLAC）
+                audio_data = np.concatenate(blocks, axis=0)
+                if options['split'] and audio_data.shape[1] > 1:
+                    # 每个麦克风单独保存，第一个声道为主文件
+                    write_channel_files(recordings_dir, record_id, audio_data, options['sample_rate'],
+                                        options['microphones'], audio_format, options['bit_depth'])
+                else:
+                    write_audio(filepath, audio_data, options['sample_rate'], audio_format, options['bit_depth'])
                 
-        except Exception as e:
-            messagebox.showerror("错误", f"保存音频文件失败：{str(e)}")
+            elif AUDIO_LIB == "pyaudio" and blocks:
+                # 使用wave保存
+                with wave.open(filepath, 'wb') as wf:
+                    wf.setnchannels(options['channels'])
+                    wf.setsampwidth(sample_width)
+                    wf.setframerate(options['sample_rate'])
+                    wf.writeframes(b''.join(blocks))
+        return os.path.basename(filepath)
+
+    def on_take_saved(self, record_id, filename, filepath, commit_journal=True):
+        """录音保存完成（在界面线程中执行）；重试保存时日志中的录制已另存，不再提交"""
+        if self.session is not None:
+            self.session.mark_recorded(record_id, filename)
+        if self.lease_manager is not None:
+            self.lease_manager.complete(record_id)
+        if self.scheduler is not None and self.session is not None:
+            index = self.session.index_of(record_id)
+            if index is not None:
+                self.scheduler.complete(index)
+        if self.journal is not None and commit_journal:
+            self.journal.commit_take()
+        self.log_event('saved', record_id)
+        self.recording_status.config(text=f"💾 已保存：{filepath}", foreground="green")
+        if (not self.is_recording and self.current_index < len(self.records)
+                and self.records[self.current_index]['id'] == record_id):
+            self.play_button.config(state=tk.NORMAL)
+
+    def on_take_save_failed(self, take, error, salvaged=None, retried=False):
+        """录音保存失败（在界面线程中执行）
+
+        第一次失败时把恢复日志中的这次录制另存到 recovered/，之后开始新的录制也不会丢失；
+        录音数据仍在内存中，可以重试保存，重试成功后删除另存的文件
+        """
+        if not retried and self.journal is not None:
+            salvaged = self.journal.salvage_take()
+        message = self.lang['save_failed'].format(error)
+        if salvaged:
+            message += self.lang['save_failed_salvaged'].format(salvaged)
+        if not take[3] or not messagebox.askretrycancel(self.lang['save_failed_title'], message):
+            return
+        
+        def saved(filename):
+            self.on_take_saved(take[0], filename, take[1], commit_journal=False)
+            if salvaged and os.path.exists(salvaged):
+                os.remove(salvaged)
+        
+        self.events.submit(self._write_take, *take, channel='io', on_done=saved,
+                           on_error=lambda e: self.on_take_save_failed(take, e, salvaged, retried=True))
     
+    def take_directories(self):
+        """保存同一条录音的所有目录（按麦克风拆分保存时包括各麦克风目录）"""
+        directories = [self.recordings_dir]
+        if self.channel_output == 'split' and self.channels > 1:
+            directories += [os.path.join(self.recordings_dir, name)
+                            for name in microphone_names(self.microphones, self.channels)[1:]]
+        return directories
+
+    def take_store(self, directory):
+        """目录对应的版本管理（按目录缓存）"""
+        store = self.take_stores.get(directory)
+        if store is None:
+            store = self.take_stores[directory] = TakeStore(directory)
+        return store
+
+    def manage_takes(self):
+        """查看当前条目的所有录音版本，选择使用哪一版"""
+        if self.is_recording or self.current_index >= len(self.records):
+            return
+        self.finish_pending_saves()
+        record_id = self.records[self.current_index]['id']
+        store = self.take_store(self.recordings_dir)
+        
+        dialog = tk.Toplevel(self.root)
+        dialog.title(self.lang['takes_title'].format(record_id))
+        dialog.geometry("520x300")
+        dialog.transient(self.root)
+        dialog.grab_set()
+        
+        frame = ttk.Frame(dialog, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        tree = ttk.Treeview(frame, columns=('duration', 'modified', 'active'), show='headings', height=8)
+        tree.heading('duration', text=self.lang['takes_duration'])
+        tree.heading('modified', text=self.lang['takes_modified'])
+        tree.heading('active', text=self.lang['takes_active'])
+        tree.column('duration', width=100, anchor=tk.CENTER)
+        tree.column('modified', width=180, anchor=tk.CENTER)
+        tree.column('active', width=80, anchor=tk.CENTER)
+        tree.pack(fill=tk.BOTH, expand=True)
+        takes = {}
+        
+        def refresh():
+            tree.delete(*tree.get_children())
+            takes.clear()
+            active_filename = self.session.recorded_files.get(record_id)
+            for number, path, active, duration, modified in store.describe(record_id, active_filename):
+                item = tree.insert('', tk.END, values=(f"{duration:.1f}s", modified, '✅' if active else ''))
+                takes[item] = (number, path, active)
+        
+        def selected():
+            selection = tree.selection()
+            return takes.get(selection[0]) if selection else None
+        
+        def play():
+            take = selected()
+            if take:
+                self.play_audio(take[1])
+        
+        def use_take():
+            take = selected()
+            if not take or take[2]:
+                return
+            try:
+                self.select_take(record_id, take[0])
+            except Exception as e:
+                messagebox.showerror(self.lang['takes_title'].format(record_id), str(e), parent=dialog)
+            refresh()
+        
+        def delete_others():
+            if messagebox.askyesno(self.lang['takes_title'].format(record_id),
+                                   self.lang['takes_confirm_delete'], parent=dialog):
+                for directory in self.take_directories():
+                    self.take_store(directory).collect_garbage([record_id])
+                refresh()
+        
+        button_frame = ttk.Frame(frame)
+        button_frame.pack(pady=(10, 0))
+        ttk.Button(button_frame, text=self.lang['playback_button'], command=play).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text=self.lang['takes_use'], command=use_take).pack(side=tk.LEFT, padx=5)
+        ttk.Button(button_frame, text=self.lang['takes_delete_others'], command=delete_others).pack(side=tk.LEFT, padx=5)
+        tree.bind('<Double-1>', lambda e: play())
+        refresh()
+
+    def select_take(self, record_id, number):
+        """把指定版本设为条目当前使用的录音"""
+        for directory in self.take_directories():
+            store = self.take_store(directory)
+            try:
+                filename = store.select(record_id, number, existing_take(directory, record_id))
+            except KeyError:
+                continue  # 该麦克风没有这一版
+            if directory == self.recordings_dir:
+                self.session.mark_recorded(record_id, filename)
+        self.show_current_record()
+
+    def collect_unused_takes(self):
+        """删除整个项目中未被选用的录音版本"""
+        if not messagebox.askyesno(self.lang['menu_collect_takes'], self.lang['takes_confirm_collect']):
+            return
+        self.finish_pending_saves()
+        removed = freed = 0
+        for directory in self.take_directories():
+            count, size = self.take_store(directory).collect_garbage()
+            removed += count
+            freed += size
+        messagebox.showinfo(self.lang['menu_collect_takes'],
+                            self.lang['takes_collected'].format(removed, freed / 1024 / 1024))
+
     def next_record(self):
         """切换到下一条记录"""
-        self.current_index += 1
+        if self.lease_manager is not None:
+            self.current_index = self.next_leased_index()
+        elif self.filter_indices is not None:
+            # 只在筛选结果中切换
+            position = bisect.bisect_right(self.filter_indices, self.current_index)
+            if position >= len(self.filter_indices):
+                messagebox.showinfo(self.lang['filter_title'], self.lang['filter_end'])
+                return
+            self.current_index = self.filter_indices[position]
+        elif self.schedule != 'sequential':
+            scheduler = self.ensure_scheduler()
+            if scheduler.is_pending(self.current_index):
+                scheduler.defer(self.current_index)
+            index = scheduler.next()
+            if index is None:
+                messagebox.showinfo(self.lang['title'], self.lang['schedule_done'])
+                return
+            self.schedule_history.append(self.current_index)
+            self.current_index = index
+        else:
+            self.current_index += 1
         self.save_progress()  # 自动保存进度
         self.show_current_record()
 
     def prev_record(self):
         """切换到上一条记录"""
-        if self.current_index > 0:
+        if self.filter_indices is not None and self.lease_manager is None:
+            position = bisect.bisect_left(self.filter_indices, self.current_index)
+            if position == 0:
+                messagebox.showinfo(self.lang['filter_title'], self.lang['filter_start'])
+                return
+            self.current_index = self.filter_indices[position - 1]
+            self.save_progress()
+            self.show_current_record()
+        elif self.schedule_history and self.lease_manager is None:
+            # 按调度顺序录制时返回上一次所在的条目
+            self.current_index = min(self.schedule_history.pop(), len(self.records) - 1)
+            self.save_progress()
+            self.show_current_record()
+        elif self.current_index > 0:
             self.current_index -= 1
             self.save_progress()  # 自动保存进度
             self.show_current_record()
         else:
             messagebox.showinfo("提示", "已经是第一条记录了！")
     
-    def play_audio(self):
-        """试听当前录制的音频"""
-        if not self.current_audio_file or not os.path.exists(self.current_audio_file):
+    def play_audio(self, path=None):
+        """试听当前录制的音频（或指定的录音版本）"""
+        path = path or self.current_audio_file
+        if not path or not os.path.exists(path):
             messagebox.showwarning("警告", "没有找到音频文件！")
             return
         
         try:
+            self.ensure_audio_backend()
             if AUDIO_AVAILABLE and AUDIO_LIB == "sounddevice":
                 # 使用sounddevice播放
-                threading.Thread(target=self._play_with_sounddevice, daemon=True).start()
+                self.events.submit(self._play_with_sounddevice, path, channel='playback')
             else:
                 # 使用系统默认播放器
-                threading.Thread(target=self._play_with_system, daemon=True).start()
+                self.events.submit(self._play_with_system, path, channel='playback')
         except Exception as e:
             messagebox.showerror("错误", f"播放音频失败：{str(e)}")
     
-    def _play_with_sounddevice(self):
+    def _play_with_sounddevice(self, path):
         """使用sounddevice播放音频"""
         try:
             # 更新状态
-            self.root.after(0, lambda: self.recording_status.config(text=self.lang['status_playing'], foreground="orange"))
-            self.root.after(0, lambda: self.play_button.config(text=self.lang['button_playing'], state=tk.DISABLED))
+            self.events.post(lambda: self.recording_status.config(text=self.lang['status_playing'], foreground="orange"))
+            self.events.post(lambda: self.play_button.config(text=self.lang['button_playing'], state=tk.DISABLED))
             
             # 读取并播放音频
-            data, samplerate = sf.read(self.current_audio_file)
+            data, samplerate = sf.read(path)
             sd.play(data, samplerate)
             sd.wait()  # 等待播放完成
             
             # 恢复状态
-            self.root.after(0, lambda: self.recording_status.config(text=self.lang['status_play_completed'], foreground="blue"))
-            self.root.after(0, lambda: self.play_button.config(text=self.lang['playback_button'], state=tk.NORMAL))
+            self.events.post(lambda: self.recording_status.config(text=self.lang['status_play_completed'], foreground="blue"))
+            self.events.post(lambda: self.play_button.config(text=self.lang['playback_button'], state=tk.NORMAL))
             
         except Exception as e:
+            # except 块结束后 e 会被删除，回调在界面线程中执行时已经取不到，先取出错误信息
+            msg = str(e)
             if self.current_language == 'zh_CN':
-                self.root.after(0, lambda: messagebox.showerror("错误", f"播放失败：{str(e)}"))
+                self.events.post(lambda: messagebox.showerror("错误", f"播放失败：{msg}"))
             else:
-                self.root.after(0, lambda: messagebox.showerror("Error", f"Playback failed: {str(e)}"))
-            self.root.after(0, lambda: self.play_button.config(text=self.lang['playback_button'], state=tk.NORMAL))
+                self.events.post(lambda: messagebox.showerror("Error", f"Playback failed: {msg}"))
+            self.events.post(lambda: self.play_button.config(text=self.lang['playback_button'], state=tk.NORMAL))
     
-    def _play_with_system(self):
+    def _play_with_system(self, path):
         """使用系统默认播放器播放音频"""
         try:
             # 更新状态
-            self.root.after(0, lambda: self.recording_status.config(text=self.lang['status_playing'], foreground="orange"))
-            self.root.after(0, lambda: self.play_button.config(text=self.lang['button_playing'], state=tk.DISABLED))
+            self.events.post(lambda: self.recording_status.config(text=self.lang['status_playing'], foreground="orange"))
+            self.events.post(lambda: self.play_button.config(text=self.lang['button_playing'], state=tk.DISABLED))
             
             # 使用系统默认程序打开音频文件
             if os.name == 'nt':  # Windows
-                os.startfile(self.current_audio_file)
+                os.startfile(path)
             elif os.name == 'posix':  # macOS and Linux
-                subprocess.call(('open' if sys.platform == 'darwin' else 'xdg-open', self.current_audio_file))
+                subprocess.call(('open' if sys.platform == 'darwin' else 'xdg-open', path))
             
             # 短暂延迟后恢复按钮状态
             time.sleep(1)
             if self.current_language == 'zh_CN':
-                self.root.after(0, lambda: self.recording_status.config(text="🔊 播放器已启动", foreground="blue"))
+                self.events.post(lambda: self.recording_status.config(text="🔊 播放器已启动", foreground="blue"))
             else:
-                self.root.after(0, lambda: self.recording_status.config(text="🔊 Player started", foreground="blue"))
-            self.root.after(0, lambda: self.play_button.config(text=self.lang['playback_button'], state=tk.NORMAL))
+                self.events.post(lambda: self.recording_status.config(text="🔊 Player started", foreground="blue"))
+            self.events.post(lambda: self.play_button.config(text=self.lang['playback_button'], state=tk.NORMAL))
             
         except Exception as e:
+            # except 块结束后 e 会被删除，回调在界面线程中执行时已经取不到，先取出错误信息
+            msg = str(e)
             if self.current_language == 'zh_CN':
-                self.root.after(0, lambda: messagebox.showerror("错误", f"播放失败：{str(e)}"))
+                self.events.post(lambda: messagebox.showerror("错误", f"播放失败：{msg}"))
             else:
-                self.root.after(0, lambda: messagebox.showerror("Error", f"Playback failed: {str(e)}"))
-            self.root.after(0, lambda: self.play_button.config(text=self.lang['playback_button'], state=tk.NORMAL))
+                self.events.post(lambda: messagebox.showerror("Error", f"Playback failed: {msg}"))
+            self.events.post(lambda: self.play_button.config(text=self.lang['playback_button'], state=tk.NORMAL))
     
     def finish_recording(self):
         """结束录制"""
@@ -1438,8 +3077,11 @@ class AudioRecorder:
         
         result = messagebox.askyesno("确认", "确定要结束录制吗？\n\n当前进度将被保存。")
         if result:
+            self.finish_pending_saves()
             self.save_progress()
             self.cleanup()
+            self.close_event_log()
+            self.events.shutdown(wait=False)
             self.root.quit()
     
     def cleanup(self):
@@ -1447,6 +3089,13 @@ class AudioRecorder:
         if self.is_recording:
             self.is_recording = False
         
+        if self.multi_capture is not None:
+            try:
+                self.multi_capture.stop()
+            except:
+                pass
+            self.multi_capture = None
+        
         if AUDIO_AVAILABLE:
             if hasattr(self, 'stream') and self.stream:
                 try:
@@ -1459,7 +3108,7 @@ class AudioRecorder:
                 except:
                     pass
             
-            if AUDIO_LIB == "pyaudio" and hasattr(self, 'audio'):
+            if AUDIO_LIB == "pyaudio" and self.audio is not None:
                 try:
                     self.audio.terminate()
                 except:
@@ -1472,30 +3121,32 @@ class AudioRecorder:
             if not result:
                 return
         
+        self.finish_pending_saves()  # 等正在保存的录音写完
         self.save_progress()  # 保存进度
+        self.transcode_queue.cancel()
+        self.close_station()
+        if self.prefetcher is not None:
+            self.prefetcher.close()
         self.cleanup()
+        self.close_journal()
+        self.close_event_log()
+        self.events.shutdown(wait=False)
         self.root.destroy()
 
 
-def main():
+def main(argv=None):
     """主函数"""
-    # 先检测语言配置
-    try:
-        with open('config.json', 'r', encoding='utf-8') as f:
-            config = json.load(f)
-        current_language = config.get('ui_settings', {}).get('language', 'zh_CN')
-    except:
-        current_language = 'zh_CN'
+    # 先解析命令行并检测语言配置
+    config_loader = parse_command_line(argv)
+    current_language = config_loader.load()['ui_settings']['language']
     
-    # 根据语言显示启动信息
+    # 根据语言显示启动信息（音频库加载完成后另行输出）
     if current_language == 'zh_CN':
         print("🎤 语音录制程序 v2.1 启动成功！")
         print(f"📁 工作目录：{os.getcwd()}")
-        print(f"🎵 音频库：{AUDIO_LIB if AUDIO_AVAILABLE else '模拟模式'}")
     else:
         print("🎤 Audio Recorder v2.1 started successfully!")
         print(f"📁 Working directory: {os.getcwd()}")
-        print(f"🎵 Audio library: {AUDIO_LIB if AUDIO_AVAILABLE else 'Simulation mode'}")
     
     # 创建主窗口
     root = tk.Tk()
@@ -1507,7 +3158,7 @@ def main():
         pass
     
     # 创建录制程序实例
-    app = AudioRecorder(root)
+    app = AudioRecorder(root, config_loader)
     
     # 设置窗口关闭事件
     root.protocol("WM_DELETE_WINDOW", app.on_closing)
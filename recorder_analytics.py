@@ -0,0 +1,216 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+工作量统计
+录制过程中按条目记录时间事件（显示条目、开始/停止录制、保存完成、切换条目），
+追加写入录音目录 .analytics/ 下的二进制事件文件（每个工位一个文件，每条事件固定 17 字节），
+统计时用 numpy 整块读入并向量化计算，几百万条事件也能很快汇总：
+- 吞吐量：每个有效工作小时保存的条目数
+- 录音时长与停留时间：平均每条录音的时长、在每个条目上停留的时间，以及说话时间占工作时间的比例
+- 空闲：相邻事件间隔超过阈值的时段（不计入工作时间）
+"""
+
+import argparse
+import os
+import struct
+import time
+import zlib
+
+ANALYTICS_DIR_NAME = '.analytics'
+EVENT_STRUCT = struct.Struct('<dBIf')
+EVENTS = {
+    'session_start': 1,
+    'shown': 2,
+    'record_start': 3,
+    'record_stop': 4,
+    'saved': 5,
+    'advance': 6,
+    'session_end': 7,
+}
+DEFAULT_IDLE_SECONDS = 120
+
+
+def event_dtype():
+    """事件文件的 numpy 记录格式，与 EVENT_STRUCT 一致"""
+    import numpy as np
+
+    return np.dtype([('time', '<f8'), ('event', 'u1'), ('item', '<u4'), ('value', '<f4')])
+
+
+def item_key(record_id):
+    """条目 id 的 32 位校验值，文本文件增删条目后仍能对应到同一条目"""
+    return zlib.crc32(record_id.encode('utf-8')) if record_id else 0
+
+
+class EventLog:
+    """一个工位的事件文件，只追加写入"""
+
+    def __init__(self, recordings_dir, station_id=None):
+        directory = os.path.join(recordings_dir, ANALYTICS_DIR_NAME)
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, f"events_{station_id or 'local'}.bin")
+        # 不使用缓冲：每条事件一次写入，异常退出时最多丢失正在写的一条
+        self._file = open(self.path, 'ab', buffering=0)
+        size = self._file.tell()
+        if size % EVENT_STRUCT.size:
+            # 上次写了一半的事件会使后面的记录错位，截掉
+            self._file.truncate(size - size % EVENT_STRUCT.size)
+        self._record_started = None
+
+    def log(self, event, record_id=None, value=None):
+        """记录一条事件；record_stop 未给出 value 时为距 record_start 的秒数"""
+        now = time.time()
+        if event == 'record_start':
+            self._record_started = now
+        elif event == 'record_stop' and value is None and self._record_started is not None:
+            value = now - self._record_started
+            self._record_started = None
+        self._file.write(EVENT_STRUCT.pack(now, EVENTS[event], item_key(record_id), value or 0.0))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def find_event_files(directory):
+    """目录（如项目目录，包括各说话人子目录）下的全部事件文件"""
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        if os.path.basename(root) == ANALYTICS_DIR_NAME:
+            paths.extend(os.path.join(root, name) for name in files if name.endswith('.bin'))
+            dirs[:] = []
+    return sorted(paths)
+
+
+def load_events(path):
+    """读取一个事件文件（忽略末尾不完整的记录），按时间排序"""
+    import numpy as np
+
+    dtype = event_dtype()
+    count = os.path.getsize(path) // dtype.itemsize
+    events = np.fromfile(path, dtype=dtype, count=count)
+    return events[np.argsort(events['time'], kind='stable')]
+
+
+def _file_summary(events, idle_seconds):
+    """一个工位的统计量（便于多个文件合并）"""
+    import numpy as np
+
+    times = events['time']
+    kinds = events['event']
+    gaps = np.diff(times)
+    # 新会话开始前的间隔既不算工作也不算空闲
+    breaks = kinds[1:] == EVENTS['session_start']
+    idle = (gaps > idle_seconds) & ~breaks
+    working = ~idle & ~breaks
+
+    # 停留时间：显示条目到随后第一次切换，扣除其间的空闲；切换前又显示了其他条目（如重新打开项目）的不计。
+    # 按事件序号而不是时间配对，同一时刻的"切换"和"显示下一条"不会混淆
+    shown = np.flatnonzero(kinds == EVENTS['shown'])
+    advanced = np.flatnonzero(kinds == EVENTS['advance'])
+    following = np.searchsorted(advanced, shown)
+    valid = following < len(advanced)
+    starts = shown[valid]
+    ends = advanced[following[valid]]
+    next_shown = np.append(shown[1:], len(events))[valid]
+    starts, ends = starts[ends < next_shown], ends[ends < next_shown]
+    paused = np.concatenate(([0.0], np.cumsum(np.where(working, 0.0, gaps))))
+    dwell = (times[ends] - times[starts]) - (paused[ends] - paused[starts])
+
+    # 按本地日期汇总保存条目数和工作时间
+    offset = time.localtime().tm_gmtoff
+    day_of_gap = ((times[:-1] + offset) // 86400).astype(np.int64)
+    saved_days = ((times[kinds == EVENTS['saved']] + offset) // 86400).astype(np.int64)
+    return {
+        'events': len(events),
+        'saved_days': saved_days,
+        'gap_days': day_of_gap[working],
+        'working_gaps': gaps[working],
+        'idle_gaps': gaps[idle],
+        'takes': events['value'][kinds == EVENTS['record_stop']].astype(np.float64),
+        'dwell': dwell,
+    }
+
+
+def analyze(directory, idle_seconds=DEFAULT_IDLE_SECONDS):
+    """统计目录下全部事件文件，返回汇总结果（时间单位为秒）"""
+    import numpy as np
+
+    parts = [_file_summary(load_events(path), idle_seconds) for path in find_event_files(directory)]
+
+    def joined(key, dtype=np.float64):
+        arrays = [part[key] for part in parts]
+        return np.concatenate(arrays) if arrays else np.zeros(0, dtype=dtype)
+
+    saved_days = joined('saved_days', np.int64)
+    gap_days = joined('gap_days', np.int64)
+    working_gaps = joined('working_gaps')
+    idle_gaps = joined('idle_gaps')
+    takes = joined('takes')
+    dwell = joined('dwell')
+    active = float(working_gaps.sum())
+    items = len(saved_days)
+
+    # 按日期分组求和
+    all_days, groups = np.unique(np.concatenate((saved_days, gap_days)), return_inverse=True)
+    day_items = np.bincount(groups[:items], minlength=len(all_days))
+    day_active = np.bincount(groups[items:], weights=working_gaps, minlength=len(all_days))
+    days = [{
+        'date': time.strftime('%Y-%m-%d', time.gmtime(int(day) * 86400)),
+        'items': int(count),
+        'active_seconds': float(seconds),
+        'items_per_hour': float(count * 3600 / seconds) if seconds else None,
+    } for day, count, seconds in zip(all_days, day_items, day_active)]
+
+    return {
+        'event_files': len(parts),
+        'events': sum(part['events'] for part in parts),
+        'items': items,
+        'active_seconds': active,
+        'items_per_hour': items * 3600 / active if active else None,
+        'takes': len(takes),
+        'mean_take_seconds': float(takes.mean()) if takes.size else None,
+        'mean_dwell_seconds': float(dwell.mean()) if dwell.size else None,
+        'median_dwell_seconds': float(np.median(dwell)) if dwell.size else None,
+        'talk_ratio': float(takes.sum()) / active if active else None,
+        'idle_seconds': float(idle_gaps.sum()),
+        'idle_gaps': len(idle_gaps),
+        'longest_idle_seconds': float(idle_gaps.max()) if idle_gaps.size else 0.0,
+        'days': days,
+    }
+
+
+def main(argv=None):
+    """命令行入口：统计一个项目（或任意目录）的工作量"""
+    from recorder_project import format_duration
+
+    parser = argparse.ArgumentParser(description='统计录音工作量')
+    parser.add_argument('directory', help='项目目录或录音目录')
+    parser.add_argument('--idle', type=float, default=DEFAULT_IDLE_SECONDS, help='超过该秒数的间隔视为空闲')
+    args = parser.parse_args(argv)
+
+    stats = analyze(args.directory, args.idle)
+    if not stats['events']:
+        print("没有工作量记录")
+        return 1
+
+    def number(value, digits=1):
+        return '-' if value is None else f"{value:.{digits}f}"
+
+    print(f"📊 {stats['event_files']} 个事件文件，{stats['events']} 条事件")
+    print(f"✅ 保存 {stats['items']} 条，工作时间 {format_duration(stats['active_seconds'])}，"
+          f"每小时 {number(stats['items_per_hour'])} 条")
+    print(f"🎤 录音 {stats['takes']} 次，平均 {number(stats['mean_take_seconds'])} 秒；"
+          f"每条停留平均 {number(stats['mean_dwell_seconds'])} 秒，中位数 {number(stats['median_dwell_seconds'])} 秒；"
+          f"说话占比 {number(stats['talk_ratio'] * 100 if stats['talk_ratio'] is not None else None)}%")
+    print(f"💤 空闲 {stats['idle_gaps']} 次，共 {format_duration(stats['idle_seconds'])}，"
+          f"最长 {format_duration(stats['longest_idle_seconds'])}")
+    for day in stats['days']:
+        print(f"  {day['date']}  {day['items']} 条  {format_duration(day['active_seconds'])}  "
+              f"{number(day['items_per_hour'])} 条/小时")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
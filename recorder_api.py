@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+不依赖界面的项目接口
+供质检、导出等脚本直接使用，不导入 tkinter：
+
+    from recorder_api import Project
+    project = Project('record.txt', speaker='spk01')
+    print(project.stats())
+    for index, record, path in project.iter_takes():
+        ...
+
+条目表、录音索引和进度文件与桌面程序共用同一套实现（ProjectSession、progress.json、takes/）
+"""
+
+import os
+
+from recorder_audio import audio_extension, normalize_audio_format, write_audio
+from recorder_config import ConfigLoader
+from recorder_project import (ProjectSession, ProgressStore, is_valid_speaker, progress_file_path,
+                              register_speaker, scan_audio_durations, speaker_directory)
+from recorder_takes import TakeStore, replacing_take
+
+
+class Project:
+    """一个录音项目：文本文件 + 录音目录（多说话人项目中为某个说话人的目录）"""
+
+    def __init__(self, text_file, recordings_base_dir=None, speaker=None, station=None, config=None):
+        config = config if config is not None else ConfigLoader().load()
+        audio_settings = config.get('audio_settings', {})
+        self.text_file = text_file
+        self.name = os.path.splitext(os.path.basename(text_file))[0]
+        base_dir = recordings_base_dir or config.get('file_settings', {}).get('output_directory', './recordings')
+        self.project_dir = os.path.join(base_dir, self.name)
+        self.speaker = speaker or config.get('recording_settings', {}).get('speaker') or None
+        # 说话人和工位会作为目录名和文件名使用
+        for label, value in (('说话人', self.speaker), ('工位', station)):
+            if value and not is_valid_speaker(value):
+                raise ValueError(f"{label}名称无效：{value}")
+        self.station = station
+        self.recordings_dir = speaker_directory(self.project_dir, self.speaker)
+        self.progress_file = progress_file_path(self.recordings_dir, station)
+        self.progress_store = ProgressStore(self.progress_file)
+        self.audio_format = normalize_audio_format(audio_settings.get('audio_format', 'WAV'))
+        self.sample_rate = audio_settings.get('sample_rate', 16000)
+        self.channels = audio_settings.get('channels', 1)
+        self.bit_depth = audio_settings.get('bit_depth', 16)
+        self.keep_takes = config.get('recording_settings', {}).get('keep_takes', True)
+        self.session = ProjectSession(text_file, self.recordings_dir).open()
+        self._take_store = None
+
+    @property
+    def records(self):
+        """条目列表 [{'id', 'text'}]，按文本文件顺序"""
+        return self.session.records
+
+    def __len__(self):
+        return len(self.session.records)
+
+    def refresh(self):
+        """重新检查文本文件和录音目录（其他程序修改后调用）"""
+        self.session.open()
+        return self
+
+    # ---- 目录 ----
+
+    def ensure_directories(self):
+        """创建录音目录并登记说话人"""
+        os.makedirs(self.recordings_dir, exist_ok=True)
+        if self.speaker:
+            register_speaker(self.project_dir, self.speaker)
+
+    # ---- 进度 ----
+
+    def load_progress(self):
+        """读取进度文件中的位置（按条目 id，限制在有效范围内），没有可用的进度时自动检测"""
+        data = self.progress_store.load()
+        if data is None:
+            return self.detect_current_progress()
+        index = self.index_of(data['current_id']) if data['current_id'] else None
+        if index is None:
+            index = data['current_index']
+        return max(0, min(index, len(self.records) - 1))
+
+    def save_progress(self, current_index):
+        """保存进度"""
+        self.ensure_directories()
+        current_id = self.records[current_index]['id'] if 0 <= current_index < len(self.records) else None
+        self.progress_store.save(current_index, current_id, self.name, self.text_file, len(self.records))
+
+    def detect_current_progress(self):
+        """第一个未录制条目的位置"""
+        return self.session.first_missing_index()
+
+    # ---- 录音 ----
+
+    def index_of(self, record_id):
+        """条目 id 对应的位置，不存在时返回 None"""
+        return self.session.index_of(record_id)
+
+    def is_recorded(self, record_id):
+        return self.session.is_recorded(record_id)
+
+    def audio_path(self, record_id):
+        """条目的录音路径（未录制时为按配置格式保存的路径）"""
+        return self.session.audio_path(record_id, audio_extension(self.audio_format))
+
+    def status(self, record_ids=None):
+        """批量查询是否已录制，返回 {条目 id: bool}"""
+        recorded = self.session.recorded_files
+        if record_ids is None:
+            record_ids = [record['id'] for record in self.records]
+        return {record_id: record_id in recorded for record_id in record_ids}
+
+    def recorded_mask(self):
+        """与条目表对齐的布尔数组"""
+        import numpy as np
+
+        recorded = self.session.recorded_files
+        return np.fromiter((record['id'] in recorded for record in self.records), dtype=bool, count=len(self))
+
+    def iter_takes(self):
+        """按文本顺序遍历已录制的条目，产生 (位置, 条目, 录音路径)"""
+        recorded = self.session.recorded_files
+        for index, record in enumerate(self.records):
+            filename = recorded.get(record['id'])
+            if filename:
+                yield index, record, os.path.join(self.recordings_dir, filename)
+
+    def durations(self):
+        """与条目表对齐的录音时长数组（秒），未录制为 NaN；时长按文件缓存在 .durations.json"""
+        import numpy as np
+
+        if not os.path.isdir(self.recordings_dir):
+            return np.full(len(self), np.nan)
+        files, chosen = scan_audio_durations(self.recordings_dir)
+        return np.array([files[chosen[record['id']]][2] if record['id'] in chosen else np.nan
+                         for record in self.records], dtype=float)
+
+    def stats(self, short_seconds=1.0):
+        """项目统计：条数、时长分布、过短录音数、语速（每秒字数）"""
+        import numpy as np
+
+        durations = self.durations()
+        recorded = ~np.isnan(durations)
+        taken = durations[recorded]
+        lengths = np.array([len(record['text']) for record in self.records], dtype=float)
+        rates = lengths[recorded] / np.where(taken > 0, taken, np.nan)
+        stats = {
+            'total': len(self),
+            'recorded': int(recorded.sum()),
+            'missing': int((~recorded).sum()),
+            'total_duration': float(taken.sum()),
+            'short_takes': int((taken < short_seconds).sum()),
+        }
+        if taken.size:
+            p5, median, p95 = np.percentile(taken, [5, 50, 95])
+            stats.update({
+                'mean_duration': float(taken.mean()),
+                'median_duration': float(median),
+                'min_duration': float(taken.min()),
+                'max_duration': float(taken.max()),
+                'p5_duration': float(p5),
+                'p95_duration': float(p95),
+                'chars_per_second': float(np.nanmean(rates)) if np.isfinite(rates).any() else None,
+            })
+        return stats
+
+    def take_store(self):
+        """录音目录的版本管理"""
+        if self._take_store is None:
+            self._take_store = TakeStore(self.recordings_dir)
+        return self._take_store
+
+    def save_audio(self, record_id, data, sample_rate=None):
+        """保存一条录音（(帧数, 声道数) 或一维的 numpy 数组），返回文件路径
+
+        与桌面程序相同：已有录音时保留为历史版本，并删除该条目其他格式的旧录音
+        """
+        if self.index_of(record_id) is None:
+            raise KeyError(f"项目中没有条目 {record_id}")
+        self.ensure_directories()
+        extension = audio_extension(self.audio_format)
+        temp_path = os.path.join(self.recordings_dir, record_id + extension + '.tmp')
+        write_audio(temp_path, data, sample_rate or self.sample_rate, self.audio_format, self.bit_depth)
+        with replacing_take(self.recordings_dir, record_id, extension,
+                            self.take_store() if self.keep_takes else None) as path:
+            os.replace(temp_path, path)
+        self.session.mark_recorded(record_id, os.path.basename(path))
+        return path
@@ -0,0 +1,467 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+音频格式、转码与重采样
+- 保存格式（WAV/FLAC）的选择，以及把已有 WAV 无损转换为 FLAC 的后台队列
+- 设备原生采样率/声道与配置不一致时的流式重采样和声道转换
+- 多麦克风/多设备同时采集，按声道拆分保存
+numpy 和 soundfile 只在实际处理音频时加载
+"""
+
+import functools
+import math
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# 保存格式 → (扩展名, soundfile 格式名)
+AUDIO_FORMATS = {
+    'WAV': ('.wav', 'WAV'),
+    'FLAC': ('.flac', 'FLAC'),
+}
+# 位深 → soundfile 子类型；WAV 的 8 位只能是无符号，FLAC 的 8 位只能是有符号，FLAC 不支持 32 位整数
+BIT_DEPTH_SUBTYPES = {8: 'PCM_U8', 16: 'PCM_16', 24: 'PCM_24', 32: 'PCM_32'}
+FLAC_SUBTYPES = ('PCM_S8', 'PCM_16', 'PCM_24')
+
+
+def normalize_audio_format(audio_format):
+    """规范化配置中的保存格式，不支持时回退为 WAV"""
+    audio_format = str(audio_format or 'WAV').upper()
+    return audio_format if audio_format in AUDIO_FORMATS else 'WAV'
+
+
+def audio_extension(audio_format):
+    """保存格式对应的扩展名"""
+    return AUDIO_FORMATS[normalize_audio_format(audio_format)][0]
+
+
+def audio_subtype(audio_format, bit_depth):
+    """保存格式和位深对应的 soundfile 子类型"""
+    subtype = BIT_DEPTH_SUBTYPES.get(bit_depth, 'PCM_16')
+    if normalize_audio_format(audio_format) == 'FLAC':
+        if subtype == 'PCM_U8':
+            subtype = 'PCM_S8'
+        elif subtype not in FLAC_SUBTYPES:
+            subtype = 'PCM_24'
+    return subtype
+
+
+def write_audio(path, data, sample_rate, audio_format='WAV', bit_depth=16):
+    """按配置的格式保存音频"""
+    import soundfile as sf
+
+    audio_format = normalize_audio_format(audio_format)
+    sf.write(path, data, sample_rate, format=AUDIO_FORMATS[audio_format][1],
+             subtype=audio_subtype(audio_format, bit_depth))
+
+
+def transcode_to_flac(wav_path):
+    """把 WAV 无损转换为 FLAC，校验采样完全一致后删除原文件
+
+    返回 (FLAC 文件名, 错误信息)，成功时错误信息为 None
+    """
+    import numpy as np
+    import soundfile as sf
+
+    flac_path = os.path.splitext(wav_path)[0] + '.flac'
+    temp_path = flac_path + '.tmp'
+    try:
+        before = os.stat(wav_path)
+        info = sf.info(wav_path)
+        # 8 位 WAV 是无符号的，FLAC 中保存为有符号 8 位，读出的采样值相同
+        subtype = 'PCM_S8' if info.subtype == 'PCM_U8' else info.subtype
+        if subtype not in FLAC_SUBTYPES:
+            return None, f"FLAC 不支持 {info.subtype} 格式"
+        dtype = 'int16' if subtype in ('PCM_S8', 'PCM_16') else 'int32'
+        original, sample_rate = sf.read(wav_path, dtype=dtype, always_2d=True)
+
+        sf.write(temp_path, original, sample_rate, format='FLAC', subtype=subtype)
+        decoded, decoded_rate = sf.read(temp_path, dtype=dtype, always_2d=True)
+        if decoded_rate != sample_rate or not np.array_equal(original, decoded):
+            os.remove(temp_path)
+            return None, "校验失败：转码结果与原始音频不一致"
+
+        after = os.stat(wav_path)
+        if (after.st_size, after.st_mtime_ns) != (before.st_size, before.st_mtime_ns):
+            # 转码期间重新录制为 WAV：保留新录音，放弃按旧录音转出的 FLAC
+            os.remove(temp_path)
+            return None, "转码期间录音被重新录制，已跳过"
+        if os.path.exists(flac_path):
+            # 转码期间已经重新录制为 FLAC，原 WAV 已过期
+            os.remove(temp_path)
+        else:
+            os.replace(temp_path, flac_path)
+        os.remove(wav_path)
+        return os.path.basename(flac_path), None
+    except Exception as e:
+        if os.path.exists(temp_path):
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+        return None, str(e)
+
+
+class TranscodeQueue:
+    """后台转码队列：用进程池把 WAV 转换为 FLAC，完成后通过回调更新索引"""
+
+    def __init__(self, workers=None):
+        self.workers = workers
+        self.thread = None
+        self.cancelled = threading.Event()
+
+    def is_running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self, jobs, on_done=None, on_progress=None, on_finished=None):
+        """开始转码
+
+        jobs 为 (条目 id, WAV 路径) 列表；回调在后台线程中调用：
+        on_done(条目 id, FLAC 文件名)、on_progress(完成数, 总数)、on_finished(成功数, 失败列表)
+        """
+        if self.is_running():
+            raise RuntimeError("转码正在进行中")
+        self.cancelled.clear()
+        self.thread = threading.Thread(target=self._run, args=(list(jobs), on_done, on_progress, on_finished),
+                                       daemon=True)
+        self.thread.start()
+
+    def cancel(self):
+        """取消尚未开始的转码任务"""
+        self.cancelled.set()
+
+    def _run(self, jobs, on_done, on_progress, on_finished):
+        converted = 0
+        failures = []
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=self.workers, mp_context=context) as executor:
+            futures = [(record_id, executor.submit(transcode_to_flac, path)) for record_id, path in jobs]
+            for done, (record_id, future) in enumerate(futures, 1):
+                if self.cancelled.is_set() and future.cancel():
+                    continue  # 已经开始的任务仍需等待结果，以便更新索引
+                try:
+                    filename, error = future.result()
+                except Exception as e:
+                    filename, error = None, str(e)
+                if error is None:
+                    converted += 1
+                    if on_done:
+                        on_done(record_id, filename)
+                else:
+                    failures.append((record_id, error))
+                if on_progress:
+                    on_progress(done, len(futures))
+        if on_finished:
+            on_finished(converted, failures)
+
+
+# 重采样滤波器每侧的过零点数，越大过渡带越窄
+RESAMPLER_ZERO_CROSSINGS = 16
+RESAMPLER_KAISER_BETA = 8.6
+
+
+@functools.lru_cache(maxsize=16)
+def polyphase_filter(up, down):
+    """设计并缓存 up/down 重采样用的多相低通滤波器
+
+    返回形状为 (up, taps) 的矩阵，第 p 行是第 p 相的系数（已按输入下标倒序排列）
+    """
+    import numpy as np
+
+    cutoff = 0.5 / max(up, down)  # 相对于上采样后采样率的截止频率
+    half_length = RESAMPLER_ZERO_CROSSINGS * max(up, down)
+    taps = int(math.ceil((2 * half_length + 1) / up))
+    length = taps * up
+    m = np.arange(length) - (2 * half_length) / 2.0
+    h = 2 * cutoff * np.sinc(2 * cutoff * m) * up
+    h *= np.kaiser(length, RESAMPLER_KAISER_BETA)
+    h[2 * half_length + 1:] = 0.0  # 补齐到 up 的整数倍
+    # h[p + k*up] 作用于输入 x[i - k]
+    phases = h.reshape(taps, up).T.astype(np.float32)
+    phases.setflags(write=False)
+    return phases
+
+
+class StreamResampler:
+    """流式多相重采样器，可按任意大小的块输入，输出与一次性处理结果一致"""
+
+    def __init__(self, input_rate, output_rate, channels=1):
+        import numpy as np
+
+        divisor = math.gcd(int(input_rate), int(output_rate))
+        self.up = int(output_rate) // divisor
+        self.down = int(input_rate) // divisor
+        self.channels = channels
+        self.passthrough = self.up == self.down
+        if self.passthrough:
+            return
+        self.phases = polyphase_filter(self.up, self.down)
+        self.taps = self.phases.shape[1]
+        # 滤波器群延迟（输出采样数），开头丢弃这部分使输出与输入对齐
+        self.delay = int(round(RESAMPLER_ZERO_CROSSINGS * max(self.up, self.down) / self.down))
+        self.history = np.zeros((self.taps - 1, channels), dtype=np.float32)
+        self.start = -(self.taps - 1)  # history 第一个采样的绝对下标
+        self.next_output = 0
+        self.input_count = 0
+        self.skip = self.delay
+
+    def process(self, block):
+        """处理一块 (帧数, 声道数) 的输入，返回对应的输出"""
+        import numpy as np
+
+        block = np.asarray(block, dtype=np.float32).reshape(-1, self.channels)
+        if self.passthrough:
+            return block
+        self.input_count += len(block)
+        buffer = np.concatenate((self.history, block), axis=0)
+        end = self.start + len(buffer)
+
+        # 满足 n*down < end*up 的输出都可以计算
+        last = -(-end * self.up // self.down)
+        n = np.arange(self.next_output, last, dtype=np.int64)
+        output = np.empty((0, self.channels), dtype=np.float32)
+        if len(n):
+            position = n * self.down
+            phase = position % self.up
+            index = position // self.up - self.start
+            # 每个输出需要的输入下标：index, index-1, ..., index-taps+1
+            gather = index[:, None] - np.arange(self.taps)[None, :]
+            coefficients = self.phases[phase]
+            output = np.einsum('nk,nkc->nc', coefficients, buffer[gather])
+            self.next_output = last
+
+        self.history = buffer[len(buffer) - (self.taps - 1):]
+        self.start = end - (self.taps - 1)
+
+        if self.skip:
+            dropped = min(self.skip, len(output))
+            output = output[dropped:]
+            self.skip -= dropped
+        return output
+
+    def flush(self):
+        """输入结束后补零，输出滤波器中剩余的采样"""
+        import numpy as np
+
+        if self.passthrough:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        expected = -(-self.input_count * self.up // self.down)
+        produced = self.next_output - self.delay
+        padding = np.zeros((self.taps, self.channels), dtype=np.float32)
+        output = self.process(padding)
+        self.input_count -= len(padding)
+        return output[:max(0, expected - produced)]
+
+
+def mix_channels(block, output_channels):
+    """声道转换：多声道转单声道取平均，其他情况截取或复制声道"""
+    import numpy as np
+
+    input_channels = block.shape[1]
+    if input_channels == output_channels:
+        return block
+    if output_channels == 1:
+        return block.mean(axis=1, keepdims=True, dtype=np.float32)
+    if input_channels == 1:
+        return np.repeat(block, output_channels, axis=1)
+    if input_channels > output_channels:
+        return block[:, :output_channels]
+    # 声道不足时重复最后一个声道
+    extra = np.repeat(block[:, -1:], output_channels - input_channels, axis=1)
+    return np.concatenate((block, extra), axis=1)
+
+
+class AudioConverter:
+    """把设备原生格式的输入流转换为配置的采样率和声道数"""
+
+    def __init__(self, input_rate, input_channels, output_rate, output_channels):
+        self.input_rate = input_rate
+        self.input_channels = input_channels
+        self.output_rate = output_rate
+        self.output_channels = output_channels
+        # 先转换声道再重采样，减少需要滤波的声道数
+        self.resampler = StreamResampler(input_rate, output_rate, output_channels)
+
+    @property
+    def passthrough(self):
+        return self.input_channels == self.output_channels and self.resampler.passthrough
+
+    def process(self, block):
+        """转换一块 float32 输入"""
+        import numpy as np
+
+        block = np.asarray(block, dtype=np.float32).reshape(-1, self.input_channels)
+        return self.resampler.process(mix_channels(block, self.output_channels))
+
+    def flush(self):
+        """输出剩余采样"""
+        return self.resampler.flush()
+
+    def process_int16(self, data):
+        """转换 16 位整数 PCM 字节（pyaudio），返回 16 位 PCM 字节"""
+        import numpy as np
+
+        block = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
+        return float_to_int16_bytes(self.process(block))
+
+    def flush_int16(self):
+        """输出剩余采样（16 位 PCM 字节）"""
+        return float_to_int16_bytes(self.flush())
+
+
+def float_to_int16_bytes(block):
+    """float32 采样转换为 16 位 PCM 字节"""
+    import numpy as np
+
+    return (np.clip(block, -1.0, 1.0) * 32767.0).astype(np.int16).tobytes()
+
+
+def microphone_names(microphones, channels):
+    """每个声道对应的麦克风名称，未配置的声道命名为 ch2、ch3 ..."""
+    names = [str(name) for name in (microphones or [])][:channels]
+    return names + [f"ch{i + 1}" for i in range(len(names), channels)]
+
+
+def write_channel_files(directory, record_id, data, sample_rate, microphones=None,
+                        audio_format='WAV', bit_depth=16):
+    """把多声道录音按麦克风拆分保存
+
+    第一个声道保存为 <目录>/<id>.<扩展名>（索引、导出都使用它），
+    其余声道保存到 <目录>/<麦克风名>/<id>.<扩展名>。
+    各声道都是 data 的列视图，不复制采样。返回全部文件路径（第一个为主声道）
+    """
+    extension = audio_extension(audio_format)
+    names = microphone_names(microphones, data.shape[1])
+    paths = []
+    for channel, name in enumerate(names):
+        channel_dir = directory if channel == 0 else os.path.join(directory, name)
+        os.makedirs(channel_dir, exist_ok=True)
+        path = os.path.join(channel_dir, record_id + extension)
+        # 其他格式的旧录音由调用方（recorder_takes.replacing_take）清理
+        write_audio(path, data[:, channel], sample_rate, audio_format, bit_depth)
+        paths.append(path)
+    return paths
+
+
+def align_streams(streams, start_times, sample_rate, end_times=None):
+    """对齐多个设备分别采集的音频，合并为一个 (帧数, 总声道数) 的数组
+
+    streams 为各设备的 (帧数, 声道数) 数组，start_times / end_times 为各设备第一个采样和最后一个采样之后的
+    ADC 时间（秒）。各设备是依次启动、依次停止的，先按开始和结束时间把每个设备裁到共同的时间段，
+    裁剪时按该设备实际的采样数与经过时间之比换算；此时各设备覆盖同样长的时间，
+    剩下的长度差才是时钟漂移，再把其他设备线性伸缩到第一个设备的长度
+    """
+    import numpy as np
+
+    latest = max(start_times)
+    earliest_end = min(end_times) if end_times else None
+    trimmed = []
+    for index, (stream, start) in enumerate(zip(streams, start_times)):
+        rate = sample_rate
+        tail = 0
+        if earliest_end is not None:
+            elapsed = end_times[index] - start
+            if elapsed > 0 and len(stream):
+                rate = len(stream) / elapsed
+            tail = max(0, int(round((end_times[index] - earliest_end) * rate)))
+        head = min(len(stream), max(0, int(round((latest - start) * rate))))
+        trimmed.append(stream[head:max(head, len(stream) - tail)])
+    length = len(trimmed[0])
+    output = np.empty((length, sum(stream.shape[1] for stream in trimmed)), dtype=np.float32)
+    column = 0
+    for stream in trimmed:
+        channels = stream.shape[1]
+        if len(stream) == length:
+            output[:, column:column + channels] = stream
+        elif len(stream) == 0:
+            output[:, column:column + channels] = 0.0
+        else:
+            # 时钟漂移通常只有百万分之几十，线性插值足够
+            positions = np.linspace(0, len(stream) - 1, length)
+            for channel in range(channels):
+                output[:, column + channel] = np.interp(positions, np.arange(len(stream)), stream[:, channel])
+        column += channels
+    return output
+
+
+class MultiDeviceCapture:
+    """同时从多个输入设备采集，停止后按开始和结束时间对齐并补偿时钟漂移
+
+    devices 中每一项为设备编号/名称，或 {"device": 编号或名称, "channels": 声道数}
+    """
+
+    def __init__(self, devices, sample_rate):
+        self.sample_rate = sample_rate
+        self.devices = []
+        for device in devices:
+            if isinstance(device, dict):
+                self.devices.append((device.get('device'), int(device.get('channels', 1))))
+            else:
+                self.devices.append((device, 1))
+        self.streams = []
+        self.blocks = []
+        self.start_times = []
+        self.end_times = []
+        self.converters = []
+
+    @property
+    def channels(self):
+        return sum(channels for _, channels in self.devices)
+
+    def start(self):
+        """打开并启动全部设备的输入流"""
+        import sounddevice as sd
+
+        for index, (device, channels) in enumerate(self.devices):
+            try:
+                sd.check_input_settings(device=device, samplerate=self.sample_rate,
+                                        channels=channels, dtype='float32')
+                rate, converter = self.sample_rate, None
+            except Exception:
+                rate = int(sd.query_devices(device, 'input')['default_samplerate'])
+                converter = AudioConverter(rate, channels, self.sample_rate, channels)
+            self.blocks.append([])
+            self.start_times.append(None)
+            self.end_times.append(None)
+            self.converters.append(converter)
+            stream = sd.InputStream(device=device, samplerate=rate, channels=channels,
+                                    dtype='float32', callback=self._callback(index, rate))
+            self.streams.append(stream)
+        for stream in self.streams:
+            stream.start()
+
+    def _callback(self, index, rate):
+        converter = self.converters[index]
+
+        def callback(indata, frames, time_info, status):
+            if status:
+                print(f"Audio callback status: {status}")
+            # ADC 时间不可用时退回到流时间
+            adc_time = time_info.inputBufferAdcTime or self.streams[index].time
+            if self.start_times[index] is None:
+                self.start_times[index] = adc_time
+            self.end_times[index] = adc_time + frames / rate
+            self.blocks[index].append(converter.process(indata) if converter is not None else indata.copy())
+        return callback
+
+    def stop(self):
+        """停止采集，返回对齐后的多声道数组"""
+        import numpy as np
+
+        for stream in self.streams:
+            stream.stop()
+            stream.close()
+        streams = []
+        for index, (_, channels) in enumerate(self.devices):
+            blocks = self.blocks[index]
+            if self.converters[index] is not None:
+                blocks.append(self.converters[index].flush())
+            streams.append(np.concatenate(blocks, axis=0) if blocks
+                           else np.zeros((0, channels), dtype=np.float32))
+        start_times = [start if start is not None else 0.0 for start in self.start_times]
+        end_times = None
+        if all(end is not None for end in self.end_times):
+            end_times = self.end_times
+        self.streams = []
+        return align_streams(streams, start_times, self.sample_rate, end_times)
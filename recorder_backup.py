@@ -0,0 +1,291 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+备份与校验
+- 项目目录的 manifest.json 记录每个录音文件 PCM 数据的哈希（解码为统一的 32 位整数采样后计算，
+  与文件头、WAV/FLAC 格式无关），文件大小和修改时间未变时直接复用；内容核对、审听结论也记录在其中，
+  所有读-改-写都通过 modify_manifest() 在同一把锁内重新读取后合并，互不覆盖
+- 备份目录是按哈希寻址的对象库：objects/<前两位>/<哈希>，相同的录音（包括转码前后的 WAV 和 FLAC）只保存一份，
+  对象保存第一次备份时的原始文件，格式由文件头识别；
+  projects/<项目>/manifest.json 记录项目快照，元数据 JSON 原样复制到 projects/<项目>/meta/
+- 增量备份只复制对象库中还没有的录音，读写用线程池并行
+- 校验：快速模式只检查对象是否存在、大小是否一致；完整模式重新计算哈希
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from recorder_project import load_json_file, split_audio_name, write_json_atomic
+
+MANIFEST_FILE_NAME = 'manifest.json'
+OBJECTS_DIR_NAME = 'objects'
+PROJECTS_DIR_NAME = 'projects'
+HASH_BLOCK_FRAMES = 65536
+# 哈希算法变化时递增，manifest.json 中旧版本的哈希全部重新计算
+HASH_VERSION = 2
+DEFAULT_WORKERS = 8
+
+
+def payload_hash(path):
+    """录音采样数据的哈希（blake2b）
+
+    任何格式都先解码再计算：整数 PCM 统一为满量程的 32 位整数（8/16/24 位的采样左移对齐），
+    浮点采样为 32 位浮点；只包含采样率、声道数和采样值，不包含文件头的其他内容，
+    因此同样的录音保存为 WAV 或 FLAC 时哈希相同
+    """
+    import soundfile as sf
+
+    info = sf.info(path)
+    dtype = 'int32' if info.subtype.startswith('PCM') else 'float32'
+    digest = hashlib.blake2b(digest_size=32)
+    digest.update(f"{info.samplerate}:{info.channels}:{dtype}".encode())
+    for block in sf.blocks(path, blocksize=HASH_BLOCK_FRAMES, dtype=dtype, always_2d=True):
+        digest.update(block.astype('<' + block.dtype.str[1:], copy=False).tobytes())
+    return digest.hexdigest()
+
+
+_manifest_locks = {}
+_manifest_locks_guard = threading.Lock()
+
+
+def manifest_lock(project_dir):
+    """项目 manifest.json 的读-改-写锁（备份、内容核对、审听结论共用）"""
+    key = os.path.abspath(os.path.join(project_dir, MANIFEST_FILE_NAME))
+    with _manifest_locks_guard:
+        return _manifest_locks.setdefault(key, threading.RLock())
+
+
+def modify_manifest(project_dir, update):
+    """在锁内重新读取 manifest.json，由 update(manifest) 原地修改后写回，返回修改后的内容
+
+    update 返回 False 时不写回；耗时的计算应在调用之前完成，锁内只做合并
+    """
+    manifest_path = os.path.join(project_dir, MANIFEST_FILE_NAME)
+    with manifest_lock(project_dir):
+        manifest = load_json_file(manifest_path, {})
+        if not isinstance(manifest, dict):
+            manifest = {}
+        if update(manifest) is not False:
+            write_json_atomic(manifest_path, manifest, indent=1)
+        return manifest
+
+
+def walk_project(project_dir):
+    """列出项目中的录音文件和元数据 JSON（相对路径），跳过隐藏目录"""
+    audio_files = []
+    meta_files = []
+    for root, dirs, files in os.walk(project_dir):
+        dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+        for name in sorted(files):
+            relative = os.path.relpath(os.path.join(root, name), project_dir).replace(os.sep, '/')
+            if split_audio_name(name) is not None:
+                audio_files.append(relative)
+            elif name.endswith('.json') and not name.startswith('.') and relative != MANIFEST_FILE_NAME:
+                meta_files.append(relative)
+    return audio_files, meta_files
+
+
+def update_manifest(project_dir, workers=DEFAULT_WORKERS, progress=None):
+    """更新项目 manifest.json 中的校验和，只重新计算大小或修改时间变化的文件"""
+    manifest_path = os.path.join(project_dir, MANIFEST_FILE_NAME)
+    manifest = load_json_file(manifest_path, {})
+    old_files = manifest.get('files', {}) if isinstance(manifest, dict) else {}
+    if not isinstance(manifest, dict) or manifest.get('hash_version') != HASH_VERSION:
+        old_files = {}
+    audio_files, meta_files = walk_project(project_dir)
+
+    files = {}
+    pending = []
+    for relative in audio_files:
+        stat = os.stat(os.path.join(project_dir, relative))
+        old = old_files.get(relative)
+        if old and old.get('size') == stat.st_size and old.get('mtime') == stat.st_mtime:
+            files[relative] = old
+        else:
+            files[relative] = {'size': stat.st_size, 'mtime': stat.st_mtime, 'hash': None}
+            pending.append(relative)
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        paths = [os.path.join(project_dir, relative) for relative in pending]
+        for done, (relative, digest) in enumerate(zip(pending, executor.map(payload_hash, paths)), 1):
+            files[relative]['hash'] = digest
+            if progress:
+                progress(done, len(pending))
+
+    # 计算哈希期间其他模块可能写入了 manifest（如审听结论），重新读取后只替换文件列表
+    def merge(current):
+        changed = files != current.get('files') or meta_files != current.get('meta') \
+            or current.get('hash_version') != HASH_VERSION or not os.path.exists(manifest_path)
+        current.update(files=files, meta=meta_files, hash_version=HASH_VERSION)
+        if changed or 'updated' not in current:
+            current['updated'] = time.strftime('%Y-%m-%d %H:%M:%S')
+            return True
+        return False
+
+    return modify_manifest(project_dir, merge)
+
+
+def object_path(backup_dir, digest):
+    """对象库中的文件路径（只由哈希决定，与录音的格式无关）"""
+    return os.path.join(backup_dir, OBJECTS_DIR_NAME, digest[:2], digest)
+
+
+def snapshot_object_path(backup_dir, entry, relative):
+    """快照中一个文件对应的对象；旧版本的快照没有记录对象，对象名带有录音的扩展名"""
+    if 'object' in entry:
+        return os.path.join(backup_dir, *entry['object'].split('/'))
+    return object_path(backup_dir, entry['hash']) + os.path.splitext(relative)[1]
+
+
+def copy_file(source, target):
+    """复制到临时文件再替换，避免留下不完整的对象"""
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temp = target + '.tmp'
+    shutil.copyfile(source, temp)
+    os.replace(temp, target)
+    return os.path.getsize(target)
+
+
+def backup_project(project_dir, backup_dir, workers=DEFAULT_WORKERS, progress=None):
+    """增量备份一个项目，返回统计信息"""
+    project_name = os.path.basename(os.path.normpath(project_dir))
+    manifest = update_manifest(project_dir, workers)
+
+    # 对象库中已有的录音（包括其他项目、其他工位备份的）不再复制
+    copies = {}
+    for relative, entry in manifest['files'].items():
+        target = object_path(backup_dir, entry['hash'])
+        if target not in copies and not os.path.exists(target):
+            copies[target] = os.path.join(project_dir, relative)
+
+    copied_bytes = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(copy_file, source, target) for target, source in copies.items()]
+        for done, future in enumerate(futures, 1):
+            copied_bytes += future.result()
+            if progress:
+                progress(done, len(futures))
+
+    # 快照记录对象的实际大小：相同采样数据的对象可能来自文件头不同的另一个文件
+    snapshot = {'files': {}, 'meta': manifest['meta'], 'updated': manifest['updated'], 'hash_version': HASH_VERSION}
+    for relative, entry in manifest['files'].items():
+        target = object_path(backup_dir, entry['hash'])
+        snapshot['files'][relative] = dict(entry, object_size=os.path.getsize(target),
+                                           object=os.path.relpath(target, backup_dir).replace(os.sep, '/'))
+
+    snapshot_dir = os.path.join(backup_dir, PROJECTS_DIR_NAME, project_name)
+    os.makedirs(snapshot_dir, exist_ok=True)
+    for relative in manifest['meta']:
+        copy_file(os.path.join(project_dir, relative), os.path.join(snapshot_dir, 'meta', relative))
+    write_json_atomic(os.path.join(snapshot_dir, MANIFEST_FILE_NAME), snapshot, indent=1)
+
+    return {'files': len(manifest['files']), 'copied': len(copies),
+            'deduplicated': len(manifest['files']) - len(copies), 'bytes': copied_bytes}
+
+
+def _check_object(path, size, digest, full):
+    """检查一个对象，返回错误说明，正常时返回 None"""
+    try:
+        if os.path.getsize(path) != size:
+            return '大小不一致'
+    except OSError:
+        return '缺失'
+    if full:
+        try:
+            if payload_hash(path) != digest:
+                return '校验和不一致'
+        except Exception as e:
+            return f'无法读取：{e}'
+    return None
+
+
+def check_hash_version(manifest, full):
+    """完整校验需要重新计算哈希，记录中的哈希必须是当前算法算出的"""
+    if full and manifest.get('hash_version') != HASH_VERSION:
+        raise ValueError("校验和由旧版本的算法计算，请先重新备份一次再做完整校验")
+
+
+def verify_backup(backup_dir, project_name, full=False, workers=DEFAULT_WORKERS, progress=None):
+    """校验备份中的项目快照，返回 [(相对路径, 错误说明)]"""
+    manifest = load_json_file(os.path.join(backup_dir, PROJECTS_DIR_NAME, project_name, MANIFEST_FILE_NAME), None)
+    if not isinstance(manifest, dict):
+        raise FileNotFoundError(f"备份中没有项目 {project_name}")
+    check_hash_version(manifest, full)
+    items = sorted(manifest['files'].items())
+    problems = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_check_object,
+                                   snapshot_object_path(backup_dir, entry, relative),
+                                   entry.get('object_size', entry['size']), entry['hash'], full)
+                   for relative, entry in items]
+        for done, ((relative, _), future) in enumerate(zip(items, futures), 1):
+            error = future.result()
+            if error:
+                problems.append((relative, error))
+            if progress:
+                progress(done, len(futures))
+    return problems
+
+
+def verify_project(project_dir, full=False, workers=DEFAULT_WORKERS, progress=None):
+    """按 manifest.json 校验项目目录中的录音，返回 [(相对路径, 错误说明)]"""
+    manifest = load_json_file(os.path.join(project_dir, MANIFEST_FILE_NAME), None)
+    if not isinstance(manifest, dict):
+        raise FileNotFoundError(f"项目没有 {MANIFEST_FILE_NAME}，请先备份一次")
+    check_hash_version(manifest, full)
+    items = sorted(manifest['files'].items())
+    problems = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(_check_object, os.path.join(project_dir, relative),
+                                   entry['size'], entry['hash'], full)
+                   for relative, entry in items]
+        for done, ((relative, _), future) in enumerate(zip(items, futures), 1):
+            error = future.result()
+            if error:
+                problems.append((relative, error))
+            if progress:
+                progress(done, len(futures))
+    return problems
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='备份和校验录音项目')
+    parser.add_argument('command', choices=('backup', 'verify'))
+    parser.add_argument('project_dir', help='项目录音目录（recordings/<项目>）')
+    parser.add_argument('backup_dir', nargs='?', help='备份目录；verify 时省略则校验项目目录本身')
+    parser.add_argument('--full', action='store_true', help='校验时重新计算每个文件的校验和')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS, help='并行线程数')
+    args = parser.parse_args(argv)
+
+    def progress(done, total):
+        print(f"\r📦 {done}/{total}", end='')
+
+    if args.command == 'backup':
+        if not args.backup_dir:
+            parser.error('backup 需要指定备份目录')
+        result = backup_project(args.project_dir, args.backup_dir, args.workers, progress)
+        print()
+        print(f"✅ 备份完成：{result['files']} 个录音，新复制 {result['copied']} 个"
+              f"（{result['bytes'] / 1024 / 1024:.1f} MB），{result['deduplicated']} 个已存在")
+        return 0
+
+    if args.backup_dir:
+        project_name = os.path.basename(os.path.normpath(args.project_dir))
+        problems = verify_backup(args.backup_dir, project_name, args.full, args.workers, progress)
+    else:
+        problems = verify_project(args.project_dir, args.full, args.workers, progress)
+    print()
+    for relative, error in problems:
+        print(f"❌ {relative}：{error}")
+    print(f"{'✅ 校验通过' if not problems else f'⚠️ {len(problems)} 个文件有问题'}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
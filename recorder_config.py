@@ -0,0 +1,312 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+分层配置加载
+默认值 → 共享 config.json → 用户配置 → 环境变量 → 命令行参数
+共享配置默认只读，程序内的修改只写入用户配置
+"""
+
+import argparse
+import copy
+import json
+import os
+import re
+
+from recorder_audio import AUDIO_FORMATS
+from recorder_project import file_signature, is_valid_speaker, write_json_atomic
+
+SHARED_CONFIG_FILE = 'config.json'
+USER_CONFIG_FILE = os.path.join(os.path.expanduser('~'), '.audio_tagger', 'config.json')
+ENV_PREFIX = 'AUDIO_TAGGER_'
+SUPPORTED_LANGUAGES = ('zh_CN', 'en_US')
+
+DEFAULT_CONFIG = {
+    "audio_settings": {
+        "sample_rate": 16000,
+        "channels": 1,
+        "audio_format": "WAV",
+        "bit_depth": 16,
+        "microphones": [],
+        "channel_output": "multichannel",
+        "capture_devices": []
+    },
+    "ui_settings": {
+        "window_width": 900,
+        "window_height": 700,
+        "font_family": "微软雅黑",
+        "text_font_size": 16,
+        "ui_font_size": 12,
+        "language": "zh_CN"
+    },
+    "recording_settings": {
+        "auto_save": True,
+        "confirm_next": False,
+        "show_waveform": False,
+        "enable_shortcuts": True,
+        "prompt_watch_interval_ms": 2000,
+        "prefetch_window": 3,
+        "journal_enabled": True,
+        "keep_takes": True,
+        "journal_segment_kb": 256,
+        "journal_fsync_interval_ms": 1000,
+        "speaker": "",
+        "schedule": "sequential"
+    },
+    "file_settings": {
+        "output_directory": "./recordings",
+        "backup_directory": "./backup",
+        "backup_workers": 8,
+        "create_directories": True,
+        "project_cache_size": 4,
+        "export_shard_size": 1000
+    },
+    "station_settings": {
+        "enabled": False,
+        "station_id": "",
+        "batch_size": 20,
+        "lease_seconds": 600
+    },
+    "verify_settings": {
+        "engine": "faster-whisper",
+        "model": "small",
+        "language": "zh",
+        "workers": 2,
+        "threshold": 0.8
+    },
+    "analytics_settings": {
+        "enabled": True,
+        "idle_seconds": 120
+    },
+    "review_settings": {
+        "gap_ms": 300,
+        "read_ahead": 4,
+        "batch_size": 20
+    }
+}
+
+# 命令行/环境变量中的简写选项对应的配置项
+OPTION_KEYS = {
+    'language': ('ui_settings', 'language'),
+    'output_dir': ('file_settings', 'output_directory'),
+    'sample_rate': ('audio_settings', 'sample_rate'),
+    'channels': ('audio_settings', 'channels'),
+    'speaker': ('recording_settings', 'speaker'),
+}
+
+def valid_microphones(names):
+    """麦克风名称是各声道的目录名：不能重复（不区分大小写）；chN 是未命名声道的自动名称，只能用于第 N 个声道"""
+    if not isinstance(names, list) or not all(is_valid_speaker(name) for name in names):
+        return False
+    lowered = [name.lower() for name in names]
+    return len(set(lowered)) == len(lowered) and all(
+        not re.fullmatch(r'ch\d+', name) or name == f"ch{i + 1}" for i, name in enumerate(lowered))
+
+
+# 除类型检查之外的取值校验
+VALIDATORS = {
+    ('audio_settings', 'sample_rate'): lambda v: v > 0,
+    ('audio_settings', 'channels'): lambda v: v >= 1,
+    ('audio_settings', 'bit_depth'): lambda v: v in (8, 16, 24, 32),
+    ('audio_settings', 'audio_format'): lambda v: v.upper() in AUDIO_FORMATS,
+    ('audio_settings', 'microphones'): valid_microphones,
+    ('audio_settings', 'channel_output'): lambda v: v in ('multichannel', 'split'),
+    ('audio_settings', 'capture_devices'): lambda v: isinstance(v, list) and all(
+        isinstance(x, (int, str, dict)) for x in v),
+    ('ui_settings', 'language'): lambda v: v in SUPPORTED_LANGUAGES,
+    ('recording_settings', 'prompt_watch_interval_ms'): lambda v: v >= 100,
+    ('recording_settings', 'prefetch_window'): lambda v: v >= 0,
+    ('recording_settings', 'journal_segment_kb'): lambda v: v >= 4,
+    ('recording_settings', 'journal_fsync_interval_ms'): lambda v: v >= 10,
+    ('recording_settings', 'speaker'): lambda v: v == '' or is_valid_speaker(v),
+    ('recording_settings', 'schedule'): lambda v: bool(v),
+    ('file_settings', 'output_directory'): lambda v: bool(v),
+    ('file_settings', 'project_cache_size'): lambda v: v >= 1,
+    ('file_settings', 'export_shard_size'): lambda v: v >= 1,
+    ('file_settings', 'backup_directory'): lambda v: bool(v),
+    ('file_settings', 'backup_workers'): lambda v: v >= 1,
+    ('station_settings', 'station_id'): lambda v: v == '' or is_valid_speaker(v),
+    ('station_settings', 'batch_size'): lambda v: v >= 1,
+    ('station_settings', 'lease_seconds'): lambda v: v >= 30,
+    ('verify_settings', 'engine'): lambda v: bool(v),
+    ('verify_settings', 'workers'): lambda v: v >= 1,
+    ('verify_settings', 'threshold'): lambda v: 0 <= v <= 1,
+    ('analytics_settings', 'idle_seconds'): lambda v: v > 0,
+    ('review_settings', 'gap_ms'): lambda v: v >= 0,
+    ('review_settings', 'read_ahead'): lambda v: v >= 1,
+    ('review_settings', 'batch_size'): lambda v: v >= 1,
+}
+
+_config_cache = {}
+
+
+def coerce_value(value, default):
+    """把字符串形式的值（环境变量、命令行）转换为默认值的类型"""
+    if not isinstance(value, str) or isinstance(default, str) or default is None:
+        return value
+    if isinstance(default, bool):
+        lowered = value.strip().lower()
+        if lowered in ('1', 'true', 'yes', 'on'):
+            return True
+        if lowered in ('0', 'false', 'no', 'off'):
+            return False
+        raise ValueError(value)
+    if isinstance(default, int):
+        return int(value)
+    if isinstance(default, float):
+        return float(value)
+    return value
+
+
+def validate_value(section, key, value):
+    """检查配置项类型和取值，合法时返回 True"""
+    default = DEFAULT_CONFIG.get(section, {}).get(key)
+    if default is not None:
+        if isinstance(default, bool) != isinstance(value, bool):
+            return False
+        if isinstance(default, (int, float)) and not isinstance(value, (int, float)):
+            return False
+        if isinstance(default, str) and not isinstance(value, str):
+            return False
+    validator = VALIDATORS.get((section, key))
+    try:
+        return validator is None or bool(validator(value))
+    except Exception:
+        return False
+
+
+def merge_layer(config, layer, source):
+    """把一层配置合并进来，非法的配置项保留下层的值"""
+    if not isinstance(layer, dict):
+        print(f"⚠️ 配置 {source} 格式错误，已忽略")
+        return
+    for section, values in layer.items():
+        if not isinstance(values, dict):
+            print(f"⚠️ 配置 {source} 中的 {section} 不是对象，已忽略")
+            continue
+        target = config.setdefault(section, {})
+        for key, value in values.items():
+            try:
+                value = coerce_value(value, DEFAULT_CONFIG.get(section, {}).get(key))
+            except ValueError:
+                print(f"⚠️ 配置 {source} 中 {section}.{key} 的值无效：{value!r}")
+                continue
+            if validate_value(section, key, value):
+                target[key] = value
+            else:
+                print(f"⚠️ 配置 {source} 中 {section}.{key} 的值无效：{value!r}")
+
+
+def read_config_file(path):
+    """读取配置文件，不存在时返回 None"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        print(f"⚠️ 加载配置文件 {path} 失败：{e}")
+        return None
+
+
+def environment_overrides(environ=None):
+    """读取 AUDIO_TAGGER_* 环境变量
+
+    支持简写（AUDIO_TAGGER_LANGUAGE）和完整路径（AUDIO_TAGGER_UI_SETTINGS__LANGUAGE）
+    """
+    environ = os.environ if environ is None else environ
+    overrides = {}
+    for name, value in environ.items():
+        if not name.startswith(ENV_PREFIX):
+            continue
+        option = name[len(ENV_PREFIX):].lower()
+        if option in OPTION_KEYS:
+            section, key = OPTION_KEYS[option]
+        elif '__' in option:
+            section, key = option.split('__', 1)
+        else:
+            continue
+        overrides.setdefault(section, {})[key] = value
+    return overrides
+
+
+class ConfigLoader:
+    """分层配置加载器，结果按各层文件的修改时间缓存"""
+
+    def __init__(self, shared_file=None, user_file=None, overrides=None, environ=None):
+        environ = os.environ if environ is None else environ
+        self.shared_file = shared_file or environ.get(ENV_PREFIX + 'CONFIG', SHARED_CONFIG_FILE)
+        self.user_file = user_file or environ.get(ENV_PREFIX + 'USER_CONFIG', USER_CONFIG_FILE)
+        self.env_overrides = environment_overrides(environ)
+        self.overrides = overrides or {}
+
+    def _cache_key(self):
+        return (
+            os.path.abspath(self.shared_file), file_signature(self.shared_file),
+            os.path.abspath(self.user_file), file_signature(self.user_file),
+            json.dumps(self.env_overrides, sort_keys=True),
+            json.dumps(self.overrides, sort_keys=True),
+        )
+
+    def load(self):
+        """合并所有配置层，返回可以随意修改的副本"""
+        key = self._cache_key()
+        config = _config_cache.get(key)
+        if config is None:
+            config = copy.deepcopy(DEFAULT_CONFIG)
+            for layer, source in ((read_config_file(self.shared_file), self.shared_file),
+                                  (read_config_file(self.user_file), self.user_file),
+                                  (self.env_overrides, 'environment'),
+                                  (self.overrides, 'command line')):
+                if layer is not None:
+                    merge_layer(config, layer, source)
+            _config_cache.clear()
+            _config_cache[key] = config
+        return copy.deepcopy(config)
+
+    def save_user_settings(self, updates):
+        """把修改写入用户配置（不修改共享的 config.json）"""
+        user_config = read_config_file(self.user_file)
+        if not isinstance(user_config, dict):
+            user_config = {}
+        for section, values in updates.items():
+            user_config.setdefault(section, {}).update(values)
+        directory = os.path.dirname(self.user_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        write_json_atomic(self.user_file, user_config, indent=4)
+
+
+def parse_command_line(argv=None):
+    """解析命令行参数，返回 ConfigLoader"""
+    parser = argparse.ArgumentParser(description='语音录制助手 / Audio Recorder')
+    parser.add_argument('--config', help='共享配置文件路径（默认 config.json）')
+    parser.add_argument('--user-config', help='用户配置文件路径（默认 ~/.audio_tagger/config.json）')
+    parser.add_argument('--language', choices=SUPPORTED_LANGUAGES, help='界面语言')
+    parser.add_argument('--output-dir', help='录音输出目录')
+    parser.add_argument('--sample-rate', help='采样率')
+    parser.add_argument('--channels', help='声道数')
+    parser.add_argument('--speaker', help='说话人标识，录音保存在 <项目>/<说话人>/ 下')
+    parser.add_argument('--station', help='启用多工位协同录制并指定本工位名称')
+    parser.add_argument('--set', action='append', default=[], metavar='SECTION.KEY=VALUE',
+                        help='覆盖任意配置项，可重复使用')
+    args = parser.parse_args(argv)
+
+    overrides = {}
+    for option, (section, key) in OPTION_KEYS.items():
+        value = getattr(args, option)
+        if value is not None:
+            overrides.setdefault(section, {})[key] = value
+    if args.station:
+        overrides.setdefault('station_settings', {}).update({'enabled': True, 'station_id': args.station})
+    for item in args.set:
+        name, sep, value = item.partition('=')
+        section, dot, key = name.partition('.')
+        if not sep or not dot:
+            parser.error(f"--set 参数格式应为 SECTION.KEY=VALUE：{item}")
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass  # 按字符串处理
+        overrides.setdefault(section, {})[key] = value
+
+    return ConfigLoader(shared_file=args.config, user_file=args.user_config, overrides=overrides)
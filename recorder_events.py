@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+后台任务调度
+采集、保存、索引、播放等耗时操作都作为任务提交到这里执行，界面线程不再自己创建线程：
+- 同一通道（如 'capture'、'io'、'playback'）的任务按提交顺序串行执行，互不抢占文件和设备
+- 不指定通道的任务在共享线程池中并行执行
+- 任务结果和界面更新通过队列交回界面线程，由界面线程定时调用 drain() 执行，
+  后台线程从不直接访问 Tk 控件
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_WORKERS = 4
+DRAIN_LIMIT = 200
+
+
+class EventCore:
+    """后台任务和界面回调的调度中心"""
+
+    def __init__(self, workers=DEFAULT_WORKERS):
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='recorder')
+        self._channels = {}
+        self._lock = threading.Lock()
+        self._ui_queue = queue.SimpleQueue()
+        self._closed = False
+
+    def _executor(self, channel):
+        if channel is None:
+            return self._pool
+        with self._lock:
+            executor = self._channels.get(channel)
+            if executor is None:
+                executor = self._channels[channel] = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix=f'recorder-{channel}')
+            return executor
+
+    def submit(self, func, *args, channel=None, on_done=None, on_error=None, **kwargs):
+        """提交任务，返回 Future
+
+        on_done(结果) / on_error(异常) 在界面线程中执行；没有 on_error 时异常只输出到控制台
+        """
+        future = self._executor(channel).submit(func, *args, **kwargs)
+        future.add_done_callback(lambda f: self._finished(f, on_done, on_error))
+        return future
+
+    def _finished(self, future, on_done, on_error):
+        if future.cancelled():
+            return
+        error = future.exception()
+        if error is not None:
+            if on_error is not None:
+                self.post(on_error, error)
+            else:
+                print(f"⚠️ 后台任务失败：{error}")
+        elif on_done is not None:
+            self.post(on_done, future.result())
+
+    def post(self, callback, *args):
+        """让界面线程执行 callback(*args)（任何线程都可以调用）"""
+        if not self._closed:
+            self._ui_queue.put((callback, args))
+
+    def drain(self, limit=DRAIN_LIMIT):
+        """在界面线程中执行排队的回调，每次最多 limit 个，返回执行的个数"""
+        count = 0
+        while count < limit:
+            try:
+                callback, args = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            count += 1
+            try:
+                callback(*args)
+            except Exception as e:
+                print(f"⚠️ 界面回调出错：{e}")
+        return count
+
+    def wait(self, channel, timeout=None):
+        """等待通道中已提交的任务全部完成"""
+        self._executor(channel).submit(lambda: None).result(timeout)
+
+    def shutdown(self, wait=True):
+        """停止调度；wait 为 True 时等待已提交的任务（如正在保存的录音）完成"""
+        self._closed = True
+        with self._lock:
+            executors = list(self._channels.values())
+        for executor in executors + [self._pool]:
+            executor.shutdown(wait=wait)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+数据集导出
+把项目目录中的录音和文本导出为训练用的分片归档：
+- webdataset：固定条数的 tar 分片，每个分片附带 JSONL 元数据
+- kaldi：wav.scp / text / utt2dur / utt2spk / spk2utt（FLAC 录音在 wav.scp 中写成 flac 解码管道）
+格式一致的音频直接复制原始字节，不重新编码
+"""
+
+import argparse
+import io
+import json
+import multiprocessing
+import os
+import shlex
+import tarfile
+import wave
+from concurrent.futures import ProcessPoolExecutor
+
+from recorder_project import (load_json_file, parse_prompt_file, prefer_audio_file,
+                              split_audio_name, write_json_atomic)
+
+EXPORT_FORMATS = ('webdataset', 'kaldi')
+SHARD_NAME = 'shard-{:06d}'
+# 每个分片旁边记录写入时各录音的大小和修改时间，续传时据此判断录音是否被重新录制
+SOURCES_SUFFIX = '.sources.json'
+EXPORT_INFO_FILE = 'export.json'
+
+
+def create_process_pool(workers=None):
+    """创建进程池（使用 spawn，避免在带界面线程的进程中 fork）"""
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+def collect_items(text_file, recordings_dir):
+    """按文本文件顺序列出已录制的条目 (id, text, 音频路径)"""
+    audio_files = {}
+    with os.scandir(recordings_dir) as entries:
+        for entry in entries:
+            parsed = split_audio_name(entry.name)
+            if parsed is not None and entry.is_file():
+                audio_files[parsed[0]] = prefer_audio_file(audio_files.get(parsed[0]), entry.name)
+    return [(r['id'], r['text'], os.path.join(recordings_dir, audio_files[r['id']]))
+            for r in parse_prompt_file(text_file) if r['id'] in audio_files]
+
+
+def read_wav_info(path):
+    """读取 WAV 文件头：(采样率, 声道数, 采样位数, 时长)，非 PCM WAV 返回 None"""
+    try:
+        with wave.open(path, 'rb') as wf:
+            rate = wf.getframerate()
+            return rate, wf.getnchannels(), wf.getsampwidth() * 8, wf.getnframes() / float(rate)
+    except (wave.Error, EOFError, ZeroDivisionError):
+        return None
+
+
+def load_audio_payload(path, sample_rate=None, channels=None, bit_depth=16):
+    """返回 (WAV 字节, 时长)；格式已符合要求时原样读取，否则转换为 PCM WAV"""
+    info = read_wav_info(path)
+    if info is not None:
+        rate, nchannels, bits, duration = info
+        if ((sample_rate is None or rate == sample_rate) and
+                (channels is None or nchannels == channels) and bits == bit_depth):
+            with open(path, 'rb') as f:
+                return f.read(), duration
+
+    # 需要转换时才加载 soundfile
+    import soundfile as sf
+
+    data, rate = sf.read(path, always_2d=True, dtype='float32')
+    if sample_rate is not None and rate != sample_rate:
+        raise ValueError(f"采样率不一致（{rate} Hz ≠ {sample_rate} Hz）：{path}")
+    if channels is not None and data.shape[1] != channels:
+        if channels == 1:
+            data = data.mean(axis=1, keepdims=True)
+        else:
+            raise ValueError(f"声道数不一致（{data.shape[1]} ≠ {channels}）：{path}")
+    buffer = io.BytesIO()
+    sf.write(buffer, data, rate, format='WAV', subtype=f'PCM_{bit_depth}')
+    return buffer.getvalue(), len(data) / float(rate)
+
+
+def source_stamps(items):
+    """条目录音的 {id: [大小, 修改时间（纳秒）]}"""
+    stamps = {}
+    for record_id, _, audio_path in items:
+        stat = os.stat(audio_path)
+        stamps[record_id] = [stat.st_size, stat.st_mtime_ns]
+    return stamps
+
+
+def shard_is_complete(output_dir, shard_index, items):
+    """已有分片的条目、文本以及写入时的录音大小和修改时间都与现在一致时视为已完成"""
+    name = SHARD_NAME.format(shard_index)
+    tar_path = os.path.join(output_dir, name + '.tar')
+    meta_path = os.path.join(output_dir, name + '.jsonl')
+    if not (os.path.exists(tar_path) and os.path.exists(meta_path)):
+        return False
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            entries = [json.loads(line) for line in f if line.strip()]
+        exported = [(entry['id'], entry['text']) for entry in entries]
+        stamps = load_json_file(os.path.join(output_dir, name + SOURCES_SUFFIX), None)
+        return exported == [item[:2] for item in items] and stamps == source_stamps(items)
+    except (OSError, ValueError, KeyError, TypeError):
+        return False
+
+
+def write_shard(output_dir, shard_index, items, speaker, sample_rate, channels, bit_depth):
+    """写入一个 tar 分片及其 JSONL 元数据（在工作进程中执行）"""
+    name = SHARD_NAME.format(shard_index)
+    tar_path = os.path.join(output_dir, name + '.tar')
+    meta_path = os.path.join(output_dir, name + '.jsonl')
+
+    metadata = []
+    # 在读取录音之前记录，读取期间被重新录制的条目下次会重新导出
+    stamps = source_stamps(items)
+    with tarfile.open(tar_path + '.tmp', 'w') as tar:
+        for record_id, text, audio_path in items:
+            payload, duration = load_audio_payload(audio_path, sample_rate, channels, bit_depth)
+            entry = {'id': record_id, 'text': text, 'speaker': speaker,
+                     'duration': round(duration, 3), 'shard': name + '.tar'}
+            for suffix, data in (('.wav', payload),
+                                 ('.json', json.dumps(entry, ensure_ascii=False).encode('utf-8'))):
+                member = tarfile.TarInfo(record_id + suffix)
+                member.size = len(data)
+                member.mtime = int(os.path.getmtime(audio_path))
+                tar.addfile(member, io.BytesIO(data))
+            metadata.append(entry)
+
+    with open(meta_path + '.tmp', 'w', encoding='utf-8') as f:
+        for entry in metadata:
+            f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    # 先替换 tar 和录音记录，最后替换元数据，元数据存在即代表分片完整
+    os.replace(tar_path + '.tmp', tar_path)
+    write_json_atomic(os.path.join(output_dir, name + SOURCES_SUFFIX), stamps)
+    os.replace(meta_path + '.tmp', meta_path)
+    return len(metadata)
+
+
+def read_durations(paths):
+    """读取一批音频的时长（在工作进程中执行）"""
+    durations = []
+    for path in paths:
+        info = read_wav_info(path)
+        if info is None:
+            import soundfile as sf
+            durations.append(sf.info(path).duration)
+        else:
+            durations.append(info[3])
+    return durations
+
+
+def export_webdataset(items, output_dir, speaker, shard_size=1000, workers=None,
+                      sample_rate=None, channels=None, bit_depth=16, progress=None,
+                      resume=True):
+    """导出 tar 分片，已完成的分片会被跳过（可断点续传）"""
+    shards = [items[i:i + shard_size] for i in range(0, len(items), shard_size)]
+    pending = [i for i, shard in enumerate(shards)
+               if not (resume and shard_is_complete(output_dir, i, shard))]
+    skipped = len(shards) - len(pending)
+    written = 0
+
+    # 条目减少后多余的旧分片需要删除
+    index = len(shards)
+    while os.path.exists(os.path.join(output_dir, SHARD_NAME.format(index) + '.jsonl')):
+        for suffix in ('.tar', SOURCES_SUFFIX, '.jsonl'):
+            path = os.path.join(output_dir, SHARD_NAME.format(index) + suffix)
+            if os.path.exists(path):
+                os.remove(path)
+        index += 1
+
+    with create_process_pool(workers) as executor:
+        futures = [executor.submit(write_shard, output_dir, i, shards[i], speaker,
+                                   sample_rate, channels, bit_depth) for i in pending]
+        for future in futures:
+            written += future.result()
+            if progress:
+                progress(written, sum(len(shards[i]) for i in pending))
+
+    return {'shards': len(shards), 'skipped_shards': skipped, 'written_items': written}
+
+
+def kaldi_wav_entry(path):
+    """wav.scp 中的音频：Kaldi 只能直接读取 WAV，其他格式用 flac 命令解码为 WAV 后从管道读取"""
+    if path.lower().endswith('.flac'):
+        return f"flac -c -d -s {shlex.quote(path)} |"
+    return path
+
+
+def export_kaldi(items, output_dir, speaker, workers=None, progress=None):
+    """导出 Kaldi 数据目录（只读取文件头，不复制音频）"""
+    chunk_size = 500
+    chunks = [items[i:i + chunk_size] for i in range(0, len(items), chunk_size)]
+    durations = []
+    with create_process_pool(workers) as executor:
+        for result in executor.map(read_durations, [[item[2] for item in chunk] for chunk in chunks]):
+            durations.extend(result)
+            if progress:
+                progress(len(durations), len(items))
+
+    # Kaldi 要求 utterance id 以说话人开头并按字典序排列
+    rows = sorted((f"{speaker}-{record_id}", text, os.path.abspath(path), duration)
+                  for (record_id, text, path), duration in zip(items, durations))
+    files = {
+        'wav.scp': [f"{utt} {kaldi_wav_entry(path)}" for utt, _, path, _ in rows],
+        'text': [f"{utt} {text}" for utt, text, _, _ in rows],
+        'utt2dur': [f"{utt} {duration:.3f}" for utt, _, _, duration in rows],
+        'utt2spk': [f"{utt} {speaker}" for utt, _, _, _ in rows],
+        'spk2utt': [speaker + ' ' + ' '.join(utt for utt, _, _, _ in rows)] if rows else [],
+    }
+    for name, lines in files.items():
+        path = os.path.join(output_dir, name)
+        with open(path + '.tmp', 'w', encoding='utf-8') as f:
+            f.writelines(line + '\n' for line in lines)
+        os.replace(path + '.tmp', path)
+    return {'shards': 0, 'skipped_shards': 0, 'written_items': len(rows)}
+
+
+def export_project(text_file, recordings_dir, output_dir, export_format='webdataset',
+                   shard_size=1000, workers=None, sample_rate=None, channels=None,
+                   bit_depth=16, speaker=None, progress=None):
+    """导出一个项目，返回统计信息"""
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"不支持的导出格式：{export_format}")
+    if shard_size < 1:
+        raise ValueError("分片条数必须大于 0")
+    speaker = speaker or os.path.splitext(os.path.basename(text_file))[0]
+    os.makedirs(output_dir, exist_ok=True)
+    items = collect_items(text_file, recordings_dir)
+
+    # 导出参数变化后，已有分片不能再复用
+    params = {'format': export_format, 'speaker': speaker, 'sample_rate': sample_rate,
+              'channels': channels, 'bit_depth': bit_depth,
+              'shard_size': shard_size if export_format == 'webdataset' else None}
+    previous = load_json_file(os.path.join(output_dir, EXPORT_INFO_FILE), {})
+    resume = isinstance(previous, dict) and previous.get('params') == params
+
+    if export_format == 'webdataset':
+        result = export_webdataset(items, output_dir, speaker, shard_size, workers,
+                                   sample_rate, channels, bit_depth, progress, resume)
+    else:
+        result = export_kaldi(items, output_dir, speaker, workers, progress)
+
+    result.update({'params': params, 'items': len(items),
+                   'text_file': os.path.abspath(text_file),
+                   'recordings_dir': os.path.abspath(recordings_dir)})
+    write_json_atomic(os.path.join(output_dir, EXPORT_INFO_FILE), result, indent=2)
+    return result
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='导出录音数据集')
+    parser.add_argument('text_file', help='文本文件（每行 ID 录音内容）')
+    parser.add_argument('recordings_dir', help='项目录音目录')
+    parser.add_argument('output_dir', help='导出目录')
+    parser.add_argument('--format', choices=EXPORT_FORMATS, default='webdataset')
+    parser.add_argument('--shard-size', type=int, default=1000, help='每个分片的条数')
+    parser.add_argument('--workers', type=int, default=None, help='工作进程数')
+    parser.add_argument('--sample-rate', type=int, default=None, help='要求的采样率')
+    parser.add_argument('--channels', type=int, default=None, help='要求的声道数')
+    parser.add_argument('--bit-depth', type=int, default=16, choices=(16, 24, 32))
+    parser.add_argument('--speaker', default=None, help='说话人标识（默认使用项目名）')
+    args = parser.parse_args(argv)
+
+    result = export_project(args.text_file, args.recordings_dir, args.output_dir,
+                            args.format, args.shard_size, args.workers, args.sample_rate,
+                            args.channels, args.bit_depth, args.speaker,
+                            progress=lambda done, total: print(f"\r📦 {done}/{total}", end=''))
+    print()
+    print(f"✅ 导出完成：{result['items']} 条，{result['shards']} 个分片"
+          f"（跳过 {result['skipped_shards']} 个已完成分片）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+导入已有录音
+把其他工具录制的音频文件导入项目，命名为 <条目 id>.<扩展名>：
+- 文件与条目的对应关系：默认文件名（不含扩展名）就是条目 id；也可以用正则表达式从文件名中提取
+  （命名组 id 为条目 id，命名组 index 为条目在文本中的序号，从 1 开始），或用对照表（CSV/JSON）逐个指定
+- 用进程池并行检查和转换：采样率、声道数、位深和保存格式与配置一致的文件直接复制，其余的解码后转换再保存
+- 全部文件处理完后，一次性放入录音目录并更新录音索引；已有录音的条目默认跳过，覆盖时旧录音保留为历史版本
+"""
+
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import re
+import shutil
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from recorder_audio import AUDIO_FORMATS, AudioConverter, audio_extension, audio_subtype, \
+    normalize_audio_format, write_audio
+from recorder_takes import replacing_take
+
+# 可以导入的音频格式（soundfile 能读取的常见格式）
+IMPORT_EXTENSIONS = ('.wav', '.flac', '.ogg', '.aiff', '.aif', '.mp3')
+
+
+def find_audio_files(source_dir, recursive=False):
+    """来源目录中的音频文件（按路径排序）"""
+    paths = []
+    for root, dirs, files in os.walk(source_dir):
+        paths.extend(os.path.join(root, name) for name in files
+                     if os.path.splitext(name)[1].lower() in IMPORT_EXTENSIONS)
+        if not recursive:
+            break
+        dirs.sort()
+    return sorted(paths)
+
+
+def load_mapping(path):
+    """读取文件 → 条目 id 对照表
+
+    JSON 为 {文件: id} 或 [{"file": 文件, "id": id}]；其他为 CSV/TSV 两列（文件, id），首行可以是表头。
+    文件可以写相对于来源目录的路径，也可以只写文件名
+    """
+    if path.lower().endswith('.json'):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, list):
+            data = {item['file']: item['id'] for item in data}
+        return {str(name).replace('\\', '/'): str(record_id) for name, record_id in data.items()}
+
+    with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+        sample = f.read(4096)
+        f.seek(0)
+        delimiter = '\t' if '\t' in sample else ','
+        rows = [row for row in csv.reader(f, delimiter=delimiter) if len(row) >= 2]
+    if rows and [cell.strip().lower() for cell in rows[0][:2]] == ['file', 'id']:
+        rows = rows[1:]
+    return {row[0].strip().replace('\\', '/'): row[1].strip() for row in rows}
+
+
+def plan_import(source_dir, records, recorded=(), pattern=None, mapping=None, recursive=False, overwrite=False):
+    """确定每个文件导入为哪个条目，不修改任何文件
+
+    records 为项目条目表，recorded 为已有录音的条目 id。返回 {
+        'jobs': [(条目 id, 文件路径)]  需要导入的文件,
+        'unmatched': [文件路径]  文件名不匹配或不在对照表中,
+        'unknown': [(文件路径, id)]  项目中没有该条目,
+        'duplicates': [(文件路径, id)]  与前面的文件对应同一条目（只导入第一个）,
+        'existing': [(文件路径, id)]  条目已有录音且不覆盖,
+    }
+    """
+    regex = re.compile(pattern) if pattern else None
+    ids = [record['id'] for record in records]
+    known = set(ids)
+    recorded = set(recorded)
+    plan = {'jobs': [], 'unmatched': [], 'unknown': [], 'duplicates': [], 'existing': []}
+    chosen = set()
+    for path in find_audio_files(source_dir, recursive):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if mapping is not None:
+            relative = os.path.relpath(path, source_dir).replace(os.sep, '/')
+            record_id = mapping.get(relative, mapping.get(os.path.basename(path)))
+        elif regex is not None:
+            match = regex.search(stem)
+            if match is None:
+                record_id = None
+            elif 'id' in regex.groupindex:
+                record_id = match.group('id')
+            elif 'index' in regex.groupindex:
+                number = int(match.group('index'))
+                record_id = ids[number - 1] if 1 <= number <= len(ids) else f"#{number}"
+            else:
+                record_id = match.group(0)
+        else:
+            record_id = stem
+
+        if not record_id:
+            plan['unmatched'].append(path)
+        elif record_id not in known:
+            plan['unknown'].append((path, record_id))
+        elif record_id in chosen:
+            plan['duplicates'].append((path, record_id))
+        elif record_id in recorded and not overwrite:
+            plan['existing'].append((path, record_id))
+        else:
+            chosen.add(record_id)
+            plan['jobs'].append((record_id, path))
+    return plan
+
+
+def convert_file(source, target, sample_rate, channels, bit_depth, audio_format):
+    """检查一个文件并按配置的格式保存到 target（在子进程中执行）
+
+    返回 (信息, 错误信息)：信息为 {'duration', 'converted', 'source_format'}，失败时为 None
+    """
+    import numpy as np
+    import soundfile as sf
+
+    audio_format = normalize_audio_format(audio_format)
+    subtype = audio_subtype(audio_format, bit_depth)
+    try:
+        info = sf.info(source)
+        if info.frames <= 0:
+            return None, "空录音"
+        source_format = f"{info.format}/{info.subtype} {info.samplerate}Hz {info.channels}ch"
+        matches = (info.samplerate == sample_rate and info.channels == channels
+                   and info.format == AUDIO_FORMATS[audio_format][1] and info.subtype == subtype)
+        if matches:
+            shutil.copyfile(source, target)
+        else:
+            data, rate = sf.read(source, dtype='float32', always_2d=True)
+            if rate != sample_rate or data.shape[1] != channels:
+                converter = AudioConverter(rate, data.shape[1], sample_rate, channels)
+                data = np.concatenate((converter.process(data), converter.flush()))
+            write_audio(target, np.clip(data, -1.0, 1.0), sample_rate, audio_format, bit_depth)
+        return {'duration': info.frames / float(info.samplerate), 'converted': not matches,
+                'source_format': source_format}, None
+    except Exception as e:
+        if os.path.exists(target):
+            try:
+                os.remove(target)
+            except OSError:
+                pass
+        return None, str(e)
+
+
+def import_recordings(jobs, recordings_dir, sample_rate, channels=1, bit_depth=16, audio_format='WAV',
+                      take_store=None, move=False, workers=None, progress=None):
+    """导入一批文件
+
+    jobs 为 plan_import() 的 jobs。文件先在进程池中转换为录音目录中的临时文件，全部完成后再依次改为正式文件名；
+    条目已有录音时，提供 take_store 则旧录音保留为历史版本，否则直接替换。move 为真时删除导入成功的来源文件。
+    不修改录音索引，返回结果中的 files（{条目 id: 文件名}）交给 ProjectSession.mark_recorded_many() 登记。
+    返回 {'files', 'converted', 'failures': [(条目 id, 文件路径, 错误信息)]}
+    """
+    if any(os.path.abspath(os.path.dirname(path)) == os.path.abspath(recordings_dir) for _, path in jobs):
+        raise ValueError("不能从录音目录本身导入")
+    os.makedirs(recordings_dir, exist_ok=True)
+    audio_format = normalize_audio_format(audio_format)
+    extension = audio_extension(audio_format)
+    results = {}
+    failures = []
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        futures = {executor.submit(convert_file, path, os.path.join(recordings_dir, record_id + extension + '.tmp'),
+                                   sample_rate, channels, bit_depth, audio_format): (record_id, path)
+                   for record_id, path in jobs}
+        for done, future in enumerate(as_completed(futures), 1):
+            record_id, path = futures[future]
+            try:
+                info, error = future.result()
+            except Exception as e:
+                info, error = None, str(e)
+            if error is None:
+                results[record_id] = info
+            else:
+                failures.append((record_id, path, error))
+            if progress:
+                progress(done, len(futures))
+
+    # 全部转换完成后再替换正式文件，导入中途出错不会留下一半新一半旧的录音目录
+    files = {}
+    converted = 0
+    for record_id, path in jobs:
+        if record_id not in results:
+            continue
+        filename = record_id + extension
+        try:
+            with replacing_take(recordings_dir, record_id, extension, take_store) as target:
+                os.replace(target + '.tmp', target)
+        except OSError as e:
+            failures.append((record_id, path, str(e)))
+            continue
+        files[record_id] = filename
+        converted += results[record_id]['converted']
+        if move:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+    return {'files': files, 'converted': converted, 'failures': failures}
+
+
+def main(argv=None):
+    """命令行入口"""
+    from recorder_api import Project
+    from recorder_config import ConfigLoader
+    from recorder_station import LEASE_DB_NAME, LeaseManager
+
+    parser = argparse.ArgumentParser(description='把已有的录音文件导入项目')
+    parser.add_argument('text_file', help='项目文本文件')
+    parser.add_argument('source_dir', help='要导入的录音所在目录')
+    parser.add_argument('--speaker', help='说话人')
+    parser.add_argument('--output-dir', help='录音输出目录')
+    parser.add_argument('--pattern', help='从文件名提取条目的正则表达式（命名组 id 或 index）')
+    parser.add_argument('--mapping', help='文件与条目 id 的对照表（CSV/TSV/JSON）')
+    parser.add_argument('--recursive', action='store_true', help='包括子目录')
+    parser.add_argument('--overwrite', action='store_true', help='覆盖已有录音（旧录音保留为历史版本）')
+    parser.add_argument('--move', action='store_true', help='导入成功后删除来源文件')
+    parser.add_argument('--workers', type=int, help='并行进程数')
+    parser.add_argument('--dry-run', action='store_true', help='只列出对应关系，不导入')
+    args = parser.parse_args(argv)
+
+    project = Project(args.text_file, args.output_dir, speaker=args.speaker, config=ConfigLoader().load())
+    mapping = load_mapping(args.mapping) if args.mapping else None
+    plan = plan_import(args.source_dir, project.records, project.session.recorded_files, args.pattern, mapping,
+                       args.recursive, args.overwrite)
+    for path in plan['unmatched']:
+        print(f"❔ 无法对应条目：{path}")
+    for key, label in (('unknown', '项目中没有条目'), ('duplicates', '重复'), ('existing', '已有录音，跳过')):
+        for path, record_id in plan[key]:
+            print(f"⚠️ {label} {record_id}：{path}")
+    if args.dry_run:
+        for record_id, path in plan['jobs']:
+            print(f"{path} → {record_id}")
+        print(f"📋 可导入 {len(plan['jobs'])} 个文件")
+        return 0
+    if not plan['jobs']:
+        print("没有可导入的文件")
+        return 1
+
+    project.ensure_directories()
+    result = import_recordings(plan['jobs'], project.recordings_dir, project.sample_rate, project.channels,
+                               project.bit_depth, project.audio_format,
+                               project.take_store() if project.keep_takes else None, args.move, args.workers,
+                               lambda done, total: print(f"\r📥 {done}/{total}", end=''))
+    print()
+    project.session.mark_recorded_many(result['files'])
+    if result['files'] and os.path.exists(os.path.join(project.recordings_dir, LEASE_DB_NAME)):
+        # 多工位项目：导入的条目在租约表中标记完成（完成者未知，与已有录音相同），不影响工位持有的租约
+        leases = LeaseManager(project.recordings_dir, project.station)
+        try:
+            leases.sync_records(project.records, list(result['files']))
+        finally:
+            leases.close(release=False)
+    for record_id, path, error in result['failures']:
+        print(f"❌ {record_id} {path}：{error}")
+    print(f"✅ 导入 {len(result['files'])} 条录音（其中转换格式 {result['converted']} 条），"
+          f"失败 {len(result['failures'])} 条")
+    return 1 if result['failures'] else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+崩溃恢复日志
+在项目目录的 .journal/ 中预写录制过程：
+- 正在录制的音频按固定大小的段追加到 <id>.pcm，<id>.take.json 记录采样格式
+- 进度变化追加到 journal.log（每行一个 JSON）
+写入和 fsync 都在后台线程中批量进行，不阻塞音频回调。
+程序异常退出后，下次打开项目时把未完成的录音另存到 recovered/，并恢复到最后的位置
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+import wave
+
+JOURNAL_DIR_NAME = '.journal'
+JOURNAL_LOG_NAME = 'journal.log'
+RECOVERED_DIR_NAME = 'recovered'
+DEFAULT_SEGMENT_BYTES = 256 * 1024
+DEFAULT_FSYNC_INTERVAL = 1.0
+
+# 采样类型 → 每个采样的字节数
+SAMPLE_WIDTHS = {'int16': 2, 'float32': 4}
+
+
+class TakeJournal:
+    """一个录音目录的预写日志"""
+
+    def __init__(self, recordings_dir, segment_bytes=DEFAULT_SEGMENT_BYTES,
+                 fsync_interval=DEFAULT_FSYNC_INTERVAL, station_id=None):
+        self.recordings_dir = recordings_dir
+        # 多工位共享项目目录时各工位使用自己的日志，避免恢复其他工位正在进行的录制
+        name = f"{JOURNAL_DIR_NAME}_{station_id}" if station_id else JOURNAL_DIR_NAME
+        self.directory = os.path.join(recordings_dir, name)
+        self.log_path = os.path.join(self.directory, JOURNAL_LOG_NAME)
+        self.segment_bytes = max(4096, segment_bytes)
+        self.fsync_interval = fsync_interval
+        self.take_id = None
+        self._queue = queue.Queue()
+        self._thread = None
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _paths(self, record_id):
+        base = os.path.join(self.directory, record_id)
+        return base + '.pcm', base + '.take.json'
+
+    def _start_writer(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    # ---- 写入（界面线程和音频回调调用，只把数据放入队列） ----
+
+    def log_position(self, index, record_id):
+        """记录当前位置"""
+        self._start_writer()
+        entry = {'op': 'position', 'index': index, 'id': record_id, 'time': time.time()}
+        self._queue.put(('log', json.dumps(entry, ensure_ascii=False) + '\n'))
+
+    def begin_take(self, record_id, sample_rate, channels, dtype):
+        """开始一次录制；dtype 为 'float32'（sounddevice）或 'int16'（pyaudio）"""
+        if self.take_id is not None:
+            # 上一次录制没有确认保存成功（保存失败或仍未完成），另存到 recovered/ 而不是丢弃
+            self.salvage_take(wait=False)
+        self._start_writer()
+        self.take_id = record_id
+        info = {'id': record_id, 'sample_rate': sample_rate, 'channels': channels,
+                'dtype': dtype, 'started': time.time()}
+        self._queue.put(('begin', record_id, info))
+
+    def append(self, block):
+        """追加一块录音数据（numpy 数组或字节）"""
+        if self.take_id is None:
+            return
+        data = block if isinstance(block, bytes) else block.tobytes()
+        self._queue.put(('audio', data))
+
+    def commit_take(self):
+        """录音已正常保存，删除日志中的这次录制"""
+        if self.take_id is not None:
+            self._queue.put(('end', self.take_id))
+            self.take_id = None
+
+    def discard_take(self):
+        """这次录制没有数据可保存（没有录到音频或录音流没有打开），删除日志中的这次录制"""
+        self.commit_take()
+
+    def salvage_take(self, wait=True):
+        """录音保存失败：把日志中的这次录制另存到 recovered/
+
+        wait 为真时等待写入完成并返回恢复文件路径（没有数据或失败时为 None）
+        """
+        if self.take_id is None:
+            return None
+        result = []
+        done = threading.Event() if wait else None
+        self._queue.put(('salvage', self.take_id, result, done))
+        self.take_id = None
+        if done is not None:
+            done.wait(timeout=5)
+        return result[0] if result else None
+
+    def close(self):
+        """刷新剩余数据并清空进度日志（正常退出时不需要恢复）"""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put(('close', done))
+        done.wait(timeout=5)
+        self._thread = None
+
+    # ---- 后台写入线程 ----
+
+    def _run(self):
+        log_file = open(self.log_path, 'a', encoding='utf-8')
+        take_file = None
+        buffer = bytearray()
+        dirty = False
+        last_sync = time.monotonic()
+
+        def write_segment():
+            if take_file is not None and buffer:
+                take_file.write(buffer)
+                buffer.clear()
+
+        def sync():
+            # 批量 fsync：一次同步覆盖期间写入的所有段和日志行
+            log_file.flush()
+            os.fsync(log_file.fileno())
+            if take_file is not None:
+                take_file.flush()
+                os.fsync(take_file.fileno())
+
+        while True:
+            try:
+                item = self._queue.get(timeout=self.fsync_interval)
+            except queue.Empty:
+                item = None
+
+            try:
+                if item is None:
+                    pass
+                elif item[0] == 'audio':
+                    buffer += item[1]
+                    if len(buffer) >= self.segment_bytes:
+                        write_segment()
+                        dirty = True
+                elif item[0] == 'log':
+                    log_file.write(item[1])
+                    dirty = True
+                elif item[0] == 'begin':
+                    _, record_id, info = item
+                    if take_file is not None:
+                        take_file.close()
+                    buffer.clear()
+                    pcm_path, info_path = self._paths(record_id)
+                    with open(info_path, 'w', encoding='utf-8') as f:
+                        json.dump(info, f, ensure_ascii=False)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    take_file = open(pcm_path, 'wb')
+                elif item[0] == 'end':
+                    if take_file is not None:
+                        take_file.close()
+                        take_file = None
+                    buffer.clear()
+                    for path in self._paths(item[1]):
+                        if os.path.exists(path):
+                            os.remove(path)
+                elif item[0] == 'salvage':
+                    _, record_id, result, done = item
+                    write_segment()
+                    if take_file is not None:
+                        take_file.close()
+                        take_file = None
+                    pcm_path, info_path = self._paths(record_id)
+                    try:
+                        result.append(self._salvage(record_id, pcm_path, info_path))
+                        for path in (pcm_path, info_path):
+                            if os.path.exists(path):
+                                os.remove(path)
+                    except Exception as e:
+                        # 日志文件保留，下次打开项目时再尝试恢复
+                        print(f"⚠️ 恢复录音 {record_id} 失败：{e}")
+                    finally:
+                        if done is not None:
+                            done.set()
+                elif item[0] == 'close':
+                    write_segment()
+                    if take_file is not None:
+                        sync()
+                        take_file.close()
+                    else:
+                        # 没有未完成的录制，进度已保存在进度文件中
+                        log_file.truncate(0)
+                    log_file.close()
+                    item[1].set()
+                    return
+
+                # 空闲或距上次同步超过间隔时，把未满一段的数据也写入并同步
+                now = time.monotonic()
+                if (item is None and (buffer or dirty)) or (dirty and now - last_sync >= self.fsync_interval):
+                    write_segment()
+                    sync()
+                    dirty = False
+                    last_sync = now
+            except OSError as e:
+                print(f"⚠️ 写入恢复日志失败：{e}")
+
+    # ---- 恢复 ----
+
+    def recover(self):
+        """检查上次异常退出留下的日志
+
+        返回 {'position': 最后位置的条目 id 或 None, 'salvaged': [(条目 id, 恢复文件路径)]}，
+        处理完后清空日志
+        """
+        position = None
+        if os.path.exists(self.log_path):
+            with open(self.log_path, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # 最后一行可能只写了一半
+                    if entry.get('op') == 'position':
+                        position = entry.get('id')
+
+        salvaged = []
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith('.take.json'):
+                continue
+            record_id = name[:-len('.take.json')]
+            pcm_path, info_path = self._paths(record_id)
+            try:
+                path = self._salvage(record_id, pcm_path, info_path)
+                if path is not None:
+                    salvaged.append((record_id, path))
+            except Exception as e:
+                print(f"⚠️ 恢复录音 {record_id} 失败：{e}")
+                continue
+            for path in (pcm_path, info_path):
+                if os.path.exists(path):
+                    os.remove(path)
+
+        if os.path.exists(self.log_path):
+            open(self.log_path, 'w').close()
+        return {'position': position, 'salvaged': salvaged}
+
+    def _salvage(self, record_id, pcm_path, info_path):
+        """把未完成的录音另存为 recovered/<id>_<时间>.wav，没有数据时返回 None"""
+        with open(info_path, 'r', encoding='utf-8') as f:
+            info = json.load(f)
+        if not os.path.exists(pcm_path):
+            return None
+        with open(pcm_path, 'rb') as f:
+            data = f.read()
+        frame_bytes = SAMPLE_WIDTHS[info['dtype']] * info['channels']
+        data = data[:len(data) - len(data) % frame_bytes]  # 去掉写了一半的帧
+        if not data:
+            return None
+
+        recovered_dir = os.path.join(self.recordings_dir, RECOVERED_DIR_NAME)
+        os.makedirs(recovered_dir, exist_ok=True)
+        stamp = time.strftime('%Y%m%d_%H%M%S', time.localtime(info.get('started', time.time())))
+        path = os.path.join(recovered_dir, f"{record_id}_{stamp}.wav")
+        number = 1
+        while os.path.exists(path):
+            # 同一秒内开始的多次录制（如保存失败后立即重录）不互相覆盖
+            number += 1
+            path = os.path.join(recovered_dir, f"{record_id}_{stamp}_{number}.wav")
+        if info['dtype'] == 'int16':
+            with wave.open(path, 'wb') as wf:
+                wf.setnchannels(info['channels'])
+                wf.setsampwidth(2)
+                wf.setframerate(info['sample_rate'])
+                wf.writeframes(data)
+        else:
+            import numpy as np
+            import soundfile as sf
+
+            samples = np.frombuffer(data, dtype=np.float32).reshape(-1, info['channels'])
+            sf.write(path, samples, info['sample_rate'], subtype='PCM_16')
+        return path
@@ -0,0 +1,750 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+录音项目数据模型
+与界面无关的项目会话、目录扫描与统计
+"""
+
+import json
+import os
+import shutil
+import threading
+import time
+import wave
+from collections import OrderedDict
+from difflib import SequenceMatcher
+
+PROGRESS_FILE_NAME = 'progress.json'
+PROGRESS_SCHEMA_VERSION = 2
+# 进度文件保留的备份数和轮换间隔（秒）
+PROGRESS_BACKUPS = 3
+PROGRESS_BACKUP_INTERVAL = 600
+DASHBOARD_CACHE_NAME = '.dashboard_cache.json'
+DURATION_CACHE_NAME = '.durations.json'
+PROMPT_CHANGES_FILE_NAME = 'prompt_changes.json'
+# 多说话人项目：recordings/<项目>/<说话人>/，说话人列表登记在项目目录的 speakers.json
+SPEAKERS_FILE_NAME = 'speakers.json'
+# 录音目录中程序自己使用的子目录（历史版本、恢复的录音），不能用作说话人、工位或麦克风名称；
+# 其他内部目录（.journal、.analytics）以点开头，本来就不允许
+RESERVED_DIR_NAMES = ('takes', 'recovered')
+# 按优先级排列：同一条目同时存在多种格式时（例如转码过程中）使用靠前的格式
+AUDIO_EXTENSIONS = ('.flac', '.wav')
+DEFAULT_AUDIO_EXTENSION = '.wav'
+
+
+def read_audio_duration(path):
+    """读取音频时长（秒），只解析文件头"""
+    try:
+        with wave.open(path, 'rb') as wf:
+            rate = wf.getframerate()
+            return wf.getnframes() / float(rate) if rate else 0.0
+    except Exception:
+        pass
+    # FLAC 或非 PCM 的 WAV 需要 soundfile
+    try:
+        import soundfile as sf
+        return sf.info(path).duration
+    except Exception:
+        return 0.0
+
+
+def split_audio_name(name):
+    """拆分音频文件名为 (条目 id, 扩展名)，不是音频文件时返回 None"""
+    base, ext = os.path.splitext(name)
+    ext = ext.lower()
+    return (base, ext) if ext in AUDIO_EXTENSIONS else None
+
+
+def prefer_audio_file(current, candidate):
+    """同一条目有多个音频文件时，返回优先级更高的文件名"""
+    if current is None:
+        return candidate
+    rank = AUDIO_EXTENSIONS.index
+    current_ext = os.path.splitext(current)[1].lower()
+    candidate_ext = os.path.splitext(candidate)[1].lower()
+    return candidate if rank(candidate_ext) < rank(current_ext) else current
+
+
+def load_json_file(path, default=None):
+    """读取 JSON 文件，失败时返回默认值"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception:
+        return default
+
+
+def write_json_atomic(path, data, **kwargs):
+    """先写临时文件再替换，避免读到写了一半的文件"""
+    temp_file = path + '.tmp'
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, **kwargs)
+    os.replace(temp_file, path)
+
+
+def progress_file_names(project_dir):
+    """项目目录中的进度文件（progress.json 优先）"""
+    names = sorted(name for name in os.listdir(project_dir)
+                   if name.startswith('progress_') and name.endswith('.json'))
+    if os.path.exists(os.path.join(project_dir, PROGRESS_FILE_NAME)):
+        names.insert(0, PROGRESS_FILE_NAME)
+    return names
+
+
+def progress_file_path(recordings_dir, station=None):
+    """进度文件路径：多工位模式下每个工位单独保存，避免互相覆盖"""
+    name = f'progress_{station}.json' if station else PROGRESS_FILE_NAME
+    return os.path.join(recordings_dir, name)
+
+
+def validate_progress(data):
+    """校验进度数据并升级到当前版本，无效时抛出 ValueError"""
+    if not isinstance(data, dict):
+        raise ValueError("不是 JSON 对象")
+    version = data.get('version', 1)
+    if not isinstance(version, int) or version > PROGRESS_SCHEMA_VERSION:
+        raise ValueError(f"不支持的版本 {version}")
+    index = data.get('current_index')
+    if not isinstance(index, int) or isinstance(index, bool) or index < 0:
+        raise ValueError("current_index 无效")
+    current_id = data.get('current_id')
+    if current_id is not None and not isinstance(current_id, str):
+        raise ValueError("current_id 无效")
+    total = data.get('total_records')
+    if total is not None and (not isinstance(total, int) or isinstance(total, bool) or total < 0):
+        raise ValueError("total_records 无效")
+    # 版本 1 没有 version 和 current_id 字段
+    return dict(data, version=PROGRESS_SCHEMA_VERSION, current_id=current_id)
+
+
+class ProgressStore:
+    """进度文件的读写
+
+    - 读取时只打开、解析、校验一次；主文件缺失、损坏或暂时无法读取时依次使用备份
+    - 保存时先把现有文件复制为备份（progress.json.1 ~ .N，最多每隔 backup_interval 秒轮换一次），
+      再原子替换，任何时刻主文件都是完整的
+    - 从不删除进度文件：主文件无法读取时，下次保存前另存为 progress.json.unreadable-<时间>，
+      不参与轮换，也不受轮换间隔限制
+    """
+
+    def __init__(self, path, backups=PROGRESS_BACKUPS, backup_interval=PROGRESS_BACKUP_INTERVAL):
+        self.path = path
+        self.backups = backups
+        self.backup_interval = backup_interval
+        self.source = None
+        self.problems = []
+
+    def backup_path(self, number):
+        return f"{self.path}.{number}"
+
+    def load(self):
+        """读取进度，返回校验过的数据，没有可用的进度时返回 None
+
+        self.source 为实际使用的文件，self.problems 为 [(文件, 原因)]，记录跳过的文件
+        """
+        self.source = None
+        self.problems = []
+        for path in [self.path] + [self.backup_path(n) for n in range(1, self.backups + 1)]:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = validate_progress(json.load(f))
+            except FileNotFoundError:
+                continue
+            except (OSError, ValueError) as e:
+                # JSONDecodeError 也是 ValueError
+                self.problems.append((path, str(e)))
+                continue
+            self.source = path
+            return data
+        return None
+
+    def save(self, current_index, current_id, project_name, text_file, total_records):
+        """保存进度"""
+        self.rotate()
+        write_json_atomic(self.path, {
+            'version': PROGRESS_SCHEMA_VERSION,
+            'current_index': current_index,
+            'current_id': current_id,
+            'project_name': project_name,
+            'text_file': text_file,
+            'total_records': total_records,
+            'last_updated': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }, indent=2)
+
+    def rotate(self):
+        """需要时把现有进度文件复制为最新的备份；失败不影响保存"""
+        if not os.path.exists(self.path):
+            return
+        if not self.readable(self.path):
+            self.preserve_unreadable()
+            return
+        if self.backups <= 0:
+            return
+        try:
+            newest = os.path.getmtime(self.backup_path(1))
+        except OSError:
+            newest = None
+        if newest is not None and time.time() - newest < self.backup_interval:
+            return
+        try:
+            for number in range(self.backups - 1, 0, -1):
+                if os.path.exists(self.backup_path(number)):
+                    os.replace(self.backup_path(number), self.backup_path(number + 1))
+            shutil.copy2(self.path, self.backup_path(1))
+            # copy2 保留了原文件的修改时间，改为轮换的时间
+            os.utime(self.backup_path(1))
+        except OSError as e:
+            print(f"⚠️ 备份进度文件失败：{e}")
+
+    @staticmethod
+    def readable(path):
+        """文件能否读取并通过校验"""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                validate_progress(json.load(f))
+        except (OSError, ValueError):
+            return False
+        return True
+
+    def preserve_unreadable(self):
+        """主文件即将被覆盖：无法读取的主文件另存一份（不占用备份位置，避免挤掉可用的备份）"""
+        base = f"{self.path}.unreadable-{time.strftime('%Y%m%d-%H%M%S')}"
+        target = base
+        number = 1
+        while os.path.exists(target):
+            number += 1
+            target = f"{base}-{number}"
+        try:
+            shutil.copy2(self.path, target)
+            print(f"⚠️ 进度文件无法读取，已另存为 {target}")
+        except OSError as e:
+            print(f"⚠️ 保存无法读取的进度文件失败：{e}")
+
+
+def scan_audio_durations(directory):
+    """扫描目录中的录音及其时长
+
+    返回 ({文件名: [大小, 修改时间, 时长]}, {条目 id: 文件名})。
+    时长缓存在目录的 .durations.json 中，文件大小和修改时间未变时直接复用，避免重复解析
+    """
+    duration_cache_file = os.path.join(directory, DURATION_CACHE_NAME)
+    cached_files = load_json_file(duration_cache_file, {})
+    if not isinstance(cached_files, dict):
+        cached_files = {}
+    files = {}
+    chosen = {}
+
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            parsed = split_audio_name(entry.name)
+            if parsed is None or not entry.is_file():
+                continue
+            chosen[parsed[0]] = prefer_audio_file(chosen.get(parsed[0]), entry.name)
+            stat = entry.stat()
+            old = cached_files.get(entry.name)
+            if old and old[0] == stat.st_size and old[1] == stat.st_mtime:
+                duration = old[2]
+            else:
+                duration = read_audio_duration(entry.path)
+            files[entry.name] = [stat.st_size, stat.st_mtime, duration]
+
+    if files != cached_files:
+        try:
+            write_json_atomic(duration_cache_file, files)
+        except OSError:
+            pass
+    return files, chosen
+
+
+def summarize_project(project_dir):
+    """统计单个项目的完成度、总时长和最近活动时间"""
+    files, chosen = scan_audio_durations(project_dir)
+    last_activity = max((entry[1] for entry in files.values()), default=0.0)
+
+    # 多工位模式下每个工位有自己的 progress_<工位>.json
+    progress_data = {}
+    for name in progress_file_names(project_dir):
+        progress_file = os.path.join(project_dir, name)
+        if not progress_data:
+            progress_data = ProgressStore(progress_file).load() or {}
+        last_activity = max(last_activity, os.path.getmtime(progress_file))
+
+    recorded = len(chosen)
+    total = progress_data.get('total_records')
+    if not isinstance(total, int) or total <= 0:
+        total = None
+    text_file = progress_data.get('text_file')
+    duration = sum(files[name][2] for name in chosen.values())
+
+    # 多说话人项目：汇总各说话人目录（每个目录有自己的时长缓存）
+    speakers = list_speakers(project_dir)
+    for speaker in speakers:
+        speaker_path = os.path.join(project_dir, speaker)
+        if not os.path.isdir(speaker_path):
+            continue
+        summary = summarize_project(speaker_path)
+        recorded += summary['recorded']
+        duration += summary['duration']
+        if summary['total']:
+            total = (total or 0) + summary['total']
+        text_file = text_file or summary['text_file']
+        last_activity = max(last_activity, summary['last_activity'] or 0)
+
+    return {
+        'name': os.path.basename(project_dir),
+        'path': project_dir,
+        'text_file': text_file,
+        'recorded': recorded,
+        'total': total,
+        'percent': min(100.0, recorded * 100.0 / total) if total else None,
+        'duration': duration,
+        'last_activity': last_activity or None,
+        'speakers': len(speakers),
+    }
+
+
+def is_valid_speaker(speaker):
+    """说话人标识会作为目录名使用，不能包含路径分隔符、以点开头或与程序使用的子目录同名（不区分大小写）"""
+    return (isinstance(speaker, str) and bool(speaker.strip()) and speaker == speaker.strip()
+            and not speaker.startswith('.') and not any(c in speaker for c in '/\\:*?"<>|')
+            and speaker.lower() not in RESERVED_DIR_NAMES)
+
+
+def list_speakers(project_dir):
+    """项目中登记的说话人"""
+    speakers = load_json_file(os.path.join(project_dir, SPEAKERS_FILE_NAME), {})
+    if not isinstance(speakers, dict):
+        return []
+    return sorted(name for name in speakers if is_valid_speaker(name))
+
+
+def register_speaker(project_dir, speaker):
+    """登记说话人（已登记时不做修改）"""
+    path = os.path.join(project_dir, SPEAKERS_FILE_NAME)
+    speakers = load_json_file(path, {})
+    if not isinstance(speakers, dict):
+        speakers = {}
+    if speaker not in speakers:
+        speakers[speaker] = {'created': time.strftime('%Y-%m-%d %H:%M:%S')}
+        write_json_atomic(path, speakers, indent=2)
+
+
+def speaker_directory(project_dir, speaker=None):
+    """说话人的录音目录；未指定说话人时使用项目目录本身"""
+    return os.path.join(project_dir, speaker) if speaker else project_dir
+
+
+class ProjectScanner:
+    """扫描录音根目录下的全部项目，按目录修改时间增量刷新并缓存到磁盘"""
+
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self.cache_file = os.path.join(base_dir, DASHBOARD_CACHE_NAME)
+
+    def load_cache(self):
+        """读取缓存的统计结果"""
+        cache = load_json_file(self.cache_file, {})
+        return cache if isinstance(cache, dict) else {}
+
+    def save_cache(self, cache):
+        """原子写入统计缓存"""
+        try:
+            write_json_atomic(self.cache_file, cache)
+        except Exception as e:
+            print(f"⚠️ 保存项目统计缓存失败：{e}")
+
+    def cached_summaries(self):
+        """立即返回缓存中的统计结果（可能已过期）"""
+        return self._sorted(self.load_cache().values())
+
+    def scan(self):
+        """扫描所有项目，只重新统计目录发生变化的项目"""
+        if not os.path.isdir(self.base_dir):
+            return []
+
+        cache = self.load_cache()
+        summaries = {}
+        changed = False
+
+        with os.scandir(self.base_dir) as entries:
+            for entry in entries:
+                if not entry.is_dir() or entry.name.startswith('.'):
+                    continue
+                cached = cache.get(entry.name)
+                if cached and cached.get('signature') == self._signature(entry.path):
+                    summaries[entry.name] = cached
+                    continue
+                try:
+                    summary = summarize_project(entry.path)
+                    # 统计过程会写入时长缓存，签名要在统计之后再取
+                    summary['signature'] = self._signature(entry.path)
+                except OSError as e:
+                    print(f"⚠️ 统计项目 {entry.name} 失败：{e}")
+                    continue
+                summaries[entry.name] = summary
+                changed = True
+
+        if changed or set(summaries) != set(cache):
+            self.save_cache(summaries)
+        return self._sorted(summaries.values())
+
+    def _signature(self, project_dir):
+        """目录与进度文件的修改时间（包括各说话人目录），用于判断项目是否变化"""
+        signature = []
+        for directory in [project_dir] + [os.path.join(project_dir, speaker)
+                                          for speaker in list_speakers(project_dir)]:
+            if not os.path.isdir(directory):
+                continue
+            progress_mtime = max((os.path.getmtime(os.path.join(directory, name))
+                                  for name in progress_file_names(directory)), default=0)
+            signature += [os.path.getmtime(directory), progress_mtime]
+        return signature
+
+    @staticmethod
+    def _sorted(summaries):
+        """按最近活动时间倒序排列"""
+        return sorted(summaries, key=lambda s: s.get('last_activity') or 0, reverse=True)
+
+
+def format_duration(seconds):
+    """将秒数格式化为 h:mm:ss"""
+    seconds = int(seconds or 0)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def format_timestamp(timestamp):
+    """将时间戳格式化为本地时间字符串"""
+    if not timestamp:
+        return '-'
+    return time.strftime('%Y-%m-%d %H:%M', time.localtime(timestamp))
+
+
+def parse_prompt_file(text_file):
+    """解析文本文件，每行格式为 'ID 录音内容'"""
+    records = []
+    with open(text_file, 'r', encoding='utf-8') as file:
+        for line in file:
+            line = line.strip()
+            if line:
+                parts = line.split(' ', 1)
+                if len(parts) == 2:
+                    record_id, text = parts
+                    records.append({'id': record_id, 'text': text})
+    return records
+
+
+def file_signature(path):
+    """文件大小与修改时间，用于判断缓存是否过期"""
+    try:
+        stat = os.stat(path)
+        return (stat.st_size, stat.st_mtime)
+    except OSError:
+        return None
+
+
+_prompt_tables = {}
+
+
+def load_prompt_table(text_file):
+    """解析文本文件，结果按文件签名缓存
+
+    同一文本文件的多个说话人共用一份解析结果，返回 (文件签名, 条目列表)，
+    条目列表是共享的，调用方需要修改时应复制
+    """
+    signature = file_signature(text_file)
+    if signature is None:
+        raise FileNotFoundError(text_file)
+    key = os.path.abspath(text_file)
+    cached = _prompt_tables.get(key)
+    if cached is None or cached[0] != signature:
+        cached = (signature, parse_prompt_file(text_file))
+        _prompt_tables[key] = cached
+    return cached
+
+
+class ProjectSession:
+    """一个录音项目的数据模型：文本条目表与已录制索引"""
+
+    def __init__(self, text_file, recordings_dir):
+        self.text_file = text_file
+        self.name = os.path.splitext(os.path.basename(text_file))[0]
+        self.recordings_dir = recordings_dir
+        self.progress_file = os.path.join(recordings_dir, PROGRESS_FILE_NAME)
+        self.prompt_changes_file = os.path.join(recordings_dir, PROMPT_CHANGES_FILE_NAME)
+        self.records = []
+        self.recorded_files = {}
+        self.prompt_changes = {}
+        self.is_open = False
+        self._text_signature = None
+        self._dir_mtime = None
+        self._id_index = None
+        # 条目表或录音索引每次变化时递增，供预取的显示状态判断是否过期
+        self.version = 0
+
+    def open(self):
+        """打开项目：必要时重新解析文本文件和刷新录音索引"""
+        if self._text_signature is None:
+            signature, records = load_prompt_table(self.text_file)
+            self.records = list(records)
+            self._text_signature = signature
+            changes = load_json_file(self.prompt_changes_file, {})
+            self.prompt_changes = changes if isinstance(changes, dict) else {}
+        elif self.prompt_file_changed():
+            self.reload_prompts()
+        self.refresh_index()
+        self.is_open = True
+        return self
+
+    @property
+    def prompt_signature(self):
+        """当前条目表解析自的文本文件签名（文本文件修改后、重新加载之前与磁盘上的签名不同）"""
+        return self._text_signature
+
+    def prompt_file_changed(self):
+        """文本文件自上次解析后是否被修改"""
+        return file_signature(self.text_file) != self._text_signature
+
+    def reload_prompts(self):
+        """按行差异原地更新条目表
+
+        未变化的条目保持原对象不变，已录制但文本被修改的条目记入 prompt_changes。
+        返回 (新增 id, 删除 id, 文本变化 id) 三个列表。
+        """
+        signature, new_records = load_prompt_table(self.text_file)
+        self._text_signature = signature
+
+        old_keys = [(r['id'], r['text']) for r in self.records]
+        new_keys = [(r['id'], r['text']) for r in new_records]
+        opcodes = SequenceMatcher(None, old_keys, new_keys, autojunk=False).get_opcodes()
+
+        old_texts = {}
+        new_texts = {}
+        # 倒序应用，保证前面的下标不受影响
+        for tag, i1, i2, j1, j2 in reversed(opcodes):
+            if tag == 'equal':
+                continue
+            for record in self.records[i1:i2]:
+                old_texts[record['id']] = record['text']
+            for record in new_records[j1:j2]:
+                new_texts[record['id']] = record['text']
+            self.records[i1:i2] = new_records[j1:j2]
+        self._id_index = None
+        self.version += 1
+
+        added = [rid for rid in new_texts if rid not in old_texts]
+        removed = [rid for rid in old_texts if rid not in new_texts]
+        changed = [rid for rid in new_texts
+                   if rid in old_texts and old_texts[rid] != new_texts[rid]]
+
+        flagged = False
+        for record_id in changed:
+            if record_id in self.recorded_files:
+                entry = self.prompt_changes.setdefault(
+                    record_id, {'recorded_text': old_texts[record_id]})
+                entry['current_text'] = new_texts[record_id]
+                entry['changed_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+                flagged = True
+        if flagged:
+            self.save_prompt_changes()
+        return added, removed, changed
+
+    def save_prompt_changes(self):
+        """保存文本被修改过的已录制条目"""
+        try:
+            write_json_atomic(self.prompt_changes_file, self.prompt_changes, indent=2)
+        except OSError as e:
+            print(f"⚠️ 保存文本修改记录失败：{e}")
+
+    def index_of(self, record_id):
+        """条目 id 对应的下标，不存在时返回 None"""
+        if self._id_index is None:
+            self._id_index = {r['id']: i for i, r in enumerate(self.records)}
+        return self._id_index.get(record_id)
+
+    def prompt_changed_since_recording(self, record_id):
+        """已录制条目的文本是否在录制后被修改"""
+        return record_id in self.prompt_changes
+
+    def close(self):
+        """关闭项目，数据仍保留在缓存中以便快速重新打开"""
+        self.is_open = False
+
+    def refresh_index(self, force=False):
+        """目录有变化时重新扫描已录制的音频"""
+        try:
+            dir_mtime = os.path.getmtime(self.recordings_dir)
+        except OSError:
+            self.recorded_files = {}
+            self._dir_mtime = None
+            return
+        if not force and dir_mtime == self._dir_mtime:
+            return
+        recorded_files = {}
+        with os.scandir(self.recordings_dir) as entries:
+            for entry in entries:
+                parsed = split_audio_name(entry.name)
+                if parsed is not None:
+                    record_id = parsed[0]
+                    recorded_files[record_id] = prefer_audio_file(recorded_files.get(record_id), entry.name)
+        self.recorded_files = recorded_files
+        self._dir_mtime = dir_mtime
+        self.version += 1
+
+    def audio_path(self, record_id, extension=DEFAULT_AUDIO_EXTENSION):
+        """条目对应的音频文件路径（未录制时按给定扩展名生成）"""
+        filename = self.recorded_files.get(record_id) or f"{record_id}{extension}"
+        return os.path.join(self.recordings_dir, filename)
+
+    def is_recorded(self, record_id):
+        """条目是否已录制"""
+        return record_id in self.recorded_files
+
+    def mark_recorded(self, record_id, filename=None):
+        """保存音频后更新索引"""
+        self.recorded_files[record_id] = filename or f"{record_id}{DEFAULT_AUDIO_EXTENSION}"
+        self.version += 1
+        if self.prompt_changes.pop(record_id, None) is not None:
+            self.save_prompt_changes()
+
+    def mark_recorded_many(self, files):
+        """一次登记多条录音（如导入），files 为 {条目 id: 文件名}"""
+        if not files:
+            return
+        self.recorded_files.update(files)
+        self.version += 1
+        flagged = [record_id for record_id in files if self.prompt_changes.pop(record_id, None) is not None]
+        if flagged:
+            self.save_prompt_changes()
+
+    def update_audio_file(self, record_id, filename):
+        """音频文件被转码或改名后更新索引（不影响文本修改标记）"""
+        if record_id in self.recorded_files:
+            self.recorded_files[record_id] = filename
+            self.version += 1
+
+    def first_missing_index(self):
+        """第一个未录制条目的索引，全部已录制时返回最后一条"""
+        for i, record in enumerate(self.records):
+            if record['id'] not in self.recorded_files:
+                return i
+        return len(self.records) - 1 if self.records else 0
+
+
+class RecordPrefetcher:
+    """在后台准备当前条目前后若干条的显示状态，切换条目时直接使用
+
+    显示状态记录了生成时的会话版本，条目表或录音索引变化后自动重新生成
+    """
+
+    def __init__(self, session, extension=DEFAULT_AUDIO_EXTENSION, window=3):
+        self.session = session
+        self.extension = extension
+        self.window = max(0, window)
+        self._states = {}
+        self._lock = threading.Lock()
+        self._center = None
+        self._wakeup = threading.Event()
+        self._closed = False
+        self._thread = None
+
+    def build_state(self, index):
+        """生成一条的显示状态（会访问文件系统）"""
+        session = self.session
+        version = session.version
+        record = session.records[index]
+        audio_path = session.audio_path(record['id'], self.extension)
+        recorded = os.path.exists(audio_path)
+        return {
+            'index': index,
+            'id': record['id'],
+            'text': record['text'],
+            'total': len(session.records),
+            'audio_path': audio_path,
+            'recorded': recorded,
+            'prompt_changed': recorded and session.prompt_changed_since_recording(record['id']),
+            'version': version,
+        }
+
+    def _valid(self, state, index):
+        return (state is not None and state['version'] == self.session.version
+                and state['total'] == len(self.session.records)
+                and state['id'] == self.session.records[index]['id'])
+
+    def get(self, index):
+        """取出一条的显示状态（未预取或已过期时立即生成），并开始预取周围的条目"""
+        with self._lock:
+            state = self._states.get(index)
+        if not self._valid(state, index):
+            state = self.build_state(index)
+            with self._lock:
+                self._states[index] = state
+        self.prefetch(index)
+        return state
+
+    def prefetch(self, center):
+        """在后台准备 center 前后 window 条"""
+        if self.window == 0 or self._closed:
+            return
+        self._center = center
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self._wakeup.set()
+
+    def close(self):
+        """停止后台预取"""
+        self._closed = True
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            if self._closed:
+                return
+            center = self._center
+            # 由近到远：下一条、上一条、下下条……
+            for distance in range(1, self.window + 1):
+                for index in (center + distance, center - distance):
+                    if self._closed or self._wakeup.is_set():
+                        break  # 当前位置已变化，重新开始
+                    try:
+                        if not 0 <= index < len(self.session.records):
+                            continue
+                        with self._lock:
+                            state = self._states.get(index)
+                        if not self._valid(state, index):
+                            state = self.build_state(index)
+                            with self._lock:
+                                self._states[index] = state
+                    except (IndexError, OSError):
+                        continue  # 条目表正在更新，下次再取
+            with self._lock:
+                limit = 2 * self.window + 1
+                for index in [i for i in self._states if abs(i - center) > limit]:
+                    del self._states[index]
+
+
+class ProjectSessionCache:
+    """最近使用项目的 LRU 缓存，切换项目时无需重新解析"""
+
+    def __init__(self, max_size=4):
+        self.max_size = max(1, max_size)
+        self._sessions = OrderedDict()
+
+    def open(self, text_file, recordings_dir):
+        """打开（或从缓存取出）项目会话"""
+        key = (os.path.abspath(text_file), os.path.abspath(recordings_dir))
+        session = self._sessions.pop(key, None)
+        if session is None:
+            session = ProjectSession(text_file, recordings_dir)
+        session.open()
+        self._sessions[key] = session
+
+        while len(self._sessions) > self.max_size:
+            _, evicted = self._sessions.popitem(last=False)
+            evicted.close()
+        return session
+
+    def __len__(self):
+        return len(self._sessions)
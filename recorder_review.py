@@ -0,0 +1,227 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+审听模式
+按顺序连续播放已录制的录音，供质检人员快速审听：
+- 后台线程提前解码后面几条录音（统一转换为同一采样率和声道数），全部录音通过同一个输出流连续播放，
+  切换条目时不需要重新打开设备，也不用等待读取文件
+- 审听结论（通过/退回）先记在内存中，攒够一批或结束审听时一次写入项目 manifest.json 的 review 中；
+  结论与录音文件的大小和修改时间一起记录，重新录制后旧结论自动失效
+"""
+
+import os
+import queue
+import threading
+import time
+
+from recorder_audio import AudioConverter
+from recorder_backup import MANIFEST_FILE_NAME, modify_manifest
+from recorder_project import load_json_file
+
+REVIEW_KEY = 'review'
+VERDICTS = ('accept', 'reject')
+DEFAULT_GAP_MS = 300
+DEFAULT_READ_AHEAD = 4
+DEFAULT_BATCH_SIZE = 20
+
+
+def decode_take(path, sample_rate, channels, gap_frames=0):
+    """读取一条录音并转换为指定格式的 float32 数组，末尾补 gap_frames 帧静音"""
+    import numpy as np
+    import soundfile as sf
+
+    data, rate = sf.read(path, dtype='float32', always_2d=True)
+    if rate != sample_rate or data.shape[1] != channels:
+        converter = AudioConverter(rate, data.shape[1], sample_rate, channels)
+        data = np.concatenate((converter.process(data), converter.flush()))
+    if gap_frames:
+        data = np.concatenate((data, np.zeros((gap_frames, channels), dtype=np.float32)))
+    return data
+
+
+class ReviewPlayer:
+    """用一个输出流连续播放一组录音
+
+    items 为 [(条目 id, 录音路径)]。on_item(位置, 条目 id) 在某条开始播放时调用，
+    on_finished() 在全部播放完后调用，on_error(条目 id, 异常) 在录音无法读取时调用（该条跳过）；
+    这些回调在音频或解码线程中执行，应尽快返回（如交给界面线程）
+    """
+
+    def __init__(self, items, sample_rate, channels=1, gap_ms=DEFAULT_GAP_MS, read_ahead=DEFAULT_READ_AHEAD,
+                 on_item=None, on_finished=None, on_error=None):
+        self.items = list(items)
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.gap_frames = int(sample_rate * gap_ms / 1000)
+        self.on_item = on_item
+        self.on_finished = on_finished
+        self.on_error = on_error
+        self.position = None
+        self.paused = False
+        self._queue = queue.Queue(maxsize=max(1, read_ahead))
+        self._stopped = threading.Event()
+        self._skip = False
+        self._current = None
+        self._offset = 0
+        self._stream = None
+        self._thread = None
+
+    def start(self, position=0):
+        """从第 position 条开始播放"""
+        import sounddevice as sd
+
+        self._thread = threading.Thread(target=self._decode, args=(position,), daemon=True)
+        self._thread.start()
+        self._stream = sd.OutputStream(samplerate=self.sample_rate, channels=self.channels, dtype='float32',
+                                       callback=self._callback, finished_callback=self._stream_finished)
+        self._stream.start()
+        return self
+
+    def _decode(self, position):
+        for index in range(position, len(self.items)):
+            if self._stopped.is_set():
+                return
+            record_id, path = self.items[index]
+            try:
+                data = decode_take(path, self.sample_rate, self.channels, self.gap_frames)
+            except Exception as e:
+                if self.on_error:
+                    self.on_error(record_id, e)
+                continue
+            if not self._put((index, record_id, data)):
+                return
+        self._put(None)
+
+    def _put(self, item):
+        """放入预读队列；队列满时等待播放消耗，停止时放弃"""
+        while not self._stopped.is_set():
+            try:
+                self._queue.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _callback(self, outdata, frames, time_info, status):
+        import sounddevice as sd
+
+        if self.paused:
+            outdata.fill(0)
+            return
+        if self._skip:
+            self._skip = False
+            self._current = None
+        written = 0
+        while written < frames:
+            if self._current is None:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    # 解码跟不上时先输出静音
+                    break
+                if item is None:
+                    outdata[written:].fill(0)
+                    raise sd.CallbackStop
+                self._current = item
+                self._offset = 0
+                self.position = item[0]
+                if self.on_item:
+                    self.on_item(item[0], item[1])
+            data = self._current[2]
+            count = min(frames - written, len(data) - self._offset)
+            outdata[written:written + count] = data[self._offset:self._offset + count]
+            written += count
+            self._offset += count
+            if self._offset >= len(data):
+                self._current = None
+        outdata[written:].fill(0)
+
+    def _stream_finished(self):
+        if not self._stopped.is_set() and self.on_finished:
+            self.on_finished()
+
+    def skip(self):
+        """跳到下一条"""
+        self._skip = True
+
+    def replay(self):
+        """从头重播当前这条"""
+        self._offset = 0
+
+    def toggle_pause(self):
+        self.paused = not self.paused
+        return self.paused
+
+    def stop(self):
+        """停止播放并关闭输出流"""
+        self._stopped.set()
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+            self._stream = None
+        if self._thread is not None:
+            self._thread.join(timeout=1)
+
+
+def take_stamp(path):
+    """录音文件的大小和修改时间，与 manifest.json 的 files 使用同样的字段"""
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+class ReviewLog:
+    """审听结论，按批写入项目 manifest.json"""
+
+    def __init__(self, project_dir, batch_size=DEFAULT_BATCH_SIZE):
+        self.project_dir = project_dir
+        self.batch_size = batch_size
+        self.pending = {}
+        self.counts = dict.fromkeys(VERDICTS, 0)
+        self._lock = threading.Lock()
+
+    def record(self, record_id, path, verdict):
+        """记录一条结论；攒够一批时返回 True，调用方应（在后台）调用 flush()"""
+        if verdict not in VERDICTS:
+            raise ValueError(f"未知的审听结论：{verdict}")
+        relative = os.path.relpath(path, self.project_dir).replace(os.sep, '/')
+        entry = dict(take_stamp(path), id=record_id, verdict=verdict, time=time.strftime('%Y-%m-%d %H:%M:%S'))
+        with self._lock:
+            previous = self.pending.get(relative)
+            if previous is not None:
+                self.counts[previous['verdict']] -= 1
+            self.pending[relative] = entry
+            self.counts[verdict] += 1
+            return len(self.pending) >= self.batch_size
+
+    def flush(self):
+        """把积攒的结论写入 manifest.json，返回写入的条数"""
+        with self._lock:
+            pending, self.pending = self.pending, {}
+        if not pending:
+            return 0
+        # 与备份、内容核对共用 manifest 锁，重新读取后只合并审听结论
+        modify_manifest(self.project_dir, lambda manifest: manifest.setdefault(REVIEW_KEY, {}).update(pending))
+        return len(pending)
+
+
+def take_verdicts(project_dir, recordings_dir, recorded_files):
+    """当前录音的审听结论 {条目 id: 'accept'/'reject'}；录音在审听后被替换的不计入
+
+    recorded_files 为 {条目 id: 文件名}（ProjectSession.recorded_files）
+    """
+    manifest = load_json_file(os.path.join(project_dir, MANIFEST_FILE_NAME), {})
+    review = manifest.get(REVIEW_KEY, {}) if isinstance(manifest, dict) else {}
+    if not review:
+        return {}
+    verdicts = {}
+    for record_id, filename in recorded_files.items():
+        path = os.path.join(recordings_dir, filename)
+        entry = review.get(os.path.relpath(path, project_dir).replace(os.sep, '/'))
+        if entry is None:
+            continue
+        try:
+            if take_stamp(path) == {'size': entry.get('size'), 'mtime': entry.get('mtime')}:
+                verdicts[record_id] = entry.get('verdict')
+        except OSError:
+            continue
+    return verdicts
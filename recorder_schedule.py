@@ -0,0 +1,286 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+条目调度
+按可替换的优先级决定下一条录制哪个条目，代替逐条顺序前进：
+- sequential：按文本顺序（与原来的行为相同）
+- coverage：优先录制包含覆盖不足的字符 n-gram 的条目，使已录内容的覆盖尽量均衡
+- length：文本按长度分档，优先录制完成比例最低的档位，使已录内容的长度分布与全部条目一致
+- balanced：coverage 与 length 的组合
+- "模块:类名"：自定义优先级（如按拼音或音素计算覆盖），实现 score(位置) 和 update(位置, 增量) 即可
+需要重录的条目（审听退回、录制后文本被修改）总是排在最前，跳过的条目排在最后。
+待录条目保存在堆中，取下一条为 O(log N)：内置优先级的分数只会随录制进度下降，
+因此录制后不重排全部条目，而是在条目到达堆顶时重新计算分数，不再是最高时放回堆中（惰性更新）。
+整组条目共享的分数（如长度档位的完成比例）不放进堆的排序键：优先级可以另外实现 group(位置) 和 group_score(组)，
+此时 score() 只返回组内部分，每组一个堆，取条目时比较各组堆顶再加上组分数，录制一条不会使整组条目重新排序。
+"""
+
+import bisect
+import heapq
+import importlib
+import os
+from collections import Counter
+
+from recorder_verify import normalize_text
+
+DEFAULT_PRIORITY = 'sequential'
+DEFAULT_NGRAM = 2
+LENGTH_BINS = 5
+
+_features = {}
+
+
+def prompt_features(session, n=DEFAULT_NGRAM):
+    """每个条目去掉标点后的字符 n-gram 集合和长度（按会话中条目表的签名缓存，只计算一次）"""
+    key = (os.path.abspath(session.text_file), n)
+    signature = session.prompt_signature
+    cached = _features.get(key)
+    if cached is None or cached[0] != signature or len(cached[1]) != len(session.records):
+        grams = []
+        lengths = []
+        for record in session.records:
+            text = normalize_text(record['text'])
+            grams.append(frozenset(text[i:i + n] for i in range(len(text) - n + 1)) or frozenset([text]))
+            lengths.append(len(text))
+        cached = (signature, grams, lengths)
+        _features[key] = cached
+    return cached[1], cached[2]
+
+
+class SequentialPriority:
+    """按文本顺序"""
+
+    def __init__(self, session, recorded_positions, **options):
+        pass
+
+    def score(self, position):
+        return 0.0
+
+    def update(self, position, delta):
+        """条目录制完成（delta=1）或录音被删除（delta=-1）"""
+
+
+class CoveragePriority:
+    """n-gram 覆盖：条目中各 n-gram 已被覆盖次数的倒数的平均值，包含未录过的 n-gram 越多分数越高"""
+
+    def __init__(self, session, recorded_positions, ngram=DEFAULT_NGRAM, **options):
+        self.grams = prompt_features(session, ngram)[0]
+        self.covered = Counter()
+        for position in recorded_positions:
+            self.covered.update(self.grams[position])
+
+    def score(self, position):
+        grams = self.grams[position]
+        covered = self.covered
+        return sum(1.0 / (1 + covered[gram]) for gram in grams) / len(grams)
+
+    def update(self, position, delta):
+        for gram in self.grams[position]:
+            self.covered[gram] += delta
+
+
+class LengthPriority:
+    """长度均衡：按文本长度的分位数分档，分数为该档尚未录制的比例（组分数，组为档位）"""
+
+    def __init__(self, session, recorded_positions, ngram=DEFAULT_NGRAM, bins=LENGTH_BINS, **options):
+        lengths = prompt_features(session, ngram)[1]
+        ordered = sorted(lengths)
+        edges = sorted({ordered[len(ordered) * k // bins] for k in range(1, bins)}) if ordered else []
+        self.bin_of = [bisect.bisect_right(edges, length) for length in lengths]
+        self.total = Counter(self.bin_of)
+        self.recorded = Counter(self.bin_of[position] for position in recorded_positions)
+
+    def score(self, position):
+        return 0.0
+
+    def group(self, position):
+        return self.bin_of[position]
+
+    def group_score(self, group):
+        return 1.0 - self.recorded[group] / self.total[group]
+
+    def update(self, position, delta):
+        self.recorded[self.bin_of[position]] += delta
+
+
+class BalancedPriority:
+    """覆盖为主，长度均衡为辅"""
+
+    def __init__(self, session, recorded_positions, length_weight=0.5, **options):
+        self.coverage = CoveragePriority(session, recorded_positions, **options)
+        self.length = LengthPriority(session, recorded_positions, **options)
+        self.length_weight = length_weight
+
+    def score(self, position):
+        return self.coverage.score(position)
+
+    def group(self, position):
+        return self.length.group(position)
+
+    def group_score(self, group):
+        return self.length_weight * self.length.group_score(group)
+
+    def update(self, position, delta):
+        self.coverage.update(position, delta)
+        self.length.update(position, delta)
+
+
+PRIORITIES = {
+    'sequential': SequentialPriority,
+    'coverage': CoveragePriority,
+    'length': LengthPriority,
+    'balanced': BalancedPriority,
+}
+
+
+def create_priority(name, session, recorded_positions, **options):
+    """按名称创建优先级；'模块:类名' 形式加载自定义优先级"""
+    if name in PRIORITIES:
+        return PRIORITIES[name](session, recorded_positions, **options)
+    module_name, sep, class_name = name.partition(':')
+    if not sep:
+        raise ValueError(f"未知的调度方式：{name}")
+    return getattr(importlib.import_module(module_name), class_name)(session, recorded_positions, **options)
+
+
+class PromptScheduler:
+    """待录条目的优先队列
+
+    retakes 为需要重录的条目 id；条目留在队列中直到 complete()，因此 next() 可以重复调用
+    """
+
+    def __init__(self, session, priority=DEFAULT_PRIORITY, retakes=(), **options):
+        self.session = session
+        self.signature = session.prompt_signature
+        records = session.records
+        recorded_files = session.recorded_files
+        self.recorded = {p for p, record in enumerate(records) if record['id'] in recorded_files}
+        self.retakes = {p for p in map(session.index_of, retakes) if p is not None}
+        self.deferred = set()
+        self.priority = create_priority(priority, session, self.recorded, **options)
+        self._grouped = hasattr(self.priority, 'group') and hasattr(self.priority, 'group_score')
+        pending = [p for p in range(len(records)) if p not in self.recorded or p in self.retakes]
+        # 每组一个堆，堆中的项为 (组内排序键, 位置, 序号)；条目重新入堆时序号加一，旧项在到达堆顶时丢弃
+        self._serial = dict.fromkeys(pending, 0)
+        self._heaps = {}
+        for p in pending:
+            self._heaps.setdefault(self._group(p), []).append((self._heap_key(p), p, 0))
+        for heap in self._heaps.values():
+            heapq.heapify(heap)
+        self.version = session.version
+
+    def __len__(self):
+        return len(self._serial)
+
+    def _group(self, position):
+        return self.priority.group(position) if self._grouped else None
+
+    def _group_score(self, group):
+        return self.priority.group_score(group) if self._grouped else 0.0
+
+    def _heap_key(self, position):
+        """组内排序键（不含组分数）"""
+        tier = 0 if position in self.retakes else 2 if position in self.deferred else 1
+        return (tier, -self.priority.score(position), position)
+
+    def _key(self, position):
+        """完整排序键"""
+        tier, score, _ = self._heap_key(position)
+        return (tier, score - self._group_score(self._group(position)), position)
+
+    def _push(self, position):
+        serial = self._serial.get(position, 0) + 1
+        self._serial[position] = serial
+        heapq.heappush(self._heaps.setdefault(self._group(position), []),
+                       (self._heap_key(position), position, serial))
+
+    def _peek(self, heap):
+        """堆顶的有效项（丢弃旧项、更新分数已变化的项），堆空时返回 None"""
+        while heap:
+            key, position, serial = heap[0]
+            if self._serial.get(position) != serial:
+                heapq.heappop(heap)
+                continue
+            fresh = self._heap_key(position)
+            if fresh != key:
+                heapq.heapreplace(heap, (fresh, position, serial))
+                continue
+            return key
+        return None
+
+    def is_pending(self, position):
+        return position in self._serial
+
+    def stale(self):
+        """会话重新加载文本文件后需要重新建立（只看会话中的条目表，文本文件修改但尚未重新加载时不算）"""
+        return self.session.prompt_signature != self.signature
+
+    def _best(self):
+        """优先级最高的待录条目所在的组，没有时返回 (None, None)"""
+        best = None
+        for group, heap in list(self._heaps.items()):
+            key = self._peek(heap)
+            if key is None:
+                del self._heaps[group]
+                continue
+            tier, score, position = key
+            full = (tier, score - self._group_score(group), position)
+            if best is None or full < best[0]:
+                best = (full, group)
+        return (best[0][2], best[1]) if best else (None, None)
+
+    def next(self):
+        """优先级最高的待录条目位置，没有时返回 None"""
+        return self._best()[0]
+
+    def top(self, count, allowed=None):
+        """优先级最高的 count 个待录条目（只在 allowed 中选取），不移出队列"""
+        if allowed is not None and len(allowed) * 4 < len(self._serial):
+            # 候选较少（如工位已领取的一批）时直接在候选中排序，不必逐个弹出整个队列
+            return heapq.nsmallest(count, (p for p in allowed if p in self._serial), key=self._key)
+        popped = []
+        result = []
+        while len(result) < count:
+            position, group = self._best()
+            if position is None:
+                break
+            popped.append((group, heapq.heappop(self._heaps[group])))
+            if allowed is None or position in allowed:
+                result.append(position)
+        for group, entry in popped:
+            heapq.heappush(self._heaps.setdefault(group, []), entry)
+        return result
+
+    def complete(self, position):
+        """条目录制完成"""
+        self.retakes.discard(position)
+        self.deferred.discard(position)
+        self._serial.pop(position, None)
+        if position not in self.recorded:
+            self.recorded.add(position)
+            self.priority.update(position, 1)
+
+    def defer(self, position):
+        """跳过的条目排到其他待录条目之后"""
+        if position in self._serial and position not in self.deferred:
+            self.deferred.add(position)
+            self._push(position)
+
+    def reopen(self, position):
+        """录音被删除，条目重新待录"""
+        if position in self.recorded:
+            self.recorded.discard(position)
+            self.priority.update(position, -1)
+        self._push(position)
+
+    def sync(self):
+        """与会话的录音索引对齐（其他工位录制、录音被删除等），只处理有变化的条目"""
+        if self.session.version == self.version:
+            return
+        index_of = self.session.index_of
+        recorded = {p for p in map(index_of, self.session.recorded_files) if p is not None}
+        for position in recorded - self.recorded:
+            self.complete(position)
+        for position in self.recorded - recorded:
+            self.reopen(position)
+        self.version = self.session.version
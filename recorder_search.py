@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+条目搜索与筛选
+- 条目文本的倒排索引：以二元组（相邻两个字符）为键，适用于不分词的中文，
+  单字查询使用一元组；候选条目再做一次子串检查，保证结果准确
+- 索引在第一次搜索时建立，按条目表解析自的文本文件签名缓存，条目表重新加载之前一直复用
+- 搜索结果可以再按录制状态、审听结论、录音时长筛选，返回按文本顺序排列的条目位置
+"""
+
+import os
+import unicodedata
+from collections import defaultdict
+
+from recorder_project import scan_audio_durations
+from recorder_review import take_verdicts
+
+STATUS_FILTERS = ('all', 'recorded', 'missing', 'changed', 'rejected', 'unreviewed')
+
+
+def normalize_query(text):
+    """全角转半角、英文转小写，索引和查询使用同样的规则"""
+    return unicodedata.normalize('NFKC', text or '').lower()
+
+
+class PromptIndex:
+    """条目文本的 n-gram 倒排索引"""
+
+    def __init__(self, records):
+        self.texts = [normalize_query(record['text']) for record in records]
+        self.ids = [record['id'].lower() for record in records]
+        unigrams = defaultdict(list)
+        bigrams = defaultdict(list)
+        for position, text in enumerate(self.texts):
+            for char in set(text):
+                unigrams[char].append(position)
+            for gram in set(map(''.join, zip(text, text[1:]))):
+                bigrams[gram].append(position)
+        self.unigrams = dict(unigrams)
+        self.bigrams = dict(bigrams)
+
+    def _candidates(self, term):
+        """包含 term 全部 n-gram 的条目位置（集合），可能有少量误报"""
+        if len(term) == 1:
+            return set(self.unigrams.get(term, ()))
+        postings = [self.bigrams.get(term[i:i + 2]) for i in range(len(term) - 1)]
+        if any(p is None for p in postings):
+            return set()
+        postings.sort(key=len)
+        result = set(postings[0])
+        for posting in postings[1:]:
+            result.intersection_update(posting)
+            if not result:
+                break
+        return result
+
+    def search(self, query):
+        """搜索文本或 id 中包含查询中全部词（空格分隔）的条目，返回排好序的位置列表"""
+        terms = normalize_query(query).split()
+        if not terms:
+            return list(range(len(self.texts)))
+        result = None
+        for term in terms:
+            matches = {position for position in self._candidates(term) if term in self.texts[position]}
+            # id 一般较短，直接逐个比较
+            matches.update(position for position, record_id in enumerate(self.ids) if term in record_id)
+            result = matches if result is None else result & matches
+            if not result:
+                return []
+        return sorted(result)
+
+
+_indexes = {}
+
+
+def prompt_index(session):
+    """项目条目表的索引
+
+    按会话中条目表的签名缓存，而不是磁盘上文本文件的签名：文本文件修改后、会话重新加载之前，
+    索引仍对应会话中的旧条目，重新加载后自动重建
+    """
+    key = os.path.abspath(session.text_file)
+    signature = session.prompt_signature
+    cached = _indexes.get(key)
+    if cached is None or cached[0] != signature or len(cached[1].texts) != len(session.records):
+        cached = (signature, PromptIndex(session.records))
+        _indexes[key] = cached
+    return cached[1]
+
+
+def search_records(session, query='', status='all', min_duration=None, max_duration=None, project_dir=None):
+    """按文本、录制状态和录音时长筛选条目，返回按文本顺序排列的位置列表
+
+    status 为 'all'、'recorded'、'missing'、'changed'（录制后文本被修改），
+    或 'rejected'（审听退回）、'unreviewed'（已录制但未审听），后两者需要 project_dir 读取审听结论；
+    指定时长范围时只保留时长在范围内的已录制条目
+    """
+    positions = prompt_index(session).search(query)
+    records = session.records
+    recorded = session.recorded_files
+    if status == 'recorded':
+        positions = [p for p in positions if records[p]['id'] in recorded]
+    elif status == 'missing':
+        positions = [p for p in positions if records[p]['id'] not in recorded]
+    elif status == 'changed':
+        positions = [p for p in positions if session.prompt_changed_since_recording(records[p]['id'])]
+    elif status in ('rejected', 'unreviewed'):
+        verdicts = take_verdicts(project_dir or session.recordings_dir, session.recordings_dir, recorded)
+        if status == 'rejected':
+            positions = [p for p in positions if verdicts.get(records[p]['id']) == 'reject']
+        else:
+            positions = [p for p in positions if records[p]['id'] in recorded and records[p]['id'] not in verdicts]
+
+    if min_duration is not None or max_duration is not None:
+        files, chosen = scan_audio_durations(session.recordings_dir) if os.path.isdir(session.recordings_dir) \
+            else ({}, {})
+        low = min_duration if min_duration is not None else float('-inf')
+        high = max_duration if max_duration is not None else float('inf')
+        positions = [p for p in positions
+                     if records[p]['id'] in chosen and low <= files[chosen[records[p]['id']]][2] <= high]
+    return positions
@@ -0,0 +1,592 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+浏览器录音工位的本地服务器（无界面）
+在一台机器上运行，录音员通过浏览器访问；基于 asyncio 实现 HTTP/1.1 和 WebSocket，不依赖第三方库：
+- GET  /api/projects                                  项目列表及完成度
+- GET  /api/projects/<项目>/records?offset=&limit=    条目列表
+- GET  /api/projects/<项目>/records/<下标>            单个条目
+- GET  /api/projects/<项目>/next                      下一条未录制的条目（指定 station 时按租约分配）
+- GET  /api/projects/<项目>/progress                  当前进度
+- PUT  /api/projects/<项目>/progress                  保存进度 {"current_index": n}
+- PUT  /api/projects/<项目>/takes/<id>                上传录音（WAV/FLAC，支持分块传输），边接收边写入磁盘
+- GET  /api/projects/<项目>/takes/<id>                下载录音
+- GET  /ws                                            WebSocket，推送录音保存和进度变化
+所有接口都可以带 speaker（说话人）和 station（工位）查询参数，含义与桌面程序相同
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import re
+import struct
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from recorder_config import ConfigLoader
+from recorder_project import (ProgressStore, ProjectSessionCache, is_valid_speaker, progress_file_path,
+                              read_audio_duration, register_speaker, speaker_directory)
+from recorder_station import LeaseManager
+from recorder_takes import TakeStore, replacing_take
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+MAX_JSON_BYTES = 1024 * 1024
+READ_CHUNK_BYTES = 64 * 1024
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               409: 'Conflict', 413: 'Payload Too Large', 415: 'Unsupported Media Type',
+               500: 'Internal Server Error'}
+
+
+class HTTPError(Exception):
+    """返回给客户端的错误"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class Request:
+    """一个 HTTP 请求；请求体按需流式读取"""
+
+    def __init__(self, method, target, headers, reader):
+        parts = urlsplit(target)
+        self.method = method
+        self.path = unquote(parts.path)
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.headers = headers
+        self.reader = reader
+        self.consumed = not self._has_body()
+
+    def _has_body(self):
+        return 'chunked' in self.headers.get('transfer-encoding', '').lower() or \
+            int(self.headers.get('content-length') or 0) > 0
+
+    async def body(self, limit):
+        """逐块读取请求体（Content-Length 或分块传输），超过 limit 字节时报错"""
+        received = 0
+        if 'chunked' in self.headers.get('transfer-encoding', '').lower():
+            while True:
+                size_line = await self.reader.readline()
+                size = int(size_line.split(b';', 1)[0].strip() or b'0', 16)
+                if size == 0:
+                    # 跳过 trailer，直到空行
+                    while (await self.reader.readline()) not in (b'\r\n', b'\n', b''):
+                        pass
+                    break
+                received += size
+                if received > limit:
+                    raise HTTPError(413, f'请求体超过 {limit} 字节')
+                while size > 0:
+                    data = await self.reader.read(min(size, READ_CHUNK_BYTES))
+                    if not data:
+                        raise asyncio.IncompleteReadError(b'', size)
+                    size -= len(data)
+                    yield data
+                await self.reader.readline()
+        else:
+            remaining = int(self.headers.get('content-length') or 0)
+            if remaining > limit:
+                raise HTTPError(413, f'请求体超过 {limit} 字节')
+            while remaining > 0:
+                data = await self.reader.read(min(remaining, READ_CHUNK_BYTES))
+                if not data:
+                    raise asyncio.IncompleteReadError(b'', remaining)
+                remaining -= len(data)
+                yield data
+        self.consumed = True
+
+    async def json(self):
+        """读取 JSON 请求体"""
+        data = b''.join([chunk async for chunk in self.body(MAX_JSON_BYTES)])
+        try:
+            return json.loads(data or b'{}')
+        except ValueError:
+            raise HTTPError(400, '请求体不是有效的 JSON')
+
+
+class RecordingServer:
+    """录音服务器：项目数据与桌面程序共用 ProjectSession、TakeStore 和租约表"""
+
+    def __init__(self, text_files, recordings_base_dir, keep_takes=True, station_settings=None,
+                 cache_size=64):
+        self.projects = {os.path.splitext(os.path.basename(path))[0]: path for path in text_files}
+        self.recordings_base_dir = recordings_base_dir
+        self.keep_takes = keep_takes
+        self.station_settings = station_settings or {}
+        self.sessions = ProjectSessionCache(cache_size)
+        self.take_stores = {}
+        self.lease_managers = {}
+        self.lease_signatures = {}  # 租约表上次同步时会话条目表的签名
+        self.locks = {}
+        self.clients = set()
+        # 打开会话、租约表和进度文件的读写都在这个线程中依次执行，不阻塞事件循环；
+        # SQLite 连接只能在创建它的线程中使用，因此租约表也只在这里访问
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='project-data')
+        self.routes = [
+            ('GET', r'/api/projects', self.list_projects),
+            ('GET', r'/api/projects/([^/]+)/records', self.list_records),
+            ('GET', r'/api/projects/([^/]+)/records/(\d+)', self.get_record),
+            ('GET', r'/api/projects/([^/]+)/next', self.next_record),
+            ('GET', r'/api/projects/([^/]+)/progress', self.get_progress),
+            ('PUT', r'/api/projects/([^/]+)/progress', self.put_progress),
+            ('GET', r'/api/projects/([^/]+)/takes/([^/]+)', self.get_take),
+            ('PUT', r'/api/projects/([^/]+)/takes/([^/]+)', self.put_take),
+        ]
+
+    # ---- 项目数据（以下同步方法都在 self.executor 中执行） ----
+
+    async def call(self, func, *args):
+        """在项目数据线程中执行同步操作"""
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    def _option(self, request, name):
+        """speaker/station 查询参数，会作为目录名或文件名使用"""
+        value = request.query.get(name, '')
+        if value and not is_valid_speaker(value):
+            raise HTTPError(400, f'{name} 参数无效：{value}')
+        return value
+
+    def session(self, request, name):
+        """打开请求对应的项目（及说话人）"""
+        text_file = self.projects.get(name)
+        if text_file is None:
+            raise HTTPError(404, f'没有项目 {name}')
+        speaker = self._option(request, 'speaker')
+        project_dir = os.path.join(self.recordings_base_dir, name)
+        recordings_dir = speaker_directory(project_dir, speaker)
+        os.makedirs(recordings_dir, exist_ok=True)
+        if speaker:
+            register_speaker(project_dir, speaker)
+        return self.sessions.open(text_file, recordings_dir)
+
+    def lease_manager(self, session, station):
+        """工位的租约表（每个录音目录、工位一个）；文本文件重新加载后重新同步条目"""
+        key = (session.recordings_dir, station)
+        manager = self.lease_managers.get(key)
+        if manager is None:
+            manager = LeaseManager(session.recordings_dir, station,
+                                   self.station_settings.get('batch_size', 20),
+                                   self.station_settings.get('lease_seconds', 600))
+            self.lease_managers[key] = manager
+        if self.lease_signatures.get(key) != session.prompt_signature:
+            manager.sync_records(session.records, list(session.recorded_files))
+            self.lease_signatures[key] = session.prompt_signature
+        return manager
+
+    def record_state(self, session, index):
+        """返回给客户端的条目信息"""
+        if not 0 <= index < len(session.records):
+            raise HTTPError(404, f'没有第 {index} 条')
+        record = session.records[index]
+        return {'index': index, 'id': record['id'], 'text': record['text'],
+                'total': len(session.records), 'recorded': session.is_recorded(record['id']),
+                'prompt_changed': session.prompt_changed_since_recording(record['id'])}
+
+    def counts(self, session):
+        """(已录制条数, 总条数)"""
+        return sum(1 for record in session.records if record['id'] in session.recorded_files), len(session.records)
+
+    # ---- 接口 ----
+
+    async def list_projects(self, request):
+        def projects():
+            result = []
+            for name in sorted(self.projects):
+                recorded, total = self.counts(self.session(request, name))
+                result.append({'name': name, 'recorded': recorded, 'total': total})
+            return result
+
+        return {'projects': await self.call(projects)}
+
+    async def list_records(self, request, name):
+        try:
+            offset = max(0, int(request.query.get('offset', 0)))
+            limit = max(1, min(1000, int(request.query.get('limit', 100))))
+        except ValueError:
+            raise HTTPError(400, 'offset/limit 必须是整数')
+
+        def records():
+            session = self.session(request, name)
+            end = min(len(session.records), offset + limit)
+            return {'total': len(session.records),
+                    'records': [self.record_state(session, index) for index in range(offset, end)]}
+
+        return await self.call(records)
+
+    async def get_record(self, request, name, index):
+        return await self.call(lambda: self.record_state(self.session(request, name), int(index)))
+
+    async def next_record(self, request, name):
+        return await self.call(self._next_record, request, name)
+
+    def _next_record(self, request, name):
+        session = self.session(request, name)
+        station = self._option(request, 'station')
+        if station:
+            manager = self.lease_manager(session, station)
+            manager.renew()
+            # 只考虑会话条目表中仍然存在的条目（其他工位可能还在用修改前的文本文件）
+            leased = [index for index in map(session.index_of, manager.active_leases()) if index is not None]
+            if not leased:
+                leased = [index for index in map(session.index_of, manager.acquire_batch()) if index is not None]
+            if not leased:
+                return {'done': True}
+            return dict(self.record_state(session, leased[0]), done=False)
+        if not session.records:
+            return {'done': True}
+        index = session.first_missing_index()
+        return dict(self.record_state(session, index), done=session.is_recorded(session.records[index]['id']))
+
+    async def get_progress(self, request, name):
+        return await self.call(self._get_progress, request, name)
+
+    def _get_progress(self, request, name):
+        session = self.session(request, name)
+        store = ProgressStore(progress_file_path(session.recordings_dir, self._option(request, 'station')))
+        progress = store.load() or {}
+        recorded, total = self.counts(session)
+        index = session.index_of(progress['current_id']) if progress.get('current_id') else None
+        current_index = index if index is not None else progress.get('current_index', 0)
+        return {'current_index': current_index, 'recorded': recorded, 'total': total}
+
+    async def put_progress(self, request, name):
+        data = await request.json()
+        index = data.get('current_index') if isinstance(data, dict) else None
+        # bool 是 int 的子类，{"current_index": true} 不能当作 1
+        if not isinstance(index, int) or isinstance(index, bool):
+            raise HTTPError(400, 'current_index 无效')
+        station = self._option(request, 'station')
+        recorded, total = await self.call(self._save_progress, request, name, station, index)
+        await self.broadcast({'type': 'progress', 'project': name, 'speaker': request.query.get('speaker', ''),
+                              'station': station, 'current_index': index, 'recorded': recorded, 'total': total})
+        return {'current_index': index}
+
+    def _save_progress(self, request, name, station, index):
+        """写入工位进度，返回 (已录制条数, 总条数)"""
+        session = self.session(request, name)
+        if not 0 <= index < max(1, len(session.records)):
+            raise HTTPError(400, 'current_index 无效')
+        current_id = session.records[index]['id'] if session.records else None
+        ProgressStore(progress_file_path(session.recordings_dir, station)).save(
+            index, current_id, name, session.text_file, len(session.records))
+        return self.counts(session)
+
+    async def get_take(self, request, name, record_id):
+        def take_path():
+            session = self.session(request, name)
+            if not session.is_recorded(record_id):
+                raise HTTPError(404, f'{record_id} 还没有录音')
+            return session.audio_path(record_id)
+
+        return FileResponse(await self.call(take_path))
+
+    async def put_take(self, request, name, record_id):
+        """接收录音：先写入临时文件，校验后替换为 <id>.<扩展名> 并更新索引"""
+        station = self._option(request, 'station')
+        session, manager = await self.call(self._claim_take, request, name, record_id, station)
+
+        temp_path = os.path.join(session.recordings_dir, f'.{record_id}.{uuid.uuid4().hex}.upload')
+        try:
+            with open(temp_path, 'wb') as f:
+                async for chunk in request.body(MAX_UPLOAD_BYTES):
+                    f.write(chunk)
+            loop = asyncio.get_running_loop()
+            # 同一录音目录的保存逐个进行，避免两个上传同时移动版本文件
+            lock = self.locks.setdefault(session.recordings_dir, asyncio.Lock())
+            async with lock:
+                filename, duration = await loop.run_in_executor(
+                    None, self._store_take, session.recordings_dir, record_id, temp_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        recorded, total = await self.call(self._take_stored, session, manager, record_id, filename)
+        await self.broadcast({'type': 'take_saved', 'project': name, 'speaker': request.query.get('speaker', ''),
+                              'station': station, 'id': record_id, 'duration': duration,
+                              'recorded': recorded, 'total': total})
+        return {'id': record_id, 'filename': filename, 'duration': duration}
+
+    def _claim_take(self, request, name, record_id, station):
+        """上传前确认条目存在并由本工位录制，返回 (会话, 租约表)"""
+        session = self.session(request, name)
+        if session.index_of(record_id) is None:
+            raise HTTPError(404, f'项目中没有条目 {record_id}')
+        manager = None
+        if station:
+            manager = self.lease_manager(session, station)
+            if not manager.claim(record_id):
+                raise HTTPError(409, f'{record_id} 已分配给其他工位')
+        return session, manager
+
+    def _take_stored(self, session, manager, record_id, filename):
+        """录音已放到最终位置：更新索引和租约表，返回 (已录制条数, 总条数)"""
+        session.mark_recorded(record_id, filename)
+        if manager is not None:
+            manager.complete(record_id)
+        return self.counts(session)
+
+    def _store_take(self, recordings_dir, record_id, temp_path):
+        """在线程池中执行：识别格式、保留旧版本并放到最终位置，返回 (文件名, 时长)"""
+        with open(temp_path, 'rb') as f:
+            header = f.read(12)
+        if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+            extension = '.wav'
+        elif header[:4] == b'fLaC':
+            extension = '.flac'
+        else:
+            raise HTTPError(415, '只支持 WAV 或 FLAC 录音')
+        duration = read_audio_duration(temp_path)
+        if duration <= 0:
+            raise HTTPError(415, '录音文件无法解析或没有数据')
+
+        store = None
+        if self.keep_takes:
+            store = self.take_stores.get(recordings_dir)
+            if store is None:
+                store = self.take_stores[recordings_dir] = TakeStore(recordings_dir)
+        with replacing_take(recordings_dir, record_id, extension, store) as path:
+            os.replace(temp_path, path)
+        return os.path.basename(path), duration
+
+    # ---- HTTP ----
+
+    async def handle_connection(self, reader, writer):
+        """处理一个连接上的请求（支持 keep-alive）"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, _ = request_line.decode('latin-1').split()
+                except ValueError:
+                    await self.send_json(writer, 400, {'error': '请求行格式错误'}, close=True)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    key, _, value = line.decode('latin-1').partition(':')
+                    headers[key.strip().lower()] = value.strip()
+                request = Request(method, target, headers, reader)
+
+                if request.path == '/ws' and headers.get('upgrade', '').lower() == 'websocket':
+                    await self.websocket(request, writer)
+                    break
+
+                status, result = await self.dispatch(request)
+                # 处理函数没有读取请求体时无法继续复用连接
+                close = not request.consumed or headers.get('connection', '').lower() == 'close'
+                if isinstance(result, FileResponse):
+                    await result.send(writer, close)
+                else:
+                    await self.send_json(writer, status, result, close)
+                if close:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, request):
+        """按路由调用处理函数，返回 (状态码, 结果)"""
+        allowed = False
+        for method, pattern, handler in self.routes:
+            match = re.fullmatch(pattern, request.path)
+            if match is None:
+                continue
+            if method != request.method:
+                allowed = True
+                continue
+            try:
+                return 200, await handler(request, *match.groups())
+            except HTTPError as e:
+                return e.status, {'error': e.message}
+            except (ConnectionError, asyncio.IncompleteReadError):
+                raise
+            except Exception as e:
+                print(f"⚠️ 处理 {request.method} {request.path} 失败：{e}")
+                return 500, {'error': str(e)}
+        if allowed:
+            return 405, {'error': f'不支持 {request.method}'}
+        return 404, {'error': f'没有接口 {request.path}'}
+
+    async def send_json(self, writer, status, data, close=False):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        writer.write(response_head(status, 'application/json; charset=utf-8', len(body), close) + body)
+        await writer.drain()
+
+    # ---- WebSocket ----
+
+    async def websocket(self, request, writer):
+        """WebSocket 连接：服务器推送事件；客户端可发送 {"type": "subscribe", "project": 名称} 只接收指定项目"""
+        key = request.headers.get('sec-websocket-key', '')
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        writer.write(('HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n'
+                      f'Sec-WebSocket-Accept: {accept}\r\n\r\n').encode())
+        await writer.drain()
+        client = WebSocketClient(writer)
+        self.clients.add(client)
+        try:
+            while True:
+                opcode, payload = await read_frame(request.reader)
+                if opcode == 0x8:
+                    await client.send(payload, opcode=0x8)
+                    break
+                if opcode == 0x9:
+                    await client.send(payload, opcode=0xA)
+                elif opcode == 0x1:
+                    try:
+                        message = json.loads(payload)
+                    except ValueError:
+                        continue
+                    if isinstance(message, dict) and message.get('type') == 'subscribe':
+                        client.project = message.get('project')
+        finally:
+            self.clients.discard(client)
+
+    async def broadcast(self, event):
+        """向所有（订阅了该项目的）WebSocket 客户端推送事件"""
+        data = json.dumps(event, ensure_ascii=False).encode('utf-8')
+        for client in list(self.clients):
+            if client.project in (None, event.get('project')):
+                try:
+                    await client.send(data)
+                except ConnectionError:
+                    self.clients.discard(client)
+
+    def close(self):
+        """释放所有工位的租约（在项目数据线程中关闭租约表）"""
+        self.executor.submit(self._close_leases).result()
+        self.executor.shutdown()
+
+    def _close_leases(self):
+        for manager in self.lease_managers.values():
+            try:
+                manager.close()
+            except Exception as e:
+                print(f"⚠️ 释放租约失败：{e}")
+        self.lease_managers.clear()
+        self.lease_signatures.clear()
+
+
+class FileResponse:
+    """分块发送文件"""
+
+    CONTENT_TYPES = {'.wav': 'audio/wav', '.flac': 'audio/flac'}
+
+    def __init__(self, path):
+        self.path = path
+
+    async def send(self, writer, close=False):
+        content_type = self.CONTENT_TYPES.get(os.path.splitext(self.path)[1].lower(), 'application/octet-stream')
+        with open(self.path, 'rb') as f:
+            writer.write(response_head(200, content_type, os.fstat(f.fileno()).st_size, close))
+            while True:
+                data = f.read(READ_CHUNK_BYTES)
+                if not data:
+                    break
+                writer.write(data)
+                await writer.drain()
+        await writer.drain()
+
+
+class WebSocketClient:
+    """一个 WebSocket 连接（服务器发送的帧不加掩码）"""
+
+    def __init__(self, writer):
+        self.writer = writer
+        self.project = None
+
+    async def send(self, payload, opcode=0x1):
+        length = len(payload)
+        if length < 126:
+            head = struct.pack('!BB', 0x80 | opcode, length)
+        elif length < 65536:
+            head = struct.pack('!BBH', 0x80 | opcode, 126, length)
+        else:
+            head = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+        self.writer.write(head + payload)
+        await self.writer.drain()
+
+
+async def read_frame(reader):
+    """读取一个 WebSocket 帧，返回 (opcode, 数据)；分片的消息合并后返回"""
+    message = b''
+    first_opcode = None
+    while True:
+        head = await reader.readexactly(2)
+        fin, opcode = head[0] & 0x80, head[0] & 0x0F
+        masked, length = head[1] & 0x80, head[1] & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', await reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', await reader.readexactly(8))[0]
+        if length > MAX_JSON_BYTES:
+            raise ConnectionError('WebSocket 帧过大')
+        mask = await reader.readexactly(4) if masked else b''
+        payload = await reader.readexactly(length)
+        if mask:
+            payload = bytes(b ^ mask[i % 4] for i, b in enumerate(payload))
+        if opcode >= 0x8:
+            return opcode, payload  # 控制帧不分片
+        if first_opcode is None:
+            first_opcode = opcode
+        message += payload
+        if fin:
+            return first_opcode, message
+
+
+def response_head(status, content_type, length, close=False):
+    """HTTP 响应头"""
+    return (f'HTTP/1.1 {status} {STATUS_TEXT.get(status, "")}\r\n'
+            f'Content-Type: {content_type}\r\nContent-Length: {length}\r\n'
+            f'Access-Control-Allow-Origin: *\r\n'
+            f'Connection: {"close" if close else "keep-alive"}\r\n\r\n').encode('latin-1')
+
+
+async def serve(server, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """启动服务器并一直运行"""
+    listener = await asyncio.start_server(server.handle_connection, host, port)
+    print(f"🌐 录音服务器已启动：http://{host}:{port}/api/projects")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+
+
+def main(argv=None):
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description='浏览器录音工位的本地服务器')
+    parser.add_argument('text_files', nargs='+', help='项目文本文件（每行 "ID 录音内容"）')
+    parser.add_argument('--host', default=DEFAULT_HOST, help='监听地址（默认只允许本机访问）')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help='监听端口')
+    parser.add_argument('--config', help='共享配置文件路径（默认 config.json）')
+    parser.add_argument('--output-dir', help='录音输出目录')
+    args = parser.parse_args(argv)
+
+    overrides = {'file_settings': {'output_directory': args.output_dir}} if args.output_dir else None
+    config = ConfigLoader(shared_file=args.config, overrides=overrides).load()
+    server = RecordingServer(args.text_files, config['file_settings']['output_directory'],
+                             keep_takes=config['recording_settings'].get('keep_takes', True),
+                             station_settings=config.get('station_settings', {}))
+    try:
+        asyncio.run(serve(server, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,186 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+多工位协同录制
+多台电脑共享同一个项目目录时，通过项目目录中的 SQLite 租约表分批分配条目：
+- 每个工位一次领取一批条目，租约过期后其他工位可以接手
+- 同一条目同一时间只属于一个工位，不会被重复录制
+"""
+
+import os
+import socket
+import sqlite3
+import time
+
+LEASE_DB_NAME = 'leases.db'
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_LEASE_SECONDS = 600
+
+
+def default_station_id():
+    """默认工位标识：主机名"""
+    return socket.gethostname() or 'station'
+
+
+class LeaseManager:
+    """项目租约表
+
+    leases 表中每个条目一行：position 为在文本文件中的顺序，
+    station/expires_at 为当前持有租约的工位及到期时间，done 表示已录制完成。
+    """
+
+    def __init__(self, project_dir, station_id=None, batch_size=DEFAULT_BATCH_SIZE,
+                 lease_seconds=DEFAULT_LEASE_SECONDS):
+        self.db_path = os.path.join(project_dir, LEASE_DB_NAME)
+        self.station_id = station_id or default_station_id()
+        self.batch_size = max(1, batch_size)
+        self.lease_seconds = lease_seconds
+        self.connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        self.connection.execute("PRAGMA busy_timeout = 30000")
+        self.connection.execute("""
+            CREATE TABLE IF NOT EXISTS leases (
+                record_id TEXT PRIMARY KEY,
+                position INTEGER NOT NULL,
+                station TEXT,
+                expires_at REAL NOT NULL DEFAULT 0,
+                done INTEGER NOT NULL DEFAULT 0,
+                done_by TEXT
+            )""")
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS leases_pending ON leases (done, position)")
+
+    def close(self, release=True):
+        """释放本工位未完成的租约（release 为假时保留）并关闭数据库"""
+        if self.connection is None:
+            return
+        try:
+            if release:
+                self.release()
+        finally:
+            self.connection.close()
+            self.connection = None
+
+    def _transaction(self):
+        """写事务（BEGIN IMMEDIATE 保证多个工位互斥）"""
+        return _Transaction(self.connection)
+
+    def sync_records(self, records, recorded_ids=()):
+        """同步条目列表（删除文本文件中已经没有的条目），已存在录音的条目标记为完成"""
+        with self._transaction() as cursor:
+            cursor.executemany(
+                "INSERT INTO leases (record_id, position) VALUES (?, ?) "
+                "ON CONFLICT(record_id) DO UPDATE SET position = excluded.position",
+                ((record['id'], position) for position, record in enumerate(records)))
+            cursor.execute("CREATE TEMP TABLE IF NOT EXISTS current_records (record_id TEXT PRIMARY KEY)")
+            cursor.execute("DELETE FROM current_records")
+            cursor.executemany("INSERT OR IGNORE INTO current_records (record_id) VALUES (?)",
+                               ((record['id'],) for record in records))
+            cursor.execute("DELETE FROM leases WHERE record_id NOT IN (SELECT record_id FROM current_records)")
+            # 已有录音的完成者未知（done_by 为空），任何工位都可以重新录制
+            cursor.executemany(
+                "UPDATE leases SET done = 1, station = NULL WHERE record_id = ? AND done = 0",
+                ((record_id,) for record_id in recorded_ids))
+
+    def acquire_batch(self, choose=None):
+        """领取一批条目（优先保留本工位已有的租约），返回按顺序排列的 id
+
+        choose(可领取的 id 集合, 数量) 返回按优先级排列的 id，用于按调度器的优先级领取；默认按文本顺序
+        """
+        now = time.time()
+        with self._transaction() as cursor:
+            if choose is None:
+                rows = cursor.execute(
+                    "SELECT record_id FROM leases "
+                    "WHERE done = 0 AND (station = ? OR station IS NULL OR expires_at < ?) "
+                    "ORDER BY station = ? DESC, position LIMIT ?",
+                    (self.station_id, now, self.station_id, self.batch_size)).fetchall()
+                ids = [row[0] for row in rows]
+            else:
+                rows = cursor.execute(
+                    "SELECT record_id, station = ? FROM leases "
+                    "WHERE done = 0 AND (station = ? OR station IS NULL OR expires_at < ?)",
+                    (self.station_id, self.station_id, now)).fetchall()
+                ids = [record_id for record_id, own in rows if own][:self.batch_size]
+                available = {record_id for record_id, own in rows if not own}
+                ids += list(choose(available, self.batch_size - len(ids)))[:self.batch_size - len(ids)]
+            cursor.executemany(
+                "UPDATE leases SET station = ?, expires_at = ? WHERE record_id = ?",
+                ((self.station_id, now + self.lease_seconds, record_id) for record_id in ids))
+        return self.active_leases()
+
+    def active_leases(self):
+        """本工位持有且未完成的条目"""
+        rows = self.connection.execute(
+            "SELECT record_id FROM leases WHERE station = ? AND done = 0 AND expires_at >= ? "
+            "ORDER BY position", (self.station_id, time.time())).fetchall()
+        return [row[0] for row in rows]
+
+    def claim(self, record_id):
+        """录制前确认条目归本工位所有（空闲或已过期时直接领取）"""
+        now = time.time()
+        with self._transaction() as cursor:
+            row = cursor.execute(
+                "SELECT station, expires_at, done, done_by FROM leases WHERE record_id = ?",
+                (record_id,)).fetchone()
+            if row is None:
+                return False
+            station, expires_at, done, done_by = row
+            if done:
+                # 已完成的条目只允许完成它的工位重新录制
+                return done_by in (None, self.station_id)
+            if station not in (None, self.station_id) and expires_at >= now:
+                return False
+            cursor.execute("UPDATE leases SET station = ?, expires_at = ? WHERE record_id = ?",
+                           (self.station_id, now + self.lease_seconds, record_id))
+            return True
+
+    def complete(self, record_id):
+        """条目录制完成"""
+        with self._transaction() as cursor:
+            cursor.execute(
+                "UPDATE leases SET done = 1, done_by = ?, station = NULL WHERE record_id = ?",
+                (self.station_id, record_id))
+
+    def complete_many(self, record_ids):
+        """一批条目完成（导入已有录音），在同一个事务中标记"""
+        with self._transaction() as cursor:
+            cursor.executemany(
+                "UPDATE leases SET done = 1, done_by = ?, station = NULL WHERE record_id = ?",
+                ((self.station_id, record_id) for record_id in record_ids))
+
+    def renew(self):
+        """延长本工位所有未完成租约的有效期"""
+        now = time.time()
+        with self._transaction() as cursor:
+            cursor.execute(
+                "UPDATE leases SET expires_at = ? WHERE station = ? AND done = 0 AND expires_at >= ?",
+                (now + self.lease_seconds, self.station_id, now))
+
+    def release(self):
+        """释放本工位未完成的租约，交给其他工位"""
+        with self._transaction() as cursor:
+            cursor.execute(
+                "UPDATE leases SET station = NULL, expires_at = 0 WHERE station = ? AND done = 0",
+                (self.station_id,))
+
+    def counts(self):
+        """统计 (已完成, 已租出, 总数)"""
+        done, leased, total = self.connection.execute(
+            "SELECT SUM(done), SUM(done = 0 AND station IS NOT NULL AND expires_at >= ?), COUNT(*) "
+            "FROM leases", (time.time(),)).fetchone()
+        return done or 0, leased or 0, total or 0
+
+
+class _Transaction:
+    """BEGIN IMMEDIATE ... COMMIT/ROLLBACK"""
+
+    def __init__(self, connection):
+        self.connection = connection
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection.cursor()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.connection.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
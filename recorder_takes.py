@@ -0,0 +1,191 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+录音版本管理
+重新录制时不覆盖原录音：当前使用的版本保持为 <目录>/<id>.<扩展名>（索引、导出都只看它），
+其他版本保存为 <目录>/takes/<id>.take<N>.<扩展名>，takes/takes.json 记录当前版本的编号。
+桌面程序、Project.save_audio、录音服务器和导入都通过 replacing_take() 放入新录音
+"""
+
+import os
+import time
+from contextlib import contextmanager
+
+from recorder_project import (AUDIO_EXTENSIONS, load_json_file, read_audio_duration, split_audio_name,
+                              write_json_atomic)
+
+TAKES_DIR_NAME = 'takes'
+TAKES_FILE_NAME = 'takes.json'
+TAKE_MARKER = '.take'
+
+
+def take_filename(record_id, number, extension):
+    """非当前版本的文件名"""
+    return f"{record_id}{TAKE_MARKER}{number}{extension}"
+
+
+def parse_take_filename(name):
+    """解析 <id>.take<N>.<扩展名>，返回 (id, N, 扩展名)，不是版本文件时返回 None"""
+    parsed = split_audio_name(name)
+    if parsed is None:
+        return None
+    base, extension = parsed
+    record_id, marker, number = base.rpartition(TAKE_MARKER)
+    if not marker or not record_id or not number.isdigit():
+        return None
+    return record_id, int(number), extension
+
+
+def existing_take(recordings_dir, record_id):
+    """目录中条目当前的录音文件名（多种格式并存时按 AUDIO_EXTENSIONS 的优先级），没有时返回 None"""
+    for extension in AUDIO_EXTENSIONS:
+        if os.path.exists(os.path.join(recordings_dir, record_id + extension)):
+            return record_id + extension
+    return None
+
+
+@contextmanager
+def replacing_take(recordings_dir, record_id, extension, take_store=None):
+    """放入条目的新录音，产生新录音的路径 <目录>/<id><扩展名>，由调用方写入或移入：
+
+        with replacing_take(目录, 条目 id, '.wav', store) as path:
+            os.replace(临时文件, path)
+
+    进入时已有的录音交给 take_store 保留为历史版本（为 None 时不保留，同格式的旧录音直接被覆盖）；
+    新录音确实写到 path 后才删除该条目其他格式的旧录音，避免索引指向过期文件；写入出错时恢复原来的版本
+    """
+    existing = [record_id + ext for ext in AUDIO_EXTENSIONS
+                if os.path.exists(os.path.join(recordings_dir, record_id + ext))]
+    archived = None
+    if take_store is not None:
+        for name in existing:
+            number = take_store.archive_active(record_id, name)
+            if archived is None:
+                archived = number
+    filename = record_id + extension
+    try:
+        yield os.path.join(recordings_dir, filename)
+    except BaseException:
+        if archived is not None:
+            try:
+                take_store.select(record_id, archived, existing_take(recordings_dir, record_id))
+            except Exception as restore_error:
+                print(f"⚠️ 恢复原录音失败：{restore_error}")
+        raise
+    if not os.path.exists(os.path.join(recordings_dir, filename)):
+        return
+    for name in existing:
+        if name != filename and os.path.exists(os.path.join(recordings_dir, name)):
+            os.remove(os.path.join(recordings_dir, name))
+
+
+class TakeStore:
+    """一个录音目录中各条目的录音版本
+
+    首次使用时扫描一次 takes/ 建立 id → {编号: 文件名} 索引，之后随操作更新
+    """
+
+    def __init__(self, recordings_dir):
+        self.recordings_dir = recordings_dir
+        self.takes_dir = os.path.join(recordings_dir, TAKES_DIR_NAME)
+        self.active_file = os.path.join(self.takes_dir, TAKES_FILE_NAME)
+        self._archived = None
+        self._active = None
+
+    def _load(self):
+        if self._archived is not None:
+            return
+        archived = {}
+        if os.path.isdir(self.takes_dir):
+            with os.scandir(self.takes_dir) as entries:
+                for entry in entries:
+                    parsed = parse_take_filename(entry.name)
+                    if parsed is not None:
+                        archived.setdefault(parsed[0], {})[parsed[1]] = entry.name
+        active = load_json_file(self.active_file, {})
+        self._archived = archived
+        self._active = active if isinstance(active, dict) else {}
+
+    def _save_active(self):
+        os.makedirs(self.takes_dir, exist_ok=True)
+        write_json_atomic(self.active_file, self._active, indent=2)
+
+    def active_number(self, record_id):
+        """当前版本的编号（没有记录时为 1）"""
+        self._load()
+        return self._active.get(record_id, 1)
+
+    def versions(self, record_id, active_filename=None):
+        """条目的全部版本 [(编号, 路径, 是否当前版本)]，按编号排列"""
+        self._load()
+        versions = [(number, os.path.join(self.takes_dir, name), False)
+                    for number, name in self._archived.get(record_id, {}).items()]
+        if active_filename:
+            versions.append((self.active_number(record_id),
+                             os.path.join(self.recordings_dir, active_filename), True))
+        return sorted(versions)
+
+    def archive_active(self, record_id, active_filename):
+        """重新录制前把当前版本移入 takes/，新录音的编号为已有最大编号加一
+
+        返回被移走的版本编号，当前版本文件不存在时返回 None
+        """
+        self._load()
+        number = self.active_number(record_id)
+        versions = self._archived.setdefault(record_id, {})
+        source = os.path.join(self.recordings_dir, active_filename)
+        archived = None
+        if os.path.exists(source):
+            os.makedirs(self.takes_dir, exist_ok=True)
+            name = take_filename(record_id, number, os.path.splitext(active_filename)[1])
+            os.replace(source, os.path.join(self.takes_dir, name))
+            versions[number] = name
+            archived = number
+        self._active[record_id] = max([number] + list(versions)) + 1
+        self._save_active()
+        return archived
+
+    def select(self, record_id, number, active_filename):
+        """把指定版本设为当前版本，返回新的当前文件名"""
+        self._load()
+        versions = self._archived.get(record_id, {})
+        if number not in versions:
+            raise KeyError(f"{record_id} 没有第 {number} 版录音")
+        selected = versions.pop(number)
+        current_number = self.active_number(record_id)
+        if active_filename and os.path.exists(os.path.join(self.recordings_dir, active_filename)):
+            name = take_filename(record_id, current_number, os.path.splitext(active_filename)[1])
+            os.replace(os.path.join(self.recordings_dir, active_filename), os.path.join(self.takes_dir, name))
+            versions[current_number] = name
+        new_filename = record_id + parse_take_filename(selected)[2]
+        os.replace(os.path.join(self.takes_dir, selected), os.path.join(self.recordings_dir, new_filename))
+        self._active[record_id] = number
+        self._save_active()
+        return new_filename
+
+    def collect_garbage(self, record_ids=None):
+        """删除未被选用的版本，返回 (删除的文件数, 释放的字节数)"""
+        self._load()
+        removed = 0
+        freed = 0
+        for record_id in list(self._archived if record_ids is None else record_ids):
+            for name in self._archived.pop(record_id, {}).values():
+                path = os.path.join(self.takes_dir, name)
+                try:
+                    freed += os.path.getsize(path)
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed, freed
+
+    def describe(self, record_id, active_filename=None):
+        """选择版本时显示的信息 [(编号, 路径, 是否当前版本, 时长, 修改时间)]"""
+        rows = []
+        for number, path, active in self.versions(record_id, active_filename):
+            try:
+                modified = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(os.path.getmtime(path)))
+            except OSError:
+                continue
+            rows.append((number, path, active, read_audio_duration(path), modified))
+        return rows
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""
+录音内容核对
+用本地安装的识别引擎转写已保存的录音，与条目文本比较得到 0~1 的相似度（1 - 字错误率），
+找出读错、漏读的录音。
+- 引擎可替换：内置 faster-whisper 和测试用的 sidecar（读取录音旁边的 .txt），
+  也可以用 "模块:类名" 指定自定义引擎，只需实现 transcribe(录音路径) -> 文本
+- 结果缓存在项目 manifest.json 的 verification 中，按录音 PCM 校验和（与备份共用）和引擎区分，
+  录音和文本都没有变化时不再重新识别
+"""
+
+import argparse
+import importlib
+import os
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+from recorder_backup import modify_manifest, update_manifest
+
+VERIFICATION_KEY = 'verification'
+DEFAULT_ENGINE = 'faster-whisper'
+DEFAULT_THRESHOLD = 0.8
+DEFAULT_WORKERS = 2
+
+
+def normalize_text(text):
+    """比较前去掉标点、空白和符号，全角转半角，英文转小写"""
+    text = unicodedata.normalize('NFKC', text or '').lower()
+    return ''.join(c for c in text if unicodedata.category(c)[0] not in 'PZSC')
+
+
+def edit_distance(a, b):
+    """编辑距离（逐字比较，适用于中文）"""
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+def similarity(reference, hypothesis):
+    """识别结果与条目文本的相似度：1 - 字错误率，最低为 0"""
+    reference = normalize_text(reference)
+    hypothesis = normalize_text(hypothesis)
+    if not reference:
+        return 1.0 if not hypothesis else 0.0
+    return max(0.0, 1.0 - edit_distance(reference, hypothesis) / len(reference))
+
+
+class SidecarEngine:
+    """测试用的替身引擎：读取 <录音路径>.txt 作为识别结果，没有时为空"""
+
+    def __init__(self, **options):
+        self.key = 'sidecar'
+
+    def transcribe(self, path):
+        try:
+            with open(path + '.txt', 'r', encoding='utf-8') as f:
+                return f.read().strip()
+        except FileNotFoundError:
+            return ''
+
+
+class FasterWhisperEngine:
+    """faster-whisper 本地识别（需要 pip install faster-whisper）"""
+
+    def __init__(self, model='small', language=None, **options):
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError:
+            raise RuntimeError("未安装 faster-whisper，请运行 pip install faster-whisper")
+        self.key = f'faster-whisper:{model}'
+        self.language = language or None
+        self.model = WhisperModel(model, device='auto', compute_type='auto')
+
+    def transcribe(self, path):
+        segments, _ = self.model.transcribe(path, language=self.language, beam_size=1)
+        return ''.join(segment.text for segment in segments)
+
+
+ENGINES = {
+    'sidecar': SidecarEngine,
+    'faster-whisper': FasterWhisperEngine,
+}
+
+
+def create_engine(name, **options):
+    """按名称创建识别引擎；'模块:类名' 形式加载自定义引擎"""
+    if name in ENGINES:
+        return ENGINES[name](**options)
+    module_name, sep, class_name = name.partition(':')
+    if not sep:
+        raise ValueError(f"未知的识别引擎：{name}")
+    engine = getattr(importlib.import_module(module_name), class_name)(**options)
+    if not hasattr(engine, 'key'):
+        engine.key = name
+    return engine
+
+
+def verify_takes(project_dir, items, engine, workers=DEFAULT_WORKERS, progress=None, force=False):
+    """核对一批录音
+
+    items 为 [(条目 id, 条目文本, 录音路径)]，录音须在 project_dir 中。
+    返回 {条目 id: {'score', 'hypothesis', 'text', 'hash'}}，新结果写回 manifest.json
+    """
+    manifest = update_manifest(project_dir)
+    cache = manifest.get(VERIFICATION_KEY, {}).get(engine.key, {})
+    results = {}
+    pending = []
+    for record_id, text, path in items:
+        relative = os.path.relpath(path, project_dir).replace(os.sep, '/')
+        entry = manifest['files'].get(relative)
+        if entry is None:
+            continue
+        cached = cache.get(entry['hash'])
+        if cached is not None and cached.get('text') == text and not force:
+            results[record_id] = dict(cached, hash=entry['hash'])
+        else:
+            pending.append((record_id, text, path, entry['hash']))
+
+    def run(item):
+        record_id, text, path, digest = item
+        hypothesis = engine.transcribe(path)
+        return record_id, digest, {'text': text, 'hypothesis': hypothesis,
+                                   'score': round(similarity(text, hypothesis), 4)}
+
+    new_results = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        for done, (record_id, digest, result) in enumerate(executor.map(run, pending), 1):
+            new_results[digest] = result
+            results[record_id] = dict(result, hash=digest)
+            if progress:
+                progress(done, len(pending))
+
+    if new_results:
+        # 识别可能持续几分钟，期间写入的其他数据（如审听结论）要保留，只合并本引擎的结果
+        modify_manifest(project_dir, lambda current: current.setdefault(VERIFICATION_KEY, {})
+                        .setdefault(engine.key, {}).update(new_results))
+    return results
+
+
+def low_scores(results, threshold=DEFAULT_THRESHOLD):
+    """相似度低于阈值的条目 [(条目 id, 结果)]，按分数从低到高排列"""
+    return sorted(((record_id, result) for record_id, result in results.items() if result['score'] < threshold),
+                  key=lambda item: item[1]['score'])
+
+
+def main(argv=None):
+    """命令行入口"""
+    from recorder_api import Project
+    from recorder_config import ConfigLoader
+
+    parser = argparse.ArgumentParser(description='用语音识别核对录音内容')
+    parser.add_argument('text_file', help='项目文本文件')
+    parser.add_argument('--speaker', help='说话人')
+    parser.add_argument('--output-dir', help='录音输出目录')
+    parser.add_argument('--engine', help='识别引擎（faster-whisper、sidecar 或 模块:类名）')
+    parser.add_argument('--model', help='识别模型')
+    parser.add_argument('--threshold', type=float, help='低于该相似度的录音会列出')
+    parser.add_argument('--workers', type=int, help='并行线程数')
+    parser.add_argument('--force', action='store_true', help='忽略缓存重新识别')
+    args = parser.parse_args(argv)
+
+    config = ConfigLoader().load()
+    settings = config.get('verify_settings', {})
+    project = Project(args.text_file, args.output_dir, speaker=args.speaker, config=config)
+    engine = create_engine(args.engine or settings.get('engine', DEFAULT_ENGINE),
+                           model=args.model or settings.get('model', 'small'),
+                           language=settings.get('language') or None)
+    items = [(record['id'], record['text'], path) for _, record, path in project.iter_takes()]
+    results = verify_takes(project.project_dir, items, engine, args.workers or settings.get('workers', DEFAULT_WORKERS),
+                           lambda done, total: print(f"\r🔍 {done}/{total}", end=''), args.force)
+    print()
+    threshold = args.threshold if args.threshold is not None else settings.get('threshold', DEFAULT_THRESHOLD)
+    low = low_scores(results, threshold)
+    for record_id, result in low:
+        print(f"❌ {record_id} {result['score']:.2f}  文本：{result['text']}  识别：{result['hypothesis']}")
+    print(f"✅ 核对 {len(results)} 条录音，{len(low)} 条低于 {threshold}")
+    return 1 if low else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())